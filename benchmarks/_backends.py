@@ -0,0 +1,61 @@
+"""Backends shared by the benchmark scripts and the test suite."""
+import sys
+
+
+def fake_redis_clients():
+    """(sync, async) fakeredis clients sharing one in-process server."""
+    import fakeredis
+
+    server = fakeredis.FakeServer()
+    return (
+        fakeredis.FakeRedis(server=server, decode_responses=True),
+        fakeredis.FakeAsyncRedis(server=server, decode_responses=True),
+    )
+
+
+def fake_redis_bindings(r, ar) -> list[tuple[object, str, object]]:
+    """
+    (module, attribute, value) for every module-level Redis client and
+    registered Lua script in the services, rebound to `r` / `ar`.
+    Scripts are bound to the client they were registered on, so they are
+    re-registered too.
+    """
+    from src.services import redis_service as rs
+    from src.services import availability as av
+
+    return [
+        (rs, "r", r),
+        (rs, "ar", ar),
+        (rs, "_write_context", r.register_script(rs._WRITE_CONTEXT_LUA)),
+        (rs, "_write_context_async", ar.register_script(rs._WRITE_CONTEXT_LUA)),
+        (av, "r", r),
+        (av, "ar", ar),
+        (av, "_STORE_DAY", r.register_script(av._STORE_DAY.script)),
+        (av, "_STORE_DAY_ASYNC", ar.register_script(av._STORE_DAY.script)),
+        (av, "_MARK_SLOT", r.register_script(av._MARK_SLOT.script)),
+        (av, "_ACQUIRE_HOLD", ar.register_script(av._ACQUIRE_HOLD.script)),
+        (av, "_RELEASE_HOLD", ar.register_script(av._RELEASE_HOLD.script)),
+    ]
+
+
+def use_fake_redis():
+    """Point the services' Redis clients at one in-process fakeredis server."""
+    try:
+        r, ar = fake_redis_clients()
+    except ImportError:
+        sys.exit('fakeredis is not installed: pip install ".[bench]", or run with --redis real')
+    for module, name, value in fake_redis_bindings(r, ar):
+        setattr(module, name, value)
+    return r, ar
+
+
+def setup_app(db_url: str):
+    """The process's Flask app on `db_url`, schema created."""
+    from src.app_factory import create_app
+    from src.services.db_context import set_app
+    from extensions import db
+
+    app = set_app(create_app({"SQLALCHEMY_DATABASE_URI": db_url, "AUTO_CREATE_SCHEMA": True}))
+    with app.app_context():
+        db.create_all()
+    return app
@@ -0,0 +1,332 @@
+"""
+Concurrent-call load simulator: N simulated callers drive the real voice
+tools (src/routes/livekit/tools.py) through scripted flows, without LiveKit,
+against a local Redis stand-in (or a real Redis DB) and SQLite/MySQL.
+
+    python benchmarks/load_sim.py                              # 20 callers, fakeredis, temp SQLite
+    python benchmarks/load_sim.py --callers 100 --calls 5 --days 2
+    python benchmarks/load_sim.py --redis real --redis-db 15 --db mysql+pymysql://u:p@localhost/clinic_load
+    python benchmarks/load_sim.py --json load.json
+
+Reports per-tool p50/p99 latency, throughput, reply outcomes (booked, lost
+race, slow DB, errors), double-booking incidents and event-loop lag.
+Never point --db or --redis real at production data: the run writes
+bookings and (for a fresh database) creates the schema.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from time import perf_counter
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Keep every span of the run for the percentiles (read at import)
+os.environ.setdefault("LATENCY_WINDOW", "200000")
+
+from _backends import use_fake_redis, setup_app  # noqa: E402 (benchmarks/ is sys.path[0])
+
+
+# -------------------------------
+# 👥 CALLERS + FLOWS
+# -------------------------------
+
+# Reply fragments → outcome buckets (tools answer in speech, not status codes)
+_OUTCOMES = (
+    ("confirmed", "booked"),
+    ("I’ve moved your appointment", "rescheduled"),
+    ("is canceled", "cancelled"),
+    ("was just taken", "lost_race"),
+    ("taking a little longer", "slow_db"),
+    ("are full", "no_slots"),
+    ("don’t have any upcoming", "no_appointment"),
+    ("Sorry, I couldn", "error"),
+)
+
+
+def _outcome(reply: str) -> str:
+    for fragment, outcome in _OUTCOMES:
+        if fragment in (reply or ""):
+            return outcome
+    return "other"
+
+
+def _letters(n: int) -> str:
+    """0 → 'A', 25 → 'Z', 26 → 'BA' …: names must be letters only."""
+    out = ""
+    while True:
+        out = chr(ord("A") + n % 26) + out
+        n //= 26
+        if not n:
+            return out
+
+
+class Sim:
+    def __init__(self, args, dates: list[str]):
+        self.args = args
+        self.dates = dates
+        self.rng = random.Random(args.seed)
+        self.outcomes: dict[str, int] = {}
+        self.calls = 0
+        self.tool_calls = 0
+        self.returning: list[str] = []  # phones of seeded patients with an upcoming booking
+
+    def _count(self, outcome: str):
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    async def _tool(self, fn, *args, **kwargs) -> str:
+        self.tool_calls += 1
+        reply = await fn(*args, **kwargs)
+        if self.args.think_ms:
+            await asyncio.sleep(self.rng.uniform(0, self.args.think_ms) / 1000)
+        return reply
+
+    def _pick(self, ctx) -> str | None:
+        slots = ctx.suggested_slots or []
+        if not slots:
+            return None
+        return slots[0] if self.args.pick == "first" else self.rng.choice(slots)
+
+    async def new_booking(self, t, ctx, caller: int):
+        await self._tool(t.save_name, f"Load {_letters(caller)}")
+        await self._tool(t.save_phone, f"1555{caller:07d}")
+        for _ in range(3):  # a lost race → look again, like a real caller
+            reply = await self._tool(t.available_slot, date=self.rng.choice(self.dates))
+            time = self._pick(ctx)
+            if time is None:
+                return _outcome(reply)
+            reply = await self._tool(t.hold_slot, time)
+            if _outcome(reply) == "lost_race":
+                continue
+            reply = await self._tool(t.booking_appointment)
+            if _outcome(reply) != "lost_race":
+                return _outcome(reply)
+        return "lost_race"
+
+    async def reschedule(self, t, ctx, caller: int):
+        if not self.returning:
+            return await self.new_booking(t, ctx, caller)
+        await self._tool(t.save_phone, self.returning.pop())
+        await self._tool(t.start_reschedule)
+        reply = await self._tool(t.available_slot, date=self.rng.choice(self.dates))
+        time = self._pick(ctx)
+        if time is None:
+            return _outcome(reply)
+        return _outcome(await self._tool(t.confirm_reschedule, time))
+
+    async def cancel(self, t, ctx, caller: int):
+        if not self.returning:
+            return await self.new_booking(t, ctx, caller)
+        await self._tool(t.save_phone, self.returning.pop())
+        await self._tool(t.start_cancel)
+        return _outcome(await self._tool(t.confirm_cancel))
+
+    async def call(self, caller: int, n: int):
+        """One simulated call, in its own task (own participant + trace), like the entrypoint."""
+        from src.routes.livekit import tools as t
+        from src.services.context_manager import CURRENT_PARTICIPANT, bind_context, release_context
+        from src.services.redis_service import BookingContext
+        from src.services.availability import release_slot_hold
+        from latency_tracker import start_trace, record_span
+
+        pid = f"sim_{caller}_{n}"
+        CURRENT_PARTICIPANT.set(pid)
+        ctx = bind_context(pid, BookingContext())
+        start_trace(pid)
+
+        flow = self.rng.choices(
+            [self.new_booking, self.reschedule, self.cancel],
+            weights=[self.args.new, self.args.reschedule, self.args.cancel],
+        )[0]
+        started = perf_counter()
+        try:
+            outcome = await flow(t, ctx, caller * self.args.calls + n)
+        except Exception as e:
+            outcome = f"crash:{type(e).__name__}"
+        finally:
+            if ctx.held_slot:
+                await release_slot_hold(*ctx.held_slot, pid)
+            release_context(pid)
+        record_span(f"call.{flow.__name__}", started)
+        self.calls += 1
+        self._count(outcome)
+
+    async def caller(self, caller: int):
+        for n in range(self.args.calls):
+            await asyncio.create_task(self.call(caller, n))
+
+
+def _seed_returning(sim: Sim, count: int):
+    """Patients with an upcoming booking, for the reschedule/cancel flows."""
+    from src.services import clinic_service as cs
+    from src.services.availability import CLINIC_SLOTS
+
+    slots = [(d, s) for d in sim.dates for s in CLINIC_SLOTS]
+    sim.rng.shuffle(slots)
+    # At most half the capacity, so new bookings still find room
+    for i, (date, time) in enumerate(slots[:min(count, len(slots) // 2)]):
+        phone = f"1666{i:07d}"
+        with cs.unit_of_work() as uow:
+            patient = cs.get_or_create_patient(f"Seed {_letters(i)}", phone, uow=uow)
+            cs.create_appointment(patient["id"], date, time, uow=uow)
+        sim.returning.append(phone)
+
+
+# -------------------------------
+# ⏱️ EVENT-LOOP LAG
+# -------------------------------
+
+async def _watch_loop_lag(samples: list[float], stop: asyncio.Event, interval: float = 0.01):
+    """How late a 10 ms timer fires: time the loop spent blocked on someone else's work."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        before = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - before - interval) * 1000)
+
+
+# -------------------------------
+# 📋 REPORT
+# -------------------------------
+
+def _double_bookings() -> int:
+    """Slots holding more than one active appointment (must be 0)."""
+    from sqlalchemy import func
+    from extensions import db
+    from src.models import Appointment
+    from src.models.appointments_db import ACTIVE_STATUSES
+    from src.services.db_context import get_app
+
+    with get_app().app_context():
+        rows = (
+            db.session.query(Appointment.start_at, func.count(Appointment.id))
+            .filter(Appointment.status.in_(ACTIVE_STATUSES))
+            .group_by(Appointment.start_at)
+            .having(func.count(Appointment.id) > 1)
+            .all()
+        )
+    return sum(count - 1 for _, count in rows)
+
+
+def _report(sim: Sim, wall: float, lag: list[float]) -> dict:
+    from latency_tracker import latency_stats, percentile
+    from src.services.db_executor import db_pool_stats
+
+    lag = sorted(lag)
+    spans = latency_stats()
+    return {
+        "callers": sim.args.callers,
+        "calls": sim.calls,
+        "wall_s": round(wall, 2),
+        "calls_per_s": round(sim.calls / wall, 2) if wall else 0.0,
+        "tool_calls_per_s": round(sim.tool_calls / wall, 2) if wall else 0.0,
+        "outcomes": dict(sorted(sim.outcomes.items())),
+        "double_bookings": _double_bookings(),
+        "loop_lag_ms": {
+            "p50": round(percentile(lag, 0.50), 1),
+            "p99": round(percentile(lag, 0.99), 1),
+            "max": round(max(lag, default=0.0), 1),
+        },
+        "spans": {
+            name: {"n": s["count"], "p50_ms": s["p50_ms"], "p99_ms": s["p99_ms"]}
+            for name, s in spans.items()
+        },
+        "db_pool": db_pool_stats(),
+    }
+
+
+def _print(report: dict):
+    print(
+        f"{report['calls']} calls from {report['callers']} callers in {report['wall_s']}s "
+        f"→ {report['calls_per_s']} calls/s, {report['tool_calls_per_s']} tool calls/s"
+    )
+    print("outcomes:        " + ", ".join(f"{k}={v}" for k, v in report["outcomes"].items()))
+    print(f"double bookings: {report['double_bookings']}")
+    lag = report["loop_lag_ms"]
+    print(f"loop lag (ms):   p50={lag['p50']}  p99={lag['p99']}  max={lag['max']}")
+    print(f"db pool:         queue wait p95={report['db_pool']['wait_ms_p95']}ms, timeouts={report['db_pool']['timeouts']}")
+    print("latency (ms):")
+    for prefix in ("call.", "tool.", "db.", "redis."):
+        for name, s in report["spans"].items():
+            if name.startswith(prefix):
+                print(f"  {name:<34} n={s['n']:<6} p50={s['p50_ms']:<8} p99={s['p99_ms']}")
+
+
+async def _run(sim: Sim) -> tuple[float, list[float]]:
+    lag: list[float] = []
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(_watch_loop_lag(lag, stop))
+
+    started = perf_counter()
+    await asyncio.gather(*(sim.caller(i) for i in range(sim.args.callers)))
+    wall = perf_counter() - started
+
+    stop.set()
+    await watcher
+
+    from src.services.clinic_repository import dispose_engines
+    await dispose_engines()
+    return wall, lag
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent calls against the booking tools")
+    parser.add_argument("--callers", type=int, default=20, help="concurrent simulated callers")
+    parser.add_argument("--calls", type=int, default=3, help="calls per caller, back to back")
+    parser.add_argument("--days", type=int, default=7, help="days the callers spread over (fewer = more contention)")
+    parser.add_argument("--new", type=float, default=0.6, help="weight of the new-booking flow")
+    parser.add_argument("--reschedule", type=float, default=0.25, help="weight of the reschedule flow")
+    parser.add_argument("--cancel", type=float, default=0.15, help="weight of the cancel flow")
+    parser.add_argument("--pick", choices=["random", "first"], default="random", help="which offered slot callers take")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="max random pause after each tool reply")
+    parser.add_argument("--db", help="SQLAlchemy URL (default: a fresh temp SQLite file)")
+    parser.add_argument("--redis", choices=["fake", "real"], default="fake")
+    parser.add_argument("--redis-db", type=int, default=15, help="Redis DB number for --redis real")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", dest="json_path", help="write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep the services' INFO logs")
+    args = parser.parse_args(argv)
+
+    if args.redis == "fake":
+        use_fake_redis()
+    else:
+        os.environ["REDIS_DB"] = str(args.redis_db)
+
+    import logging
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.ERROR)
+
+    # Import the tools (and livekit.agents) now, not inside the timed run
+    from src.routes.livekit import tools  # noqa: F401
+
+    db_url = args.db or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='load_sim_'), 'load.db')}"
+    setup_app(db_url)
+
+    today = datetime.now()
+    dates = [(today + timedelta(days=1 + d)).strftime("%Y-%m-%d") for d in range(args.days)]
+    sim = Sim(args, dates)
+
+    # Enough returning patients for the reschedule/cancel share of the calls
+    total = args.callers * args.calls
+    share = (args.reschedule + args.cancel) / max(args.new + args.reschedule + args.cancel, 1e-9)
+    _seed_returning(sim, int(total * share) + 1)
+
+    wall, lag = asyncio.run(_run(sim))
+    report = _report(sim, wall, lag)
+    _print(report)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""
+Micro-benchmarks for the code that runs on every turn, compared against
+benchmarks/baseline.json: a regression past the tolerance exits non-zero.
+
+    python benchmarks/micro.py                      # full suite, compare to the baseline
+    python benchmarks/micro.py --only upcoming      # names containing "upcoming"
+    python benchmarks/micro.py --update-baseline    # record this machine's numbers
+    python benchmarks/micro.py --quick              # small sizes, smoke run
+
+Each benchmark runs several rounds, each long enough to swamp timer noise,
+with the GC off (as timeit does). The fastest round is the result, since
+slower ones only measure interference from the rest of the machine.
+
+Every result is also stored as a score: its time divided by a fixed
+pure-Python calibration loop. Scores are what get compared, so a baseline
+recorded on one machine stays meaningful on a faster or slower one.
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from time import perf_counter
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from _backends import use_fake_redis, setup_app  # noqa: E402 (benchmarks/ is sys.path[0])
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# A score this much above the baseline's fails the run
+DEFAULT_TOLERANCE = 0.30
+
+
+# -------------------------------
+# ⏱️ HARNESS
+# -------------------------------
+
+class Runner:
+    def __init__(self, rounds: int, round_sec: float):
+        self.rounds = rounds
+        self.round_sec = round_sec
+        self.results: dict[str, dict] = {}
+        self.unit_us = None
+        # The services print() on every save; those go to /dev/null during a run
+        self.out = sys.stdout
+
+    def _iterations(self, once) -> int:
+        """Loops per round so one round lasts about round_sec."""
+        n = 1
+        while True:
+            elapsed = once(n)
+            if elapsed >= self.round_sec / 4 or n >= 1_000_000:
+                return max(1, int(n * self.round_sec / max(elapsed, 1e-9)))
+            n *= 4
+
+    def _record(self, name: str, timings: list[float]):
+        per_op = min(timings) * 1e6
+        self.results[name] = {
+            "per_op_us": round(per_op, 3),
+            "median_us": round(statistics.median(timings) * 1e6, 3),
+        }
+        r = self.results[name]
+        print(f"  {name:<48} {r['per_op_us']:>12.2f} µs/op   (median {r['median_us']:.2f})", file=self.out, flush=True)
+
+    def bench(self, name: str, fn):
+        def once(n):
+            gc.disable()
+            try:
+                start = perf_counter()
+                for _ in range(n):
+                    fn()
+                return perf_counter() - start
+            finally:
+                gc.enable()
+
+        once(1)  # warm caches / lazy imports
+        n = self._iterations(once)
+        self._record(name, [once(n) / n for _ in range(self.rounds)])
+
+    def bench_async(self, name: str, make_coro, setup=None):
+        async def run():
+            if setup is not None:
+                await setup()
+
+            async def once_async(n):
+                gc.disable()
+                try:
+                    start = perf_counter()
+                    for _ in range(n):
+                        await make_coro()
+                    return perf_counter() - start
+                finally:
+                    gc.enable()
+
+            await once_async(1)
+            n = 1
+            while True:
+                elapsed = await once_async(n)
+                if elapsed >= self.round_sec / 4 or n >= 1_000_000:
+                    break
+                n *= 4
+            n = max(1, int(n * self.round_sec / max(elapsed, 1e-9)))
+            return [await once_async(n) / n for _ in range(self.rounds)]
+
+        self._record(name, asyncio.run(run()))
+
+    def calibrate(self):
+        """
+        Fixed pure-Python workload: the unit scores are expressed in. Run at
+        the start and the end of the suite; the faster run counts.
+        """
+        data = {"name": "Calibration", "phone": "15550001111", "slots": list(range(14))}
+
+        def work():
+            total = 0
+            for i in range(200):
+                total += len(json.dumps(data)) + i % 7
+            return total
+
+        self.bench("calibration", work)
+        unit = self.results.pop("calibration")["per_op_us"]
+        self.unit_us = min(unit, self.unit_us or unit)
+
+    def score(self):
+        for r in self.results.values():
+            r["score"] = round(r["per_op_us"] / self.unit_us, 4)
+
+
+# -------------------------------
+# 🌱 FIXTURES
+# -------------------------------
+
+def _today() -> str:
+    import pytz
+    return datetime.now(pytz.timezone("Asia/Karachi")).strftime("%Y-%m-%d")
+
+
+def seed_appointments(app, total: int, state: dict):
+    """
+    Grow the appointment table to `total` rows: history spread over many
+    patients (bulk inserts, no per-row ORM work) plus one upcoming booking
+    for the patient the lookups target and a booked day for today.
+    """
+    from extensions import db
+    from src.models import Patient, Appointment
+    from src.models.appointments_db import compose_start_at
+    from src.services.availability import CLINIC_SLOTS
+
+    with app.app_context():
+        if "target" not in state:
+            target = Patient(name="Bench Target", phone="15559990000")
+            db.session.add(target)
+            db.session.flush()
+            db.session.add(Appointment(
+                patient_id=target.id, date=(datetime.now() + timedelta(days=3)).strftime("%Y-%m-%d"),
+                time="10:00 AM", status="Booked",
+            ))
+            for minute in range(20):
+                db.session.add(Appointment(patient_id=target.id, date=_today(), time=f"9:{minute:02d} AM", status="Booked"))
+            db.session.commit()
+            state["target"] = target.id
+            state["patients"] = [target.id]
+            state["rows"] = 21
+
+        missing = total - state["rows"]
+        if missing <= 0:
+            return
+
+        # ~10 visits per patient
+        new_patients = max(1, missing // 10)
+        start = len(state["patients"])
+        db.session.execute(Patient.__table__.insert(), [
+            {"name": f"History {start + i}", "name_lower": f"history {start + i}",
+             "phone": f"1444{start + i:07d}", "created_at": datetime(2024, 1, 1)}
+            for i in range(new_patients)
+        ])
+        ids = [pid for (pid,) in db.session.query(Patient.id).order_by(Patient.id.desc()).limit(new_patients)]
+        state["patients"].extend(ids)
+
+        patients = state["patients"]
+        first_day = datetime(2020, 1, 1)
+        rows = []
+        for i in range(missing):
+            day = (first_day + timedelta(days=(state["rows"] + i) // len(CLINIC_SLOTS))).strftime("%Y-%m-%d")
+            time = CLINIC_SLOTS[i % len(CLINIC_SLOTS)]
+            rows.append({
+                "patient_id": patients[i % len(patients)],
+                "date": day, "time": time, "status": "Completed",
+                "start_at": compose_start_at(day, time), "slot_key": None,
+                "created_at": first_day,
+            })
+            if len(rows) == 5000:
+                db.session.execute(Appointment.__table__.insert(), rows)
+                rows = []
+        if rows:
+            db.session.execute(Appointment.__table__.insert(), rows)
+        db.session.commit()
+        state["rows"] = total
+
+
+def seed_redis(total_keys: int, live: int):
+    """`total_keys` Redis keys: caller profiles plus `live` in-call contexts."""
+    from src.services import redis_service as rs
+
+    pipe = rs.r.pipeline(transaction=False)
+    for i in range(total_keys - live):
+        pipe.set(rs._caller_key(f"1333{i:07d}"), json.dumps({"name": f"Caller {i}", "phone": f"1333{i:07d}"}), ex=3600)
+        if i % 1000 == 999:
+            pipe.execute()
+    pipe.execute()
+    for i in range(live):
+        rs.save_context(f"live_{i}", rs.BookingContext(name=f"Live {i}", phone=f"1222{i:07d}", stage="start"))
+
+
+# -------------------------------
+# 🏃 SUITE
+# -------------------------------
+
+def run_suite(runner: Runner, args, app):
+    from src.services import clinic_service as cs
+    from src.services import redis_service as rs
+    from src.services import availability as av
+    from src.services.context_manager import CURRENT_PARTICIPANT, bind_context, _ctx, _save
+
+    state: dict = {}
+    selected = lambda name: not args.only or any(o in name for o in args.only)
+
+    # --- session context (every tool call) ---
+    if selected("context"):
+        sample = rs.BookingContext(
+            name="Ada Lovelace", phone="15550001111", date="2030-01-02", time="10:00 AM",
+            stage="confirm", status="new", suggested_slots=["10:00 AM", "10:30 AM", "11:00 AM"],
+        )
+        args_list = rs._context_args("bench", sample, 300, "checkpoint")
+        stored = {args_list[i]: args_list[i + 1] for i in range(4, len(args_list), 2)}
+        runner.bench("context.serialize", lambda: rs._context_args("bench", sample, 300, "checkpoint"))
+        runner.bench("context.parse", lambda: rs._parse_context(stored))
+
+        async def bind():
+            CURRENT_PARTICIPANT.set("bench_call")
+            bind_context("bench_call", sample)
+
+        async def ctx_and_save():
+            await _save(await _ctx())
+
+        runner.bench_async("context._ctx+_save", ctx_and_save, setup=bind)
+
+    # --- slot filtering (available_slot) ---
+    if selected("slots"):
+        date = (datetime.now() + timedelta(days=2)).strftime("%Y-%m-%d")
+        busy = av.mask_for(["9:00 AM", "10:30 AM", "2:00 PM"])
+        runner.bench("slots.filter_mask", lambda: av.slots_from_mask(av.ALL_SLOTS_MASK & ~busy & av.filter_mask("after 2")))
+
+        async def warm():
+            await av.free_slots(date)  # builds the day's bitmap once
+
+        runner.bench_async("slots.free_slots[warm bitmap]", lambda: av.free_slots(date, "afternoon", holder="bench"), setup=warm)
+
+    # --- database reads ---
+    cs.get_data_version = lambda: None  # the dashboard snapshot rebuilds every time
+    for size in args.sizes:
+        seed_appointments(app, size, state)
+        label = f"{size // 1000}k" if size >= 1000 else str(size)
+
+        if selected("upcoming"):
+            def upcoming():
+                cs._upcoming_cache.clear()  # measure the query, not the cache
+                return cs.get_upcoming_appointment(state["target"])
+            runner.bench(f"db.get_upcoming_appointment[{label}]", upcoming)
+
+        if size == args.sizes[min(1, len(args.sizes) - 1)]:
+            if selected("booked"):
+                runner.bench(f"db.get_booked_slots[{label}]", lambda: cs.get_booked_slots(_today()))
+            if selected("dashboard"):
+                def snapshot():
+                    cs._snapshot_cache.clear()
+                    return cs.get_dashboard_snapshot()
+                runner.bench(f"db.get_dashboard_snapshot[{label}]", snapshot)
+
+    # --- dashboard live calls ---
+    if selected("sessions"):
+        seed_redis(args.redis_keys, live=100)
+        label = f"{args.redis_keys // 1000}k" if args.redis_keys >= 1000 else str(args.redis_keys)
+        runner.bench(f"redis.list_active_sessions[{label} keys, 100 live]", rs.list_active_sessions)
+
+
+# -------------------------------
+# 📏 BASELINE
+# -------------------------------
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    base = baseline.get("results", {})
+    print(f"\nvs baseline (tolerance +{tolerance:.0%} on calibrated score):")
+    for name, r in results.items():
+        b = base.get(name)
+        if not b or not b.get("score"):
+            print(f"  {name:<48} (no baseline)")
+            continue
+        change = r["score"] / b["score"] - 1
+        flag = "REGRESSION" if change > tolerance else ""
+        print(f"  {name:<48} {change:+7.1%}  {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Booking hot-path micro-benchmarks")
+    parser.add_argument("--only", action="append", help="run benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--quick", action="store_true", help="small sizes and short rounds (smoke run)")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--round-sec", type=float, default=0.2)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--redis", choices=["fake", "real"], default="fake")
+    parser.add_argument("--redis-db", type=int, default=15, help="Redis DB number for --redis real (gets flushed)")
+    parser.add_argument("--json", dest="json_path", help="also write this run's results here")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.sizes, args.redis_keys = [10, 1_000], 1_000
+        args.rounds, args.round_sec = 3, 0.02
+    else:
+        args.sizes, args.redis_keys = [10, 1_000, 100_000], 10_000
+
+    if args.redis == "fake":
+        use_fake_redis()
+    else:
+        os.environ["REDIS_DB"] = str(args.redis_db)
+
+    import logging
+    logging.getLogger().setLevel(logging.ERROR)
+
+    app = setup_app(f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='micro_'), 'bench.db')}")
+    if args.redis == "real":
+        from src.services.redis_service import r
+        r.flushdb()
+
+    runner = Runner(args.rounds, args.round_sec)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        runner.calibrate()
+        run_suite(runner, args, app)
+        runner.calibrate()
+    runner.score()
+    print(f"\ncalibration unit: {runner.unit_us:.2f} µs", file=runner.out)
+
+    report = {
+        "python": sys.version.split()[0],
+        "redis": args.redis,
+        "calibration_us": runner.unit_us,
+        "results": runner.results,
+    }
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nbaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("\nno baseline yet: run with --update-baseline")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(runner.results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        return 1
+    print("\n✅ no regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
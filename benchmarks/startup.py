@@ -0,0 +1,116 @@
+"""
+Time-to-ready for the two entrypoints, each measured in a fresh interpreter
+(what an autoscaled process pays on boot):
+
+    worker     import livekit_worker           (+ prewarm() with --prewarm)
+    dashboard  import wsgi → first GET /       (app built, first request served)
+
+    python benchmarks/startup.py                  # 5 cold runs each
+    python benchmarks/startup.py --runs 10 --prewarm --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Each probe prints one JSON object of phase → seconds on its last line
+_WORKER_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import livekit_worker
+from src.routes.livekit.main import prewarm
+out = {"import": time.perf_counter() - t0}
+if PREWARM:
+    class _Proc:
+        userdata = {}
+    t1 = time.perf_counter()
+    prewarm(_Proc())
+    out["prewarm"] = time.perf_counter() - t1
+out["ready"] = time.perf_counter() - t0
+print(json.dumps(out))
+"""
+
+_DASHBOARD_PROBE = """
+import json, time
+t0 = time.perf_counter()
+import wsgi
+out = {"import": time.perf_counter() - t0}
+t1 = time.perf_counter()
+status = wsgi.app.test_client().get("/").status_code
+out["first_request"] = time.perf_counter() - t1
+out["ready"] = time.perf_counter() - t0
+out["status"] = status
+print(json.dumps(out))
+"""
+
+
+def _probe(code: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "probe failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def measure(name: str, code: str, runs: int) -> dict:
+    samples = [_probe(code) for _ in range(runs)]
+    phases = [k for k, v in samples[0].items() if isinstance(v, float)]
+    result = {"target": name, "runs": runs}
+    for phase in phases:
+        values = sorted(s[phase] for s in samples)
+        result[phase] = {
+            "median_ms": round(statistics.median(values) * 1000, 1),
+            "max_ms": round(values[-1] * 1000, 1),
+        }
+    if "status" in samples[0]:
+        result["status"] = samples[0]["status"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start time of the worker and the dashboard")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--only", choices=["worker", "dashboard"])
+    parser.add_argument("--prewarm", action="store_true", help="also run the worker's prewarm() (loads VAD, opens DB/Redis)")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args()
+
+    targets = {
+        "worker": _WORKER_PROBE.replace("PREWARM", str(args.prewarm)),
+        "dashboard": _DASHBOARD_PROBE,
+    }
+    results = []
+    for name, code in targets.items():
+        if args.only and name != args.only:
+            continue
+        try:
+            res = measure(name, code, args.runs)
+        except RuntimeError as e:
+            res = {"target": name, "error": str(e)}
+        results.append(res)
+
+        if "error" in res:
+            print(f"{name:<10} ERROR  {res['error']}")
+            continue
+        phases = "  ".join(
+            f"{phase}={v['median_ms']}ms (max {v['max_ms']})"
+            for phase, v in res.items() if isinstance(v, dict)
+        )
+        print(f"{name:<10} {phases}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,11 +9,15 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False  # turn True only when debugging SQL
+    # db.create_all() at app creation: handy for a fresh SQLite file,
+    # never wanted in production (schema comes from `flask db upgrade`)
+    AUTO_CREATE_SCHEMA = os.getenv("AUTO_CREATE_SCHEMA", "false").lower() == "true"
 
 class DevConfig(Config):
     """Local development configuration"""
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///clinic.db")
     DEBUG = True
+    AUTO_CREATE_SCHEMA = os.getenv("AUTO_CREATE_SCHEMA", "true").lower() == "true"
 
 class ProdConfig(Config):
     """Production configuration"""
@@ -1,18 +1,190 @@
-import time
+import os
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
 
-class LatencyTracker:
-    def __init__(self):
-        self.timestamps = {}
 
-    def mark(self, label: str):
-        self.timestamps[label] = time.time()
+logger = logging.getLogger("latency")
 
-    def report(self):
-        labels = list(self.timestamps.keys())
-        results = {}
 
-        for i in range(1, len(labels)):
-            delta = (self.timestamps[labels[i]] - self.timestamps[labels[i - 1]]) * 1000
-            results[f"{labels[i - 1]} → {labels[i]}"] = round(delta, 2)
+# -------------------------------
+# 📈 ROLLING PERCENTILES (per process)
+# -------------------------------
 
-        return results
\ No newline at end of file
+# Last N durations kept per span name
+LATENCY_WINDOW = int(os.getenv("LATENCY_WINDOW", 1024))
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank p-th value of an already sorted list (0.0 when empty)."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+class RollingStats:
+    """
+    Last `window` samples per name, plus how many were ever added; thread
+    safe. Shared by latency_stats() and voice_metrics_stats().
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._window = window
+        self._samples: dict[str, deque[float]] = {}
+        self._counts: dict[str, int] = {}
+
+    def add(self, name: str, ms: float):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self._window)
+            samples.append(ms)
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def snapshot(self) -> dict:
+        """count = samples ever added, n = samples in the window the percentiles cover."""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+            counts = dict(self._counts)
+
+        return {
+            name: {
+                "count": counts[name],
+                "n": len(values),
+                "p50_ms": round(percentile(values, 0.50), 1),
+                "p95_ms": round(percentile(values, 0.95), 1),
+                "p99_ms": round(percentile(values, 0.99), 1),
+            }
+            for name, values in sorted(samples.items())
+        }
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+
+_stats = RollingStats()
+
+
+def latency_stats() -> dict:
+    """Rolling p50/p95/p99 (ms) per span name across every call in this process."""
+    return _stats.snapshot()
+
+
+# -------------------------------
+# 🧵 PER-CALL TRACE
+# -------------------------------
+
+# Cap per call so a runaway call can't grow its timeline without bound
+MAX_SPANS_PER_CALL = 2000
+
+
+class CallTrace:
+    """Spans of one call, on the monotonic clock, relative to the call's start."""
+
+    def __init__(self, call_id: str):
+        self.call_id = call_id
+        self.started = perf_counter()
+        self.spans: list[dict] = []
+        self.dropped = 0
+
+    def record(self, name: str, start: float, end: float, error: bool = False):
+        if len(self.spans) >= MAX_SPANS_PER_CALL:
+            self.dropped += 1
+            return
+        entry = {
+            "name": name,
+            "at_ms": round((start - self.started) * 1000, 1),
+            "ms": round((end - start) * 1000, 1),
+        }
+        if error:
+            entry["error"] = True
+        self.spans.append(entry)
+
+    def timeline(self) -> dict:
+        return {
+            "event": "call_timeline",
+            "call": self.call_id,
+            "total_ms": round((perf_counter() - self.started) * 1000, 1),
+            "spans": sorted(self.spans, key=lambda s: s["at_ms"]),
+            "dropped": self.dropped,
+        }
+
+
+# The trace of the call this task belongs to. Set in the entrypoint before
+# the session spawns its tasks, so tools (and what they call) inherit it.
+_CURRENT_TRACE: ContextVar[CallTrace | None] = ContextVar("call_trace", default=None)
+
+
+def start_trace(call_id: str) -> CallTrace:
+    """Begin a call's trace and make it current for this task and its children."""
+    trace = CallTrace(call_id)
+    _CURRENT_TRACE.set(trace)
+    return trace
+
+
+def current_trace() -> CallTrace | None:
+    return _CURRENT_TRACE.get()
+
+
+def finish_trace(trace: CallTrace) -> dict:
+    """Log the call's timeline (at hang-up) and return it."""
+    timeline = trace.timeline()
+    logger.info(timeline)
+    return timeline
+
+
+def record_span(name: str, start: float, end: float | None = None, error: bool = False):
+    """Record a span timed by hand (start/end from perf_counter())."""
+    end = perf_counter() if end is None else end
+    _stats.add(name, (end - start) * 1000)
+    trace = _CURRENT_TRACE.get()
+    if trace is not None:
+        trace.record(name, start, end, error)
+
+
+@contextmanager
+def span(name: str):
+    """
+    Time a block: recorded on the current call's trace (if any) and in the
+    process-wide rolling percentiles. Works in sync and async code alike.
+
+        with span("redis.load_caller_profile"):
+            ...
+    """
+    start = perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        record_span(name, start, error=error)
+
+
+def traced(name: str):
+    """Decorator form of span() for sync and async functions."""
+
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
@@ -1,6 +1,7 @@
 from livekit.agents import cli, WorkerOptions
 
-from src.routes.livekit.main import entrypoint
+from logging_setup import setup_logger
+from src.routes.livekit.main import entrypoint, prewarm
 
 
 if __name__ == "__main__":
@@ -8,9 +9,12 @@ if __name__ == "__main__":
     Dedicated entrypoint for the LiveKit voice agent worker.
     Run this in a separate process from the Flask dashboard.
     """
+    setup_logger()
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
+            # Models, DB pool and Redis warmed once per process, not per call
+            prewarm_fnc=prewarm,
             agent_name="telephony_agent",
         )
     )
@@ -0,0 +1,276 @@
+"""
+Per-day reports over the worker's JSON logs (logging_setup.JsonFormatter
+lines), streamed with constant memory. Reads rotated and gzip'd files.
+
+    python log_analytics.py                       # logs/voice_agent.log*
+    python log_analytics.py logs/ --day 2025-11-18
+    python log_analytics.py logs/voice_agent.log.2025-11-20.gz --json
+"""
+import argparse
+import ast
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+from types import SimpleNamespace
+
+from logging_setup import LOG_DIR
+from voice_metrics import Histogram, metric_samples
+
+
+# -------------------------------
+# 📂 FILES → LINES → RECORDS
+# -------------------------------
+
+def _rotation_order(path: str) -> tuple:
+    """voice_agent.log.<YYYY-MM-DD>[.gz] by date, then the live voice_agent.log."""
+    name = os.path.basename(path)
+    return (name == "voice_agent.log", name)
+
+
+def iter_files(paths: list[str]):
+    """Expand directories to their voice_agent.log* files, oldest rotation first."""
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, "voice_agent.log*")), key=_rotation_order)
+        else:
+            yield path
+
+
+def iter_lines(files):
+    for path in files:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+            yield from f
+
+
+def iter_records(lines, stats: dict | None = None):
+    """JSON lines → dicts; unparseable lines are counted, not fatal."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            if stats is not None:
+                stats["bad_lines"] = stats.get("bad_lines", 0) + 1
+            continue
+        if isinstance(record, dict) and "timestamp" in record:
+            yield record
+
+
+def payload(record: dict) -> dict | None:
+    """
+    Structured body of a record, if any: dict messages are JSON objects in
+    current logs and Python reprs ("{'event': ...}") in older ones.
+    """
+    message = record.get("message")
+    if isinstance(message, dict):
+        return message
+    if isinstance(message, str) and message.startswith("{"):
+        try:
+            value = ast.literal_eval(message)
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            return None
+        return value if isinstance(value, dict) else None
+    return None
+
+
+# -------------------------------
+# 🧮 PER-DAY REPORT
+# -------------------------------
+
+# "[booking] ❌ Error ..." → booking; only the tools' own logger counts
+_TOOL_PREFIX = re.compile(r"^\[(\w+)\]")
+TOOLS_LOGGER = "voice_agent.tools"
+# Log prefixes that differ from the tool's name (and so its "tool.<name>" span)
+_TOOL_PREFIX_NAMES = {"booking": "booking_appointment"}
+_FRAME = re.compile(r'File "([^"]+)", line (\d+), in (\S+)')
+# "ValueError: ..." / "httpx.HTTPStatusError: ..." (not notes like "For more information ...")
+_EXC_LINE = re.compile(r"^([A-Za-z_][\w.]*)(?::|$)")
+
+# Cap distinct fingerprints kept per day (constant memory on a crash loop)
+MAX_FINGERPRINTS = 200
+
+
+def fingerprint(exception: str) -> tuple[str, str]:
+    """(short hash, label) of an exception: its type and innermost frame, paths stripped."""
+    exc_type = "?"
+    for line in reversed(exception.strip().splitlines()):
+        match = _EXC_LINE.match(line)
+        if match:
+            exc_type = match.group(1)
+            break
+    frames = _FRAME.findall(exception)
+    where = ""
+    if frames:
+        path, line, fn = frames[-1]
+        where = f"{os.path.basename(path)}:{line} in {fn}"
+    label = f"{exc_type} @ {where}" if where else exc_type
+    return hashlib.sha1(label.encode()).hexdigest()[:10], label
+
+
+class DayReport:
+    def __init__(self, day: str):
+        self.day = day
+        self.records = 0
+        self.levels: dict[str, int] = {}
+        self.calls = 0
+        self.tool_calls: dict[str, int] = {}
+        self.tool_errors: dict[str, int] = {}
+        self.latency: dict[str, Histogram] = {}
+        self.exceptions: dict[str, list] = {}  # fingerprint → [count, label, first message]
+
+    def _hist(self, name: str) -> Histogram:
+        hist = self.latency.get(name)
+        if hist is None:
+            hist = self.latency[name] = Histogram()
+        return hist
+
+    def add(self, record: dict):
+        self.records += 1
+        level = record.get("level", "?")
+        self.levels[level] = self.levels.get(level, 0) + 1
+        message = record.get("message")
+        text = message if isinstance(message, str) else ""
+
+        if text.startswith("📞 Incoming call from"):
+            self.calls += 1
+        elif text == "executing tool":  # livekit's own line, carries no tool name
+            self.tool_calls["(unnamed)"] = self.tool_calls.get("(unnamed)", 0) + 1
+
+        if record.get("logger") == TOOLS_LOGGER and (level == "ERROR" or "❌" in text):
+            match = _TOOL_PREFIX.match(text)
+            if match:
+                tool = _TOOL_PREFIX_NAMES.get(match.group(1), match.group(1))
+                self.tool_errors[tool] = self.tool_errors.get(tool, 0) + 1
+
+        exception = record.get("exception")
+        if exception:
+            key, label = fingerprint(exception)
+            entry = self.exceptions.get(key)
+            if entry is not None:
+                entry[0] += 1
+            elif len(self.exceptions) < MAX_FINGERPRINTS:
+                self.exceptions[key] = [1, label, str(message)[:160]]
+
+        body = payload(record)
+        if body:
+            self._add_event(body)
+
+    def _add_event(self, body: dict):
+        event = body.get("event")
+        if event == "metrics":  # one record per metrics_collected event (older logs / DEBUG)
+            data = body.get("data")
+            if isinstance(data, dict):
+                for series, ms in metric_samples(SimpleNamespace(**data)):
+                    self._hist(series).add(ms)
+        elif event == "call_metrics":  # one summary per call
+            for series, summary in (body.get("series") or {}).items():
+                self._hist(series).merge(summary)
+        elif event == "call_timeline":
+            for span in body.get("spans") or []:
+                name = span.get("name", "")
+                if name.startswith("tool."):
+                    tool = name[len("tool."):]
+                    self.tool_calls[tool] = self.tool_calls.get(tool, 0) + 1
+                    if span.get("error"):
+                        self.tool_errors[tool] = self.tool_errors.get(tool, 0) + 1
+                if isinstance(span.get("ms"), (int, float)):
+                    self._hist(name).add(span["ms"])
+
+    def summary(self) -> dict:
+        return {
+            "day": self.day,
+            "records": self.records,
+            "levels": dict(sorted(self.levels.items())),
+            "calls": self.calls,
+            "tool_calls": dict(sorted(self.tool_calls.items())),
+            "tool_errors": dict(sorted(self.tool_errors.items())),
+            "latency": {
+                name: {
+                    "n": hist.n,
+                    "p50_ms": hist.percentile(0.50),
+                    "p95_ms": hist.percentile(0.95),
+                    "p99_ms": hist.percentile(0.99),
+                    "max_ms": round(hist.max, 1),
+                }
+                for name, hist in sorted(self.latency.items())
+            },
+            "exceptions": [
+                {"fingerprint": key, "count": count, "where": label, "message": first}
+                for key, (count, label, first) in sorted(self.exceptions.items(), key=lambda kv: -kv[1][0])
+            ],
+        }
+
+
+def build_reports(records, days: set[str] | None = None) -> dict[str, DayReport]:
+    reports: dict[str, DayReport] = {}
+    for record in records:
+        day = str(record["timestamp"])[:10]
+        if days and day not in days:
+            continue
+        report = reports.get(day)
+        if report is None:
+            report = reports[day] = DayReport(day)
+        report.add(record)
+    return reports
+
+
+# -------------------------------
+# 🖨️ OUTPUT
+# -------------------------------
+
+def _print_report(summary: dict, out=sys.stdout):
+    w = lambda line="": print(line, file=out)
+    w(f"=== {summary['day']} ===")
+    levels = ", ".join(f"{k}={v}" for k, v in summary["levels"].items())
+    w(f"records: {summary['records']}  ({levels})")
+    w(f"calls:   {summary['calls']}")
+
+    if summary["tool_calls"] or summary["tool_errors"]:
+        w("tools:")
+        for tool in sorted(set(summary["tool_calls"]) | set(summary["tool_errors"])):
+            w(f"  {tool:<24} calls={summary['tool_calls'].get(tool, 0):<5} errors={summary['tool_errors'].get(tool, 0)}")
+
+    if summary["latency"]:
+        w("latency (ms):")
+        for name, s in summary["latency"].items():
+            w(f"  {name:<24} n={s['n']:<5} p50={s['p50_ms']:<7} p95={s['p95_ms']:<7} p99={s['p99_ms']:<7} max={s['max_ms']}")
+
+    if summary["exceptions"]:
+        w("exceptions:")
+        for e in summary["exceptions"][:10]:
+            w(f"  {e['count']:>4}x [{e['fingerprint']}] {e['where']}")
+            w(f"        {e['message']}")
+    w()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-day reports from voice_agent.log files")
+    parser.add_argument("paths", nargs="*", default=[LOG_DIR], help="log files or directories (default: logs/)")
+    parser.add_argument("--day", action="append", help="only this day (YYYY-MM-DD); repeatable")
+    parser.add_argument("--json", action="store_true", help="one JSON object per day instead of text")
+    args = parser.parse_args(argv)
+
+    stats: dict = {}
+    records = iter_records(iter_lines(iter_files(args.paths)), stats)
+    reports = build_reports(records, set(args.day) if args.day else None)
+
+    for day in sorted(reports):
+        summary = reports[day].summary()
+        if args.json:
+            print(json.dumps(summary, ensure_ascii=False))
+        else:
+            _print_report(summary)
+
+    if stats.get("bad_lines"):
+        print(f"skipped {stats['bad_lines']} unparseable line(s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,163 @@
+import copy
 import logging
 import json
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 import os
-from datetime import datetime
+import queue
+import atexit
+from datetime import datetime, timezone
+
+# orjson is optional (pip install ".[logging]"): several times faster than json.dumps
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
 
 LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
+
+# Defaults for chatty third-party loggers; override with
+# LOG_LEVELS="httpx=INFO,livekit.agents=DEBUG". LOG_LEVEL sets the root.
+LOGGER_LEVELS = {
+    "httpcore": logging.WARNING,
+    "httpx": logging.WARNING,
+    "openai._base_client": logging.WARNING,
+    "urllib3": logging.WARNING,
+    "websockets": logging.WARNING,
+    "asyncio": logging.WARNING,
+}
+
+_configured = False
+_listener: QueueListener | None = None
+
+
+def _dumps(entry: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(entry, default=str).decode()
+    return json.dumps(entry, default=str)
+
 
 class JsonFormatter(logging.Formatter):
     def format(self, record):
+        # record.created, not "now": with the queue, formatting happens later
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).replace(tzinfo=None).isoformat(),
             "level": record.levelname,
             "logger": record.name,
-            "message": record.getMessage(),
+            # Dict messages (logger.info({...})) stay structured in the JSON
+            "message": record.msg if isinstance(record.msg, dict) and not record.args else record.getMessage(),
         }
 
         if record.exc_info:
             log_entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_entry["exception"] = record.exc_text
+
+        return _dumps(log_entry)
 
-        return json.dumps(log_entry)
 
+_exc_formatter = logging.Formatter()
+
+
+def _snapshot(msg: dict) -> dict:
+    """The dict as it is now (its values may be mutated after the call)."""
+    try:
+        return copy.deepcopy(msg)
+    except Exception:
+        return json.loads(_dumps(msg))
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    Hands a copy of each record to the listener thread: the caller only
+    freezes what may change later (%-args, dict messages, the traceback)
+    and pays no JSON or disk cost. The caller's record is left untouched
+    for any other handler.
+    """
+
+    def prepare(self, record):
+        prepared = copy.copy(record)
+        if isinstance(record.msg, dict) and not record.args:
+            prepared.msg = _snapshot(record.msg)
+        else:
+            prepared.msg = record.getMessage()
+            prepared.args = None
+        if record.exc_info:
+            # Tracebacks hold frames; render them now, as QueueHandler does
+            prepared.exc_text = record.exc_text or _exc_formatter.formatException(record.exc_info)
+            prepared.exc_info = None
+        return prepared
 
-def setup_logger():
+
+def _level(name: str | None, default: int) -> int:
+    if not name:
+        return default
+    value = logging.getLevelName(name.strip().upper())
+    return value if isinstance(value, int) else default
+
+
+def _logger_levels() -> dict[str, int]:
+    levels = dict(LOGGER_LEVELS)
+    for item in os.getenv("LOG_LEVELS", "").split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = _level(level, logging.INFO)
+    return levels
+
+
+def setup_logger(log_dir: str = LOG_DIR, use_queue: bool | None = None):
+    """
+    Attach the file + console handlers to the root logger. Called by the
+    entrypoints (never at import); repeat calls are no-ops.
+
+    By default (LOG_QUEUE=true) the root only gets a QueueHandler and a
+    listener thread does the formatting and the writes, so the voice
+    worker's event loop never blocks on a log line.
+    """
+    global _configured, _listener
     logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
+    if _configured:
+        return logger
+    _configured = True
+
+    if use_queue is None:
+        use_queue = os.getenv("LOG_QUEUE", "true").lower() == "true"
+
+    logger.setLevel(_level(os.getenv("LOG_LEVEL"), logging.INFO))
+    for name, level in _logger_levels().items():
+        logging.getLogger(name).setLevel(level)
+
+    os.makedirs(log_dir, exist_ok=True)
 
     # — Log file rotates daily, keeps 14 days —
     handler = TimedRotatingFileHandler(
-        filename=f"{LOG_DIR}/voice_agent.log",
+        filename=f"{log_dir}/voice_agent.log",
         when="midnight",
         backupCount=14,
         encoding="utf-8"
     )
-
     handler.setFormatter(JsonFormatter())
-    logger.addHandler(handler)
 
     # Also log to console for debugging
     console = logging.StreamHandler()
     console.setFormatter(JsonFormatter())
-    logger.addHandler(console)
+
+    if not use_queue:
+        logger.addHandler(handler)
+        logger.addHandler(console)
+        return logger
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logger.addHandler(_DeferredQueueHandler(log_queue))
+    _listener = QueueListener(log_queue, handler, console, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
 
     return logger
 
 
-logger = setup_logger()
\ No newline at end of file
+def stop_logging():
+    """Drain the queue and stop the listener thread (runs at exit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
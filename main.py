@@ -1,4 +1,5 @@
 from src.app_factory import create_app
+from src.services.db_context import set_app
 
 
 if __name__ == "__main__":
@@ -6,5 +7,5 @@ if __name__ == "__main__":
     Dedicated entrypoint for the Flask receptionist dashboard.
     Run the LiveKit worker from `livekit_worker.py` in a separate process.
     """
-    app = create_app()
+    app = set_app(create_app())
     app.run(host="0.0.0.0", port=5001, debug=True)
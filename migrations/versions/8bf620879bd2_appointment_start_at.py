@@ -0,0 +1,75 @@
+"""appointment start_at + composite indexes
+
+Revision ID: 8bf620879bd2
+Revises: e9c933e01c68
+Create Date: 2026-10-17 00:28:28.914700
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8bf620879bd2'
+down_revision = 'e9c933e01c68'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copy of the parser in src/models/appointments_db.py, so this
+# migration keeps working whatever the model code becomes.
+_TIME_FORMATS = ("%I:%M %p", "%I %p", "%I:%M%p", "%I%p", "%H:%M", "%H:%M:%S")
+
+
+def _start_at(date, time):
+    try:
+        day = datetime.strptime(str(date), "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+    text = str(time or "").strip().upper()
+    if "T" in text:
+        try:
+            return datetime.combine(day.date(), datetime.fromisoformat(text).time())
+        except ValueError:
+            pass
+    for fmt in _TIME_FORMATS:
+        try:
+            return datetime.combine(day.date(), datetime.strptime(text, fmt).time())
+        except ValueError:
+            continue
+    return day
+
+
+def upgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('start_at', sa.DateTime(), nullable=True))
+
+    # Backfill from the string columns
+    bind = op.get_bind()
+    appointments = sa.table(
+        'appointments',
+        sa.column('id', sa.Integer),
+        sa.column('date', sa.String),
+        sa.column('time', sa.String),
+        sa.column('start_at', sa.DateTime),
+    )
+    rows = bind.execute(sa.select(appointments.c.id, appointments.c.date, appointments.c.time)).fetchall()
+    for appt_id, date, time in rows:
+        bind.execute(
+            appointments.update()
+            .where(appointments.c.id == appt_id)
+            .values(start_at=_start_at(date, time))
+        )
+
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.create_index('ix_appointments_start_at_status', ['start_at', 'status'], unique=False)
+        batch_op.create_index('ix_appointments_patient_id_start_at', ['patient_id', 'start_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointments_patient_id_start_at')
+        batch_op.drop_index('ix_appointments_start_at_status')
+        batch_op.drop_column('start_at')
@@ -0,0 +1,97 @@
+"""appointment slot_key: unique index on active slots
+
+Revision ID: 98abd2c68566
+Revises: dbdc82c5684a
+Create Date: 2026-10-17 00:40:20.788737
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '98abd2c68566'
+down_revision = 'dbdc82c5684a'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copies of the model rules (src/models/appointments_db.py)
+_ACTIVE_STATUSES = ("Booked", "Rescheduled")
+# Given to the later rows of a legacy double booking
+_CONFLICT_STATUS = "Cancelled"
+_TIME_FORMATS = ("%I:%M %p", "%I %p", "%I:%M%p", "%I%p", "%H:%M", "%H:%M:%S")
+
+
+def _has_time(time):
+    text = str(time or "").strip().upper()
+    if not text:
+        return False
+    if "T" in text:
+        try:
+            datetime.fromisoformat(text)
+            return True
+        except ValueError:
+            pass
+    for fmt in _TIME_FORMATS:
+        try:
+            datetime.strptime(text, fmt)
+            return True
+        except ValueError:
+            continue
+    return False
+
+
+def upgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('slot_key', sa.DateTime(), nullable=True))
+
+    # Backfill active rows. If history already holds a double booking, the
+    # oldest row keeps the slot and the rest are cancelled: an active row
+    # left unkeyed would get its key back on its next ORM update and
+    # fail the unique index there.
+    bind = op.get_bind()
+    appointments = sa.table(
+        'appointments',
+        sa.column('id', sa.Integer),
+        sa.column('time', sa.String),
+        sa.column('status', sa.String),
+        sa.column('start_at', sa.DateTime),
+        sa.column('slot_key', sa.DateTime),
+    )
+    rows = bind.execute(
+        sa.select(appointments.c.id, appointments.c.time, appointments.c.start_at)
+        .where(appointments.c.status.in_(_ACTIVE_STATUSES))
+        .where(appointments.c.start_at.isnot(None))
+        .order_by(appointments.c.id)
+    ).fetchall()
+
+    taken = set()
+    for appt_id, time, start_at in rows:
+        if not _has_time(time):
+            continue
+        if start_at in taken:
+            print(f"slot_key: appointment {appt_id} double-books {start_at}; cancelled")
+            bind.execute(
+                appointments.update()
+                .where(appointments.c.id == appt_id)
+                .values(status=_CONFLICT_STATUS)
+            )
+            continue
+        taken.add(start_at)
+        bind.execute(
+            appointments.update()
+            .where(appointments.c.id == appt_id)
+            .values(slot_key=start_at)
+        )
+
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.create_index('uq_appointments_slot_key', ['slot_key'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index('uq_appointments_slot_key')
+        batch_op.drop_column('slot_key')
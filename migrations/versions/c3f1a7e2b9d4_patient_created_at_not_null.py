@@ -0,0 +1,58 @@
+"""patient created_at NOT NULL, one stored format (keyset cursor compares it)
+
+Revision ID: c3f1a7e2b9d4
+Revises: 98abd2c68566
+Create Date: 2026-10-17 01:12:53.357721
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f1a7e2b9d4'
+down_revision = '98abd2c68566'
+branch_labels = None
+depends_on = None
+
+
+# Rows of unknown age sort as the oldest patients
+_UNKNOWN_CREATED_AT = datetime(1970, 1, 1)
+
+
+def upgrade():
+    patients = sa.table('patients', sa.column('created_at', sa.DateTime))
+    op.execute(
+        patients.update()
+        .where(patients.c.created_at.is_(None))
+        .values(created_at=_UNKNOWN_CREATED_AT)
+    )
+
+    # SQLite keeps DATETIME as text: CURRENT_TIMESTAMP defaults wrote
+    # "YYYY-MM-DD HH:MM:SS", SQLAlchemy binds "YYYY-MM-DD HH:MM:SS.ffffff".
+    # Pad the short form so equal timestamps compare equal.
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute(
+            "UPDATE patients SET created_at = created_at || '.000000' "
+            "WHERE length(created_at) = 19"
+        )
+
+    with op.batch_alter_table('patients', schema=None) as batch_op:
+        batch_op.alter_column(
+            'created_at',
+            existing_type=sa.DateTime(),
+            existing_server_default=sa.func.now(),
+            nullable=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('patients', schema=None) as batch_op:
+        batch_op.alter_column(
+            'created_at',
+            existing_type=sa.DateTime(),
+            existing_server_default=sa.func.now(),
+            nullable=True,
+        )
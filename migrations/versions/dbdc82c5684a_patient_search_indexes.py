@@ -0,0 +1,40 @@
+"""patient name_lower + keyset index for dashboard search
+
+Revision ID: dbdc82c5684a
+Revises: 8bf620879bd2
+Create Date: 2026-10-17 00:33:17.475144
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'dbdc82c5684a'
+down_revision = '8bf620879bd2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('patients', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('name_lower', sa.String(length=100), nullable=True))
+
+    # Backfill from the display name
+    patients = sa.table(
+        'patients',
+        sa.column('name', sa.String),
+        sa.column('name_lower', sa.String),
+    )
+    op.execute(patients.update().values(name_lower=sa.func.lower(sa.func.trim(patients.c.name))))
+
+    with op.batch_alter_table('patients', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_patients_name_lower'), ['name_lower'], unique=False)
+        batch_op.create_index('ix_patients_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('patients', schema=None) as batch_op:
+        batch_op.drop_index('ix_patients_created_at_id')
+        batch_op.drop_index(batch_op.f('ix_patients_name_lower'))
+        batch_op.drop_column('name_lower')
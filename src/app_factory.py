@@ -5,7 +5,7 @@ from extensions import db, migrate
 from config import DevConfig, ProdConfig
 
 
-def create_app() -> Flask:
+def create_app(config_overrides: dict | None = None) -> Flask:
     """Initialize Flask app with DB + configuration."""
     app = Flask(__name__)
 
@@ -14,6 +14,10 @@ def create_app() -> Flask:
     else:
         app.config.from_object(DevConfig)
 
+    # Applied before the DB binds, so e.g. tests can point at their own database.
+    if config_overrides:
+        app.config.update(config_overrides)
+
     db.init_app(app)
     migrate.init_app(app, db)
 
@@ -21,8 +25,9 @@ def create_app() -> Flask:
     with app.app_context():
         from src.models.patient_db import Patient  # noqa: F401
         from src.models.appointments_db import Appointment  # noqa: F401
-        # Ensure tables exist (useful for SQLite/dev). For production, prefer migrations.
-        db.create_all()
+        # Opt-in (on by default only in DevConfig): production uses migrations
+        if app.config.get("AUTO_CREATE_SCHEMA"):
+            db.create_all()
 
         # Register HTTP blueprints
         from src.routes.dashboard import dashboard_bp
@@ -1,17 +1,89 @@
 from extensions import db
-from datetime import datetime
+from datetime import datetime, timedelta
+
+# Statuses that hold a clinic slot; at most one such row per start time
+ACTIVE_STATUSES = ("Booked", "Rescheduled")
+
+# Formats found in appointments.time ("10:00 AM", "9 AM", "14:30", ISO…)
+_TIME_FORMATS = ("%I:%M %p", "%I %p", "%I:%M%p", "%I%p", "%H:%M", "%H:%M:%S")
+
+
+def parse_appointment_time(value):
+    """Parse a stored/spoken appointment time into a datetime.time (None if unknown)."""
+    if not value:
+        return None
+    text = str(value).strip().upper()
+    if "T" in text:
+        try:
+            return datetime.fromisoformat(text).time()
+        except ValueError:
+            pass
+    for fmt in _TIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def compose_start_at(date, time):
+    """
+    Combine the date/time strings into a real DATETIME.
+    An unreadable time falls back to midnight so day-range queries still match.
+    """
+    try:
+        day = datetime.strptime(str(date), "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+    t = parse_appointment_time(time)
+    return datetime.combine(day.date(), t) if t else day
+
+
+def slot_key_for(start_at, time, status):
+    """
+    Value of appointments.slot_key: the start time while the appointment
+    holds its slot, NULL otherwise (NULLs never collide in a UNIQUE index,
+    which makes this a portable partial unique index on active slots).
+    Unreadable times don't claim a slot, since they all land on midnight.
+    """
+    if status in ACTIVE_STATUSES and parse_appointment_time(time):
+        return start_at
+    return None
+
+
+def day_bounds(date):
+    """[start, end) of a YYYY-MM-DD day, for index range scans on start_at."""
+    start = datetime.strptime(str(date), "%Y-%m-%d")
+    return start, start + timedelta(days=1)
+
 
 class Appointment(db.Model):
     __tablename__ = "appointments"  # ✅ must have '='
+    __table_args__ = (
+        db.Index("ix_appointments_start_at_status", "start_at", "status"),
+        db.Index("ix_appointments_patient_id_start_at", "patient_id", "start_at"),
+        db.Index("uq_appointments_slot_key", "slot_key", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)
     date = db.Column(db.String(20), nullable=False)
     time = db.Column(db.String(20), nullable=False)
+    # Typed twin of date + time, kept in sync on every insert/update
+    start_at = db.Column(db.DateTime)
+    # start_at while the slot is held (see slot_key_for); UNIQUE → no double booking
+    slot_key = db.Column(db.DateTime)
     google_event_id = db.Column(db.String(200))
     status = db.Column(db.String(50), default='Pending')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationship back to Patient
-    patient = db.relationship('Patient', backref=db.backref('appointments', lazy=True))
\ No newline at end of file
+    patient = db.relationship('Patient', backref=db.backref('appointments', lazy=True))
+
+
+@db.event.listens_for(Appointment, "before_insert")
+@db.event.listens_for(Appointment, "before_update")
+def _sync_start_at(mapper, connection, target):
+    target.start_at = compose_start_at(target.date, target.time)
+    target.slot_key = slot_key_for(target.start_at, target.time, target.status)
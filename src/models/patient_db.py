@@ -1,11 +1,26 @@
+from datetime import datetime
+
 from extensions import db, migrate # ✅ note: correct spelling 'extensions'
 
 class Patient(db.Model):
     __tablename__ = "patients"  # ✅ single underscore, not triple
+    __table_args__ = (
+        # Keyset pagination for the dashboard (newest first)
+        db.Index("ix_patients_created_at_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
+    # Lowercased name for indexed prefix search, kept in sync on every write
+    name_lower = db.Column(db.String(100), index=True)
     phone = db.Column(db.String(20), unique=True, nullable=False)
     email = db.Column(db.String(100))
-    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    # Never NULL: search_patients pages on (created_at, id). Set in Python so
+    # every row is stored in the same format the cursor is compared in.
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, server_default=db.func.now())
+
 
+@db.event.listens_for(Patient, "before_insert")
+@db.event.listens_for(Patient, "before_update")
+def _sync_name_lower(mapper, connection, target):
+    target.name_lower = (target.name or "").strip().lower()
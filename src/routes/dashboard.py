@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, redirect, url_for
+from flask import Blueprint, render_template, request, redirect, url_for, jsonify
 
 
 dashboard_bp = Blueprint("dashboard", __name__)
@@ -85,6 +85,21 @@ def delete_appointment_route(appointment_id: int):
     return redirect(url_for("dashboard.dashboard_home"))
 
 
+@dashboard_bp.route("/patients/search", methods=["GET"])
+def search_patients_route():
+    """
+    JSON page of patients for the dashboard search box.
+    ?q= name or phone prefix, ?cursor= from the previous page's next_cursor.
+    """
+    from src.services.clinic_service import search_patients, PATIENT_PAGE_SIZE  # local import to avoid cycles
+
+    query = (request.args.get("q") or "").strip()
+    cursor = request.args.get("cursor") or None
+    limit = request.args.get("limit", default=PATIENT_PAGE_SIZE, type=int)
+
+    return jsonify(search_patients(query=query, cursor=cursor, limit=limit))
+
+
 @dashboard_bp.route("/patients/save", methods=["POST"])
 def save_patient():
     """
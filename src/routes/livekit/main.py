@@ -1,122 +1,34 @@
+import asyncio
 import logging
+from time import perf_counter
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from contextvars import ContextVar
-from livekit.agents import Agent, AgentSession, JobContext
+from livekit.agents import Agent, AgentSession, JobContext, JobProcess
 
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 from livekit.plugins import deepgram, openai,silero,cartesia
-from src.app_factory import create_app
-from src.services.clinic_service import get_or_create_patient, create_appointment
-from src.routes.livekit.tools import save_name,save_phone,available_slot,booking_appointment,get_date,end_call,update_caller_profile,start_reschedule,confirm_reschedule,start_cancel,confirm_cancel
-from src.services.redis_service import BookingContext, load_context, save_context, clear_context,r,save_caller_profile,_caller_key,load_caller_profile,CallerProfile,load_context_if_exists,hydrate_context,upsert_caller_profile
+from src.routes.livekit.tools import save_name,save_phone,available_slot,next_available_slot,hold_slot,booking_appointment,get_date,end_call,update_caller_profile,start_reschedule,confirm_reschedule,start_cancel,confirm_cancel
+from src.services.redis_service import BookingContext, r, ar, CallerProfile, hydrate_context_async
 import json
 from datetime import datetime
-from src.services.context_manager import _ctx, _save, _clear, CURRENT_PARTICIPANT
+from src.services.context_manager import CURRENT_PARTICIPANT, bind_context, release_context
+from src.services.db_executor import db_pool_stats
+from src.services.availability import release_slot_hold
 import re
-from latency_tracker import LatencyTracker
-from logging_setup import logger
-
-
-lt = LatencyTracker()
+from latency_tracker import start_trace, finish_trace, latency_stats, span, traced, record_span
+from voice_metrics import CallMetrics, voice_metrics_stats
+from logging_setup import setup_logger
 
 
 load_dotenv()
 logger = logging.getLogger("telephony-agent")
-flask_app = create_app()
-
-
-
- # ---------------------------Pydantic ---------------------------#
-def normalize_phone(raw: str | None) -> str | None:
-    if not raw:
-        return None
-    # Extract digits only (so “sip_+923001234567” → “923001234567”)
-    digits = re.sub(r'\D', '', raw)
-    return digits[-11:] if len(digits) >= 10 else None
-
-
-# ---------------------------- Entry ---------------------------- #
-
-async def entrypoint(ctx: JobContext):
-    await ctx.connect()
-
-    # ───────────────────────────────────────────────
-    # 0️⃣  CONNECT TO REDIS
-    # ───────────────────────────────────────────────
-    try:
-        pong = r.ping()
-        logger.info(f"🔌 Redis Connected: {pong}")
-    except Exception as e:
-        logger.error(f"❌ Redis Connection Failed: {e}")
-
-    # ───────────────────────────────────────────────
-    # 1️⃣  WAIT FOR CALLER + SET PARTICIPANT
-    # ───────────────────────────────────────────────
-    participant = await ctx.wait_for_participant()
-    caller_id = participant.identity
-    token = CURRENT_PARTICIPANT.set(caller_id)
-
-    logger.info(f"📞 Incoming call from: {caller_id}")
-
-    # ───────────────────────────────────────────────
-    # 2️⃣  GET CALLER PHONE/NAME FROM METADATA
-    # ───────────────────────────────────────────────
-    caller_phone = None
-    caller_name = None
-
-    if hasattr(participant, "metadata") and participant.metadata:
-        meta = participant.metadata
-        if isinstance(meta, str):
-            try:
-                meta = json.loads(meta)
-            except:
-                meta = {}
-        if isinstance(meta, dict):
-            caller_phone = meta.get("phone")
-            caller_name = meta.get("name")
-
-    if not caller_phone:
-        caller_phone = caller_id  # fallback
-
-    normalized_phone = normalize_phone(caller_phone)
-    logger.info(f"📞 Caller Phone Detected (normalized): {normalized_phone}")
 
-    # ───────────────────────────────────────────────
-    # 3️⃣  ALWAYS RESET SESSION CONTEXT FOR NEW CALL
-    #     (This stops old memory, old dates, old states)
-    # ───────────────────────────────────────────────
-    # delete_context(caller_id)
-    redis_ctx = BookingContext()
 
-    # ───────────────────────────────────────────────
-    # 4️⃣  LOAD CALLER PROFILE (PERMANENT MEMORY)
-    #     Do NOT load old session memory.
-    # ───────────────────────────────────────────────
-    if normalized_phone:
-        try:
-            # hydrate_context loads CallerProfile AND builds BookingContext
-            redis_ctx = hydrate_context(caller_id, normalized_phone)
+# ---------------------------- Agent template ---------------------------- #
+# Built once per process at import; each call only wraps them in an Agent.
 
-            # Profile already loaded inside hydrate_context → reuse for greeting
-            profile = load_caller_profile(normalized_phone)
-            caller_name = profile.name
-
-            logger.info(f"[Hydrate] Profile + Session loaded for {normalized_phone}")
-
-        except Exception as e:
-            logger.error(f"[Hydrate] Failed: {e}")
-            redis_ctx = BookingContext(phone=normalized_phone)
-
-    else:
-    # No phone → force ask_phone stage
-        redis_ctx = hydrate_context(caller_id, None)
-        caller_name = None
-    # ───────────────────────────────────────────────
-    # 5️⃣  SET UP AGENT (NO MEMORY LEAKS)
-    # ───────────────────────────────────────────────
-    agent = Agent(
-        instructions=f"""
+AGENT_INSTRUCTIONS = """
         You are Shifa Clinic’s AI Receptionist, answering real-time phone calls.
                 Your job is to help callers book, confirm, or reschedule appointments.
                 Speak naturally, briefly, and professionally—like an experienced clinic receptionist.
@@ -143,6 +55,8 @@ async def entrypoint(ctx: JobContext):
                 - save_name(name)
                 - save_phone(phone)
                 - available_slot(day?, date?, time?)
+                - next_available_slot(time?, after_date?)
+                - hold_slot(time, date?)
                 - booking_appointment(time)
                 - get_date()
                 - update_caller_profile(name?, phone?)
@@ -156,6 +70,8 @@ async def entrypoint(ctx: JobContext):
                 If unclear digits, ask: “Repeat the number slowly?”
 
                 • If caller mentions timing (morning, 3pm, evening, after 2) → call available_slot.  
+                • If caller wants the earliest / next available time → call next_available_slot.  
+                • When caller picks one offered time → call hold_slot right away.  
                 • If caller mentions vague dates (“next Monday”) → call get_date.  
                 • Call booking_appointment ONLY when BOTH date and time are known.  
                 • Caller corrects name/phone → update_caller_profile.
@@ -231,21 +147,158 @@ async def entrypoint(ctx: JobContext):
                 You are the first point of contact for Shifa Clinic.
                 Be warm. Be efficient. Be human.
 
-""",
-        tools=[
-            save_name, save_phone, available_slot,
-            booking_appointment, get_date, end_call,
-            update_caller_profile, start_reschedule, confirm_reschedule,
-            start_cancel, confirm_cancel
-        ],
-    )
+"""
+
+AGENT_TOOLS = [
+    save_name, save_phone, available_slot, next_available_slot,
+    hold_slot, booking_appointment, get_date, end_call,
+    update_caller_profile, start_reschedule, confirm_reschedule,
+    start_cancel, confirm_cancel,
+]
+
+
+# ---------------------------- Prewarm ---------------------------- #
+
+def prewarm(proc: JobProcess):
+    """
+    Runs once per worker process before it accepts calls, so pickup pays
+    for none of this: VAD weights, the Flask app + DB pool, the async
+    engine, and a Redis round-trip.
+    """
+    setup_logger()  # idempotent: job processes get the same handlers as the parent
+    proc.userdata["vad"] = silero.VAD.load()
+
+    # The process's single Flask app (db_context owns it); open the pool now
+    from src.services.db_context import get_app
+    from src.services.clinic_repository import prepare_engine
+    from extensions import db
 
+    with get_app().app_context():
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+    prepare_engine()
+
+    try:
+        r.ping()
+        logger.info("🔥 Prewarm done: VAD loaded, DB pool open, Redis reachable")
+    except Exception as e:
+        logger.error(f"❌ Prewarm: Redis unreachable: {e}")
+
+
+
+ # ---------------------------Pydantic ---------------------------#
+def normalize_phone(raw: str | None) -> str | None:
+    if not raw:
+        return None
+    # Extract digits only (so “sip_+923001234567” → “923001234567”)
+    digits = re.sub(r'\D', '', raw)
+    return digits[-11:] if len(digits) >= 10 else None
+
+
+# ---------------------------- Entry ---------------------------- #
+
+@traced("setup.redis_warmup")
+async def _warm_redis():
+    """Open the pooled Redis connection while the room is still connecting."""
+    try:
+        pong = await ar.ping()
+        logger.info(f"🔌 Redis Connected: {pong}")
+    except Exception as e:
+        logger.error(f"❌ Redis Connection Failed: {e}")
+
+
+@traced("setup.hydrate")
+async def _hydrate(caller_id: str, normalized_phone: str | None) -> BookingContext:
+    """One profile lookup (Redis → DB) → this call's BookingContext."""
+    if not normalized_phone:
+        # No phone → force ask_phone stage
+        return await hydrate_context_async(caller_id, None)
+    try:
+        # hydrate_context loads CallerProfile AND builds BookingContext (name included)
+        redis_ctx = await hydrate_context_async(caller_id, normalized_phone)
+        logger.info(f"[Hydrate] Profile + Session loaded for {normalized_phone}")
+        return redis_ctx
+    except Exception as e:
+        logger.error(f"[Hydrate] Failed: {e}")
+        return BookingContext(phone=normalized_phone)
+
+
+async def _start_session(session: AgentSession, agent: Agent, room):
+    with span("setup.session_start"):
+        await session.start(agent=agent, room=room)
+
+
+async def entrypoint(ctx: JobContext):
+    # Per-call span timeline; set first so every task spawned below inherits it
+    trace = start_trace(ctx.room.name)
+    setup_started = perf_counter()
+
+    # ───────────────────────────────────────────────
+    # 0️⃣  CONNECT ROOM + WARM REDIS (concurrently)
+    # ───────────────────────────────────────────────
+    redis_warmup = asyncio.create_task(_warm_redis())
+    with span("setup.connect"):
+        await ctx.connect()
+
+    # ───────────────────────────────────────────────
+    # 1️⃣  WAIT FOR CALLER + SET PARTICIPANT
+    #     Set before any task is spawned so the session's
+    #     tasks (and so the tools) inherit it.
     # ───────────────────────────────────────────────
-    # 6️⃣  CREATE AGENT SESSION
+    with span("setup.participant"):
+        participant = await ctx.wait_for_participant()
+    caller_id = participant.identity
+    trace.call_id = caller_id
+    token = CURRENT_PARTICIPANT.set(caller_id)
+
+    logger.info(f"📞 Incoming call from: {caller_id}")
+
+    # ───────────────────────────────────────────────
+    # 2️⃣  GET CALLER PHONE/NAME FROM METADATA
+    # ───────────────────────────────────────────────
+    caller_phone = None
+    caller_name = None
+
+    if hasattr(participant, "metadata") and participant.metadata:
+        meta = participant.metadata
+        if isinstance(meta, str):
+            try:
+                meta = json.loads(meta)
+            except:
+                meta = {}
+        if isinstance(meta, dict):
+            caller_phone = meta.get("phone")
+            caller_name = meta.get("name")
+
+    if not caller_phone:
+        caller_phone = caller_id  # fallback
+
+    normalized_phone = normalize_phone(caller_phone)
+    logger.info(f"📞 Caller Phone Detected (normalized): {normalized_phone}")
+
+    # ───────────────────────────────────────────────
+    # 3️⃣  SET UP AGENT, THEN LOAD CALLER PROFILE
+    #     The profile lookup (Redis → DB) finishes the Redis
+    #     warmup alongside it. Never old session memory.
     # ───────────────────────────────────────────────
+    agent = Agent(
+        instructions=AGENT_INSTRUCTIONS,
+        tools=AGENT_TOOLS,
+    )
+
+    vad = ctx.proc.userdata.get("vad") or silero.VAD.load()
+    turn_detection = MultilingualModel()
+
+    redis_ctx, _ = await asyncio.gather(_hydrate(caller_id, normalized_phone), redis_warmup)
+
+    # The session userdata IS the live context: tools mutate it in place
+    # and only checkpoint to Redis, so no per-tool Redis reads. Bound
+    # before the session starts so no tool call ever sees an empty one.
+    bind_context(caller_id, redis_ctx)
     session = AgentSession[BookingContext](
         userdata=redis_ctx,
-        turn_detection=MultilingualModel(),
+        vad=vad,
+        turn_detection=turn_detection,
         # stt=deepgram.STT(model="nova-3", language="multi", interim_results=True),
         # llm=openai.LLM(model="gpt-4o-mini", temperature=0.7),
         llm=openai.realtime.RealtimeModel()
@@ -253,18 +306,39 @@ async def entrypoint(ctx: JobContext):
 
     )
 
+    # Folded into per-call histograms; one summary record at hang-up
+    call_metrics = CallMetrics(caller_id)
 
-    await session.start(agent=agent, room=ctx.room)
     @session.on("metrics_collected")
     def on_metrics(evt):
         metrics = evt.metrics
+        call_metrics.add(metrics)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug({
+                "event": "metrics",
+                "type": metrics.__class__.__name__,
+                "data": metrics.dict()
+            })
+
+    async def _release_live_context():
+        # Caller hung up mid-booking → free their slot for the next caller now
+        if redis_ctx.held_slot:
+            await release_slot_hold(*redis_ctx.held_slot, caller_id)
+        release_context(caller_id)
+        # Tool-side DB pool health: queue depth, deadline misses, queue waits
+        logger.info({"event": "db_pool", "caller": caller_id, **db_pool_stats()})
+        # Where this call's time went, then the worker-wide percentiles per span
+        finish_trace(trace)
+        logger.info(call_metrics.summary())
+        logger.info({"event": "latency_stats", "spans": latency_stats(), "voice": voice_metrics_stats()})
+
+    ctx.add_shutdown_callback(_release_live_context)
 
-        logger.info({
-            "event": "metrics",
-            "type": metrics.__class__.__name__,
-            "data": metrics.dict()
-        })
-    
+    # ───────────────────────────────────────────────
+    # 4️⃣  START SESSION (model + room I/O)
+    # ───────────────────────────────────────────────
+    await _start_session(session, agent, ctx.room)
 
     # @session.on("function_tools_executed")
     # def on_tools_executed(evt):
@@ -284,7 +358,7 @@ async def entrypoint(ctx: JobContext):
         # })
 
     # ───────────────────────────────────────────────
-    # 7️⃣  CLEAN GREETING (NO OLD MEMORY ANYMORE)
+    # 5️⃣  GREET AS SOON AS THE SESSION IS LIVE
     # ───────────────────────────────────────────────
     hour = datetime.now().hour
     greeting = (
@@ -293,15 +367,22 @@ async def entrypoint(ctx: JobContext):
         "Good evening! "
     )
 
-    if redis_ctx.name:
-        greeting += f"Hi {redis_ctx.name}, how can I help you today?"
+    # Profile name first; the room metadata's name covers new callers
+    caller_name = redis_ctx.name or caller_name
+    if caller_name:
+        greeting += f"Hi {caller_name}, how can I help you today?"
     else:
         greeting += "Thank you for calling Shifa Clinic. How can I help you today?"
 
-    await session.generate_reply(instructions=greeting)
+    greeting_started = perf_counter()
+    reply = session.generate_reply(instructions=greeting)
+    record_span("setup", setup_started)
+    logger.info({"event": "call_setup", "caller": caller_id, "ready_ms": round((perf_counter() - setup_started) * 1000, 1)})
+    await reply
+    record_span("greeting", greeting_started)
 
     # ───────────────────────────────────────────────
-    # 8️⃣  CLEAN EXIT (NO SAVING SESSION MEMORY HERE)
+    # 6️⃣  CLEAN EXIT (NO SAVING SESSION MEMORY HERE)
     #     All saving happens INSIDE tools only.
     # ───────────────────────────────────────────────
     CURRENT_PARTICIPANT.reset(token)
\ No newline at end of file
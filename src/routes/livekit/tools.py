@@ -7,12 +7,14 @@ from pydantic import BaseModel, Field,validator
 from typing import Optional
 import logging
 from datetime import datetime,timedelta
-from src.services.clinic_service import get_or_create_patient,create_appointment,get_patient_by_phone,get_upcoming_appointment,reschedule_appointment,get_booked_slots,delete_appointment
-from src.services.db_context import db_context
-from extensions import db
-from src.models import Appointment
+# Async repository: DB round-trips are awaited, never block the worker's event loop
+from src.services.clinic_repository import get_or_create_patient,create_appointment,get_patient_by_phone,get_upcoming_appointment,reschedule_appointment,delete_appointment,get_patient_appointment_on,get_appointment,unit_of_work,SlotTakenError
 import asyncio
-from src.services.redis_service import upsert_caller_profile
+from src.services.redis_service import upsert_caller_profile_async
+from src.services.availability import free_slots, slots_from_mask, next_open_slots, BOOKING_HORIZON_DAYS
+from src.services.availability import hold_slot as reserve_slot, release_slot_hold, slot_index, occupied_mask
+from src.services.db_executor import db_budget, DBDeadlineExceeded, SLOW_DB_REPLY
+from latency_tracker import traced
 
 logger = logging.getLogger("voice_agent.tools")
 
@@ -46,8 +48,9 @@ async def hangup_call():
             logger.exception(f"[end_call] remove_participant failed: {e2}")
 
 @function_tool
+@traced("tool.save_name")
 async def save_name(name: str) -> str:
-    ctx = _ctx()
+    ctx = await _ctx()
 
     try:
         # Block name saving in reschedule flow
@@ -61,7 +64,7 @@ async def save_name(name: str) -> str:
         # Validate name
         validated = BookingBase(name=name)
         ctx.name = validated.name
-        _save(ctx)
+        await _save(ctx)
 
         return f"Thanks, {ctx.name}."
 
@@ -75,9 +78,10 @@ async def save_name(name: str) -> str:
 
 
 @function_tool
+@traced("tool.save_phone")
 async def save_phone(phone: str) -> str:
     """Store validated patient phone in Redis using existing BookingBase validator."""
-    ctx = _ctx()
+    ctx = await _ctx()
     logger.info(f"[save_phone] 📞 Called for participant:")
     logger.info(f"[save_phone] Raw phone input: {phone!r}")
 
@@ -87,8 +91,9 @@ async def save_phone(phone: str) -> str:
 
         # Save normalized/validated value
         ctx.phone = validated.phone
-        _save(ctx)
-        logger.info(f"[save_phone] ✅ Saved context for {ctx}")
+        await _save(ctx)
+        # Full context repr only at DEBUG (lazy args: no repr unless enabled)
+        logger.debug("[save_phone] ✅ Saved context for %s", ctx)
 
         # Send a natural signal back to the LLM
         return f"Got it, your phone number is {ctx.phone}."
@@ -130,16 +135,17 @@ def parse_time_range(text: str):
 
 
 @function_tool
+@traced("tool.available_slot")
 async def available_slot(day: Optional[str] = None, date: Optional[str] = None, time: Optional[str] = None) -> str:
     """
     Suggest available appointment slots for a given day.
     - Understands natural language ("tomorrow", "morning", "after 2pm")
-    - Always fetches fresh availability from DB.
+    - Reads the per-day occupancy bitmap (rebuilt from DB on a miss).
     - Returns top 3 free slots.
     - Stores them in ctx.suggested_slots for booking_appointment.
     """
 
-    ctx = _ctx()
+    ctx = await _ctx()
     # Normalize missing values to empty strings for downstream logic
     day = day or ""
     date = date or ""
@@ -167,68 +173,49 @@ async def available_slot(day: Optional[str] = None, date: Optional[str] = None,
         if target.date() < today.date():
             return "I can't book for past dates. Please choose a future date."
 
-        if target > today + timedelta(days=30):
-            return "I can book up to 30 days ahead. Please give a closer date."
+        if target > today + timedelta(days=BOOKING_HORIZON_DAYS):
+            return f"I can book up to {BOOKING_HORIZON_DAYS} days ahead. Please give a closer date."
 
         ctx.date = target.strftime("%Y-%m-%d")
-        _save(ctx)
 
         spoken_day = target.strftime("%A, %B %d")
 
         # -------------------------------------------
-        # 2️⃣ Base clinic working hours
+        # 2️⃣ Free clinic slots for the day (bitmap, no DB on a warm day)
+        #    narrowed by morning/evening/"after 2" when that leaves any
         # -------------------------------------------
-        ALL_SLOTS = [
-            "9:00 AM", "9:30 AM", "10:00 AM", "10:30 AM",
-            "11:00 AM", "11:30 AM", "12:00 PM",
-            "1:00 PM", "1:30 PM", "2:00 PM", "2:30 PM",
-            "3:00 PM", "3:30 PM", "4:00 PM"
-        ]
+        async with db_budget():
+            fresh_available, booked = await free_slots(ctx.date, user_text, holder=_holder(ctx))
+        logger.info(f"[available_slot] Booked slots for {ctx.date}: {slots_from_mask(booked)}")
 
-        # -------------------------------------------
-        # 3️⃣ Natural filtering (morning/evening etc.)
-        # -------------------------------------------
-        lower = user_text.lower()
-        filtered = ALL_SLOTS.copy()
-
-        if "morning" in lower:
-            filtered = [s for s in ALL_SLOTS if "AM" in s]
-        elif "afternoon" in lower:
-            filtered = [s for s in ALL_SLOTS if "PM" in s and int(s.split(":")[0]) < 4]
-        elif "evening" in lower:
-            filtered = [s for s in ALL_SLOTS if "PM" in s and int(s.split(":")[0]) >= 4]
-        else:
-            # Time-based filtering (e.g., "after 2")
-            try:
-                numbers = re.findall(r"\d+", lower)
-                if numbers:
-                    hour = int(numbers[0])
-                    filtered = [s for s in ALL_SLOTS if int(s.split(":")[0]) >= hour]
-            except Exception:
-                pass
-
-        # -------------------------------------------
-        # 4️⃣ Remove already booked slots (live DB)
-        # -------------------------------------------
-        booked = get_booked_slots(ctx.date) or []
-        logger.info(f"[available_slot] Booked slots for {ctx.date}: {booked}")
-
-        fresh_available = [s for s in filtered if s not in booked]
-
-        # If the user filtered too much & no slots remain → fallback to all free slots
-        if not fresh_available:
-            fresh_available = [s for s in ALL_SLOTS if s not in booked]
-
-        # Still empty → fully booked
+        # Empty even without the filter → fully booked: offer the next openings
         if not fresh_available:
-            return f"All slots on {spoken_day} are full. Would you like another day?"
+            horizon = today + timedelta(days=BOOKING_HORIZON_DAYS)
+            next_day = target + timedelta(days=1)
+            found = []
+            if next_day <= horizon:
+                async with db_budget():
+                    found = await next_open_slots(
+                        next_day.strftime("%Y-%m-%d"), horizon.strftime("%Y-%m-%d"),
+                        text=user_text, holder=_holder(ctx),
+                    )
+            if not found:
+                await _save(ctx)
+                return f"All slots on {spoken_day} are full. Would you like another day?"
+
+            ctx.date, ctx.suggested_slots = found[0]
+            await _save(ctx)
+            return (
+                f"All slots on {spoken_day} are full. The next openings are "
+                f"{_speak_open_slots(found)}. Would one of those work?"
+            )
 
         # -------------------------------------------
-        # 5️⃣ Pick top 3 best options
+        # 3️⃣ Pick top 3 best options
         # -------------------------------------------
         top3 = fresh_available
         ctx.suggested_slots = top3
-        _save(ctx)
+        await _save(ctx)
 
         if len(top3) == 1:
             readable = top3[0]
@@ -238,11 +225,131 @@ async def available_slot(day: Optional[str] = None, date: Optional[str] = None,
         logger.info(f"[available_slot] Final suggestions: {top3}")
 
         return f"On {spoken_day}, I have {readable} available. Which time works best for you?"
+    except DBDeadlineExceeded:
+        logger.warning(f"[available_slot] DB over budget; asking the caller to hold")
+        return SLOW_DB_REPLY
     except Exception as e:
         logger.exception(f"[available_slot] Unexpected error: {e}")
         return "I’m having trouble checking availability right now. Please try again in a moment."
 
+def _speak_open_slots(found: list[tuple[str, list[str]]]) -> str:
+    """[(date, [slots])] → "Tuesday, November 25 at 9:00 AM or 9:30 AM, and …"."""
+    parts = []
+    for day, slots in found:
+        spoken_day = datetime.strptime(day, "%Y-%m-%d").strftime("%A, %B %d")
+        times = slots[0] if len(slots) == 1 else ", ".join(slots[:-1]) + f" or {slots[-1]}"
+        parts.append(f"{spoken_day} at {times}")
+    return parts[0] if len(parts) == 1 else ", ".join(parts[:-1]) + f", and {parts[-1]}"
+
+
+@function_tool
+@traced("tool.next_available_slot")
+async def next_available_slot(time: Optional[str] = None, after_date: Optional[str] = None) -> str:
+    """
+    Find the earliest open slots across the booking window in one lookup.
+    Use when the caller wants "the next available" or their day is full.
+    - time: optional preference ("morning", "after 2")
+    - after_date: optional YYYY-MM-DD to search from (default today)
+    """
+    ctx = await _ctx()
+    today = datetime.now()
+    start = today
+
+    if after_date:
+        try:
+            start = max(datetime.strptime(after_date, "%Y-%m-%d"), today)
+        except ValueError:
+            return "The date should be in YYYY-MM-DD format, like 2025-11-25."
+
+    horizon = today + timedelta(days=BOOKING_HORIZON_DAYS)
+    if start > horizon:
+        return f"I can book up to {BOOKING_HORIZON_DAYS} days ahead. Please give a closer date."
+
+    try:
+        async with db_budget():
+            found = await next_open_slots(
+                start.strftime("%Y-%m-%d"), horizon.strftime("%Y-%m-%d"),
+                text=time or "", holder=_holder(ctx),
+            )
+        if not found:
+            return f"I'm sorry, we're fully booked for the next {BOOKING_HORIZON_DAYS} days."
+
+        # Offer the earliest day; booking_appointment uses ctx.date + suggested slots
+        ctx.date, ctx.suggested_slots = found[0]
+        await _save(ctx)
+
+        logger.info(f"[next_available_slot] Earliest openings: {found}")
+        return f"The earliest openings are {_speak_open_slots(found)}. Which works best?"
+    except DBDeadlineExceeded:
+        logger.warning(f"[next_available_slot] DB over budget; asking the caller to hold")
+        return SLOW_DB_REPLY
+    except Exception as e:
+        logger.exception(f"[next_available_slot] Unexpected error: {e}")
+        return "I’m having trouble checking availability right now. Please try again in a moment."
+
+
+def _holder(ctx) -> str:
+    """Who owns this call's slot holds (the LiveKit participant)."""
+    return CURRENT_PARTICIPANT.get(None) or ctx.phone or "anonymous"
+
+
+async def _release_hold(ctx, holder: str | None = None):
+    """Drop the call's slot hold (booked, changed mind, or hung up)."""
+    if ctx.held_slot:
+        date, time = ctx.held_slot
+        await release_slot_hold(date, time, holder or _holder(ctx))
+        ctx.held_slot = None
+
+
+async def _take_hold(ctx, date: str, time: str) -> bool:
+    """Hold (or extend) date/time for this call, swapping out any other hold."""
+    holder = _holder(ctx)
+    if not await reserve_slot(date, time, holder):
+        return False
+    if ctx.held_slot and ctx.held_slot != [date, time]:
+        await _release_hold(ctx, holder)  # caller changed their mind
+    ctx.held_slot = [date, time]
+    return True
+
+
+@function_tool
+@traced("tool.hold_slot")
+async def hold_slot(time: str, date: Optional[str] = None) -> str:
+    """
+    Reserve the time the caller picked for about 90 seconds, so other
+    callers aren't offered it while you collect the remaining details.
+    Call as soon as the caller chooses one of the offered times.
+    - time: the chosen slot, e.g. "10:30 AM"
+    - date: optional YYYY-MM-DD (defaults to the day being discussed)
+    """
+    ctx = await _ctx()
+    date = date or ctx.date
+    if not date:
+        return "Which day would you like?"
+    if slot_index(time) is None:
+        return "That isn't one of our appointment times. Shall I list the open ones?"
+
+    try:
+        async with db_budget():
+            booked = await occupied_mask(date)
+        if booked >> slot_index(time) & 1 or not await _take_hold(ctx, date, time):
+            ctx.suggested_slots = [s for s in (ctx.suggested_slots or []) if s != time]
+            await _save(ctx)
+            return f"Sorry, {time} was just taken. Shall I check other times?"
+
+        ctx.date, ctx.time = date, time
+        await _save(ctx)
+        return f"I've reserved {time} for you."
+    except DBDeadlineExceeded:
+        logger.warning("[hold_slot] DB over budget; asking the caller to hold")
+        return SLOW_DB_REPLY
+    except Exception as e:
+        logger.exception(f"[hold_slot] Unexpected error: {e}")
+        return "I’m having trouble checking that time right now. Please try again in a moment."
+
+
 @function_tool
+@traced("tool.booking_appointment")
 async def booking_appointment(date: str = "", time: str = "") -> str:
     """
     Final booking step: create the appointment.
@@ -254,7 +361,7 @@ async def booking_appointment(date: str = "", time: str = "") -> str:
     LLM handles all questioning BEFORE calling this tool.
     """
 
-    ctx = _ctx()  # Redis session memory
+    ctx = await _ctx()  # live session memory (checkpointed to Redis)
     if time:
         ctx.time = time
 
@@ -267,8 +374,8 @@ async def booking_appointment(date: str = "", time: str = "") -> str:
             return "The date should be in YYYY-MM-DD format, like 2025-11-25."
         ctx.date = date
 
-    _save(ctx)
-
+    # Once this call holds the slot, every exit that doesn't book lets go of it
+    holding = booked = False
     try:
         # -----------------------------
         # 1️⃣ Validate required fields
@@ -287,32 +394,29 @@ async def booking_appointment(date: str = "", time: str = "") -> str:
 
         selected_time = ctx.time
 
+        # Someone else is mid-conversation on this slot → don't race them
+        if not await _take_hold(ctx, ctx.date, selected_time):
+            raise SlotTakenError(ctx.date, selected_time)
+        holding = True
+
         # -----------------------------
         # 2️⃣ Fetch or create patient
         # -----------------------------
-        with db_context():
-            patient = get_patient_by_phone(ctx.phone)
-
+        # One session, one transaction for the whole booking
+        async with db_budget(), unit_of_work() as uow:
+            patient = await get_or_create_patient(ctx.name, ctx.phone, uow=uow)
             if not patient:
-                # Create new patient
-                patient = get_or_create_patient(ctx.name, ctx.phone)
-                if not patient:
-                    logger.error(
-                        f"[booking] get_or_create_patient failed for name={ctx.name!r}, phone={ctx.phone!r}"
-                    )
-                    return "Sorry, I couldn't access our booking system. Please try again."
-
-                logger.info(f"[booking] Created new patient: {patient}")
+                logger.error(
+                    f"[booking] get_or_create_patient failed for name={ctx.name!r}, phone={ctx.phone!r}"
+                )
+                return "Sorry, I couldn't access our booking system. Please try again."
 
             patient_id = patient["id"]
 
             # -----------------------------
             # 3️⃣ Check if appointment exists
             # -----------------------------
-            existing = Appointment.query.filter_by(
-                patient_id=patient_id,
-                date=ctx.date
-            ).first()
+            existing = await get_patient_appointment_on(patient_id, ctx.date, uow=uow)
 
             if existing:
                 if existing.time == selected_time:
@@ -329,10 +433,11 @@ async def booking_appointment(date: str = "", time: str = "") -> str:
             # -----------------------------
             # 4️⃣ Create appointment
             # -----------------------------
-            new_appt = create_appointment(
+            new_appt = await create_appointment(
                 patient_id=patient_id,
                 date=ctx.date,
-                time=selected_time
+                time=selected_time,
+                uow=uow,
             )
 
             if not new_appt:
@@ -344,37 +449,52 @@ async def booking_appointment(date: str = "", time: str = "") -> str:
 
             logger.info(f"[booking] Appointment created: {new_appt}")
 
-
-
-
+        booked = True
         ctx.status = "BOOKED"
         ctx.stage = "DONE"
+        await _release_hold(ctx)  # converted: the booking now holds the slot
 
-        asyncio.create_task(asyncio.to_thread(_save, ctx))
+        asyncio.create_task(_save(ctx))
 
         return (
             f"Your appointment is confirmed for {ctx.date} at {selected_time}. "
             "Anything else you need?"
         )
 
+    except SlotTakenError as e:
+        # Lost the race for the slot: nothing was written, offer to look again
+        logger.info(f"[booking] {e}")
+        await _release_hold(ctx)
+        ctx.time = None
+        ctx.suggested_slots = [s for s in (ctx.suggested_slots or []) if s != e.time]
+        await _save(ctx)
+        return f"Sorry, {e.time} on {e.date} was just taken. Shall I check other times?"
+    except DBDeadlineExceeded:
+        logger.warning("[booking] DB over budget; asking the caller to hold")
+        return SLOW_DB_REPLY
     except Exception as e:
         logger.error(f"[booking] ❌ Error: {e}")
         return "Sorry, I couldn't complete the booking. Please try again."
+    finally:
+        if holding and not booked:
+            await _release_hold(ctx)
 
 
 @function_tool
+@traced("tool.get_date")
 async def get_date():
     """Return system date and time."""
     return f"Today's date is {datetime.now().strftime('%A, %B %d, %Y %I:%M %p')}"
 
 
 @function_tool
+@traced("tool.update_caller_profile")
 async def update_caller_profile(name: Optional[str] = None, phone: Optional[str] = None) -> str:
     """
     Persist caller profile (name/phone) for future calls without disrupting session.
     If phone not provided, uses current session phone if available.
     """
-    ctx = _ctx()
+    ctx = await _ctx()
     target_phone = (phone or ctx.phone or "").strip()
     target_name = (name or ctx.name or "").strip()
 
@@ -382,12 +502,12 @@ async def update_caller_profile(name: Optional[str] = None, phone: Optional[str]
         return "I need a phone number to update your profile. What’s your number?"
 
     try:
-        profile = upsert_caller_profile(phone=target_phone, name=target_name or None)
+        profile = await upsert_caller_profile_async(phone=target_phone, name=target_name or None)
         # Merge back to session for immediate continuity
         if target_name:
             ctx.name = target_name.title()
         ctx.phone = profile.phone
-        _save(ctx)
+        await _save(ctx)
         if target_name:
             return f"Okay, I’ll remember {ctx.name} for next time."
         return "Okay, I’ll remember your details for next time."
@@ -396,12 +516,13 @@ async def update_caller_profile(name: Optional[str] = None, phone: Optional[str]
         return "Sorry, I couldn’t update your profile right now."
 
 @function_tool
+@traced("tool.confirm_reschedule")
 async def confirm_reschedule(time: str = "") -> str:
     """
     Confirm and perform rescheduling to the selected date/time.
     Use after start_reschedule + available_slot when the caller says 'yes'.
     """
-    ctx = _ctx()
+    ctx = await _ctx()
 
     if not ctx.phone:
         return "I need your phone number to find your appointment. What’s your number?"
@@ -414,18 +535,24 @@ async def confirm_reschedule(time: str = "") -> str:
     if not selected_time:
         return "Which time should I move it to?"
 
+    # Once this call holds the slot, every exit that doesn't move the booking lets go of it
+    holding = done = False
     try:
-        with db_context():
-            patient = get_patient_by_phone(ctx.phone)
+        if not await _take_hold(ctx, ctx.date, selected_time):
+            raise SlotTakenError(ctx.date, selected_time)
+        holding = True
+
+        async with db_budget(), unit_of_work() as uow:
+            patient = await get_patient_by_phone(ctx.phone, uow=uow)
             if not patient:
                 return "we don't have your record,do you want to book a new one?"
 
-            upcoming = get_upcoming_appointment(patient["id"])
+            upcoming = await get_upcoming_appointment(patient["id"], uow=uow)
             if not upcoming:
                 return "I don’t see an upcoming appointment to move. Should I book a new one instead?"
 
             old_date, old_time = str(upcoming.date), upcoming.time
-            updated_appt = reschedule_appointment(upcoming.id, ctx.date, selected_time)
+            updated_appt = await reschedule_appointment(upcoming.id, ctx.date, selected_time, uow=uow)
 
             if not updated_appt:
                 logger.error(
@@ -434,23 +561,47 @@ async def confirm_reschedule(time: str = "") -> str:
                 )
                 return "Sorry, I couldn’t change that appointment right now. Please try again later."
 
+        done = True
         ctx.time = selected_time
         ctx.status = "rescheduled"
-        _save(ctx)
+        await _release_hold(ctx)
+        await _save(ctx)
 
         return (
             f"Done. I’ve moved your appointment from {old_date} at {old_time} "
             f"to {ctx.date} at {selected_time}. Anything else I can help with?"
         )
+    except SlotTakenError as e:
+        logger.info(f"[confirm_reschedule] {e}")
+        await _release_hold(ctx)
+        ctx.suggested_slots = [s for s in (ctx.suggested_slots or []) if s != e.time]
+        await _save(ctx)
+        return f"Sorry, {e.time} on {e.date} was just taken. Shall I check other times?"
+    except DBDeadlineExceeded:
+        logger.warning(f"[confirm_reschedule] DB over budget; asking the caller to hold")
+        return SLOW_DB_REPLY
     except Exception as e:
         logger.exception(f"[confirm_reschedule] Unexpected error: {e}")
         return "Sorry, I couldn’t change that appointment right now. Please try again later."
+    finally:
+        if holding and not done:
+            await _release_hold(ctx)
+
 @function_tool
+@traced("tool.end_call")
 async def end_call() -> str:
     """
     Gracefully end the call after confirming there's nothing else needed.
     Does not clear Redis; short-term memory expires via TTL.
+    Releases any slot hold so other callers can be offered it right away.
     """
+    try:
+        ctx = await _ctx()
+        await _release_hold(ctx)
+        await _save(ctx)
+    except Exception as e:
+        logger.warning(f"[end_call] Could not release slot hold: {e}")
+
     async def _delayed_hangup():
         try:
             await asyncio.sleep(1.0)  # allow TTS to finish
@@ -464,21 +615,22 @@ import re
 
 
 
-@function_tool 
+@function_tool
+@traced("tool.start_reschedule")
 async def start_reschedule() -> str:
-    ctx = _ctx()
+    ctx = await _ctx()
 
     if not ctx.phone:
         return "Sure, I can help with that. Can you confirm your phone number first?"
 
     try:
-        with db_context():
-            patient = get_patient_by_phone(ctx.phone)
+        async with db_budget(), unit_of_work() as uow:
+            patient = await get_patient_by_phone(ctx.phone, uow=uow)
 
             if not patient:
                 return "I couldn’t find your record. Can you share your name?"
 
-            upcoming = get_upcoming_appointment(patient["id"])
+            upcoming = await get_upcoming_appointment(patient["id"], uow=uow)
 
             if not upcoming:
                 return "You don’t have any upcoming appointment. Would you like to book a new one?"
@@ -498,9 +650,12 @@ async def start_reschedule() -> str:
             ctx.old_date = old_date
             ctx.old_time = old_time
             ctx.mode = "reschedule"
-            _save(ctx)
+            await _save(ctx)
 
             return f"I found your appointment on {old_date} at {old_time}. What date and time would you like to move it to?"
+    except DBDeadlineExceeded:
+        logger.warning(f"[start_reschedule] DB over budget; asking the caller to hold")
+        return SLOW_DB_REPLY
     except Exception as e:
         logger.exception(f"[start_reschedule] Unexpected error: {e}")
         return "I’m having trouble looking up your appointment right now. Please try again later."
@@ -541,44 +696,49 @@ class BookingBase(BaseModel):
         return clean
 
 @function_tool
+@traced("tool.start_cancel")
 async def start_cancel() -> str:
     """
     Start cancellation flow.
     Checks patient record and upcoming appointment.
     """
-    ctx = _ctx()
+    ctx = await _ctx()
 
     if not ctx.phone:
         return "I need your phone number to find your appointment. What’s your number?"
 
     try:
-        with db_context():
-            patient = get_patient_by_phone(ctx.phone)
+        async with db_budget(), unit_of_work() as uow:
+            patient = await get_patient_by_phone(ctx.phone, uow=uow)
             if not patient:
                 return "I couldn’t find your record with this phone number."
 
-            upcoming = get_upcoming_appointment(patient["id"])
+            upcoming = await get_upcoming_appointment(patient["id"], uow=uow)
             if not upcoming:
                 return "You don’t have any upcoming appointment. Would you like to book a new one?"
 
             # Store selected appointment ID for safe cancel
             ctx.mode = "cancel"
             ctx.cancel_appt_id = upcoming.id
-            _save(ctx)
+            await _save(ctx)
 
             return f"I found your appointment on {upcoming.date} at {upcoming.time}. Would you like to cancel it?"
+    except DBDeadlineExceeded:
+        logger.warning(f"[start_cancel] DB over budget; asking the caller to hold")
+        return SLOW_DB_REPLY
     except Exception as e:
         logger.exception(f"[start_cancel] Unexpected error: {e}")
         return "I’m having trouble accessing our booking system right now. Please try again later."
 
 
 @function_tool
+@traced("tool.confirm_cancel")
 async def confirm_cancel() -> str:
     """
     Final step for canceling an appointment.
     Must only run after start_cancel(), when ctx.mode == "cancel".
     """
-    ctx = _ctx()
+    ctx = await _ctx()
 
     try:
         # 1️⃣ Ensure we're in cancel mode
@@ -593,9 +753,9 @@ async def confirm_cancel() -> str:
         if not hasattr(ctx, "cancel_appt_id") or not ctx.cancel_appt_id:
             return "I couldn’t find the appointment you want to cancel."
 
-        with db_context():
-            # 4️⃣ Load appointment safely
-            appt = Appointment.query.get(ctx.cancel_appt_id)
+        async with db_budget(), unit_of_work() as uow:
+            # 4️⃣ Load appointment safely (the delete below reuses this row)
+            appt = await get_appointment(ctx.cancel_appt_id, uow=uow)
             if not appt:
                 return "That appointment no longer exists."
 
@@ -604,7 +764,7 @@ async def confirm_cancel() -> str:
             time_text = appt.time
 
             # 5️⃣ Delete appointment
-            deleted = delete_appointment(ctx.cancel_appt_id)
+            deleted = await delete_appointment(ctx.cancel_appt_id, uow=uow)
             if not deleted:
                 logger.error(
                     f"[confirm_cancel] delete_appointment returned False for id={ctx.cancel_appt_id}"
@@ -614,13 +774,16 @@ async def confirm_cancel() -> str:
         # 6️⃣ Cleanup context
         ctx.mode = None
         ctx.cancel_appt_id = None
-        _save(ctx)
+        await _save(ctx)
 
         return (
             f"Your appointment on {date_text} at {time_text} is canceled. "
             "Anything else I can help with?"
         )
 
+    except DBDeadlineExceeded:
+        logger.warning("[confirm_cancel] DB over budget; asking the caller to hold")
+        return SLOW_DB_REPLY
     except Exception as e:
         logger.error(f"[confirm_cancel] Error: {e}")
         return "Sorry, I couldn't cancel the appointment. Please try again."
@@ -0,0 +1,362 @@
+import os
+import re
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from src.services.redis_service import r, ar
+from src.services.db_executor import run_db
+from latency_tracker import traced
+from src.models.appointments_db import parse_appointment_time, ACTIVE_STATUSES
+
+
+logger = logging.getLogger("availability")
+
+
+# -------------------------------
+# 🕘 SLOT CATALOG
+# -------------------------------
+
+# Base clinic working hours — bit i of an occupancy mask is CLINIC_SLOTS[i]
+CLINIC_SLOTS = (
+    "9:00 AM", "9:30 AM", "10:00 AM", "10:30 AM",
+    "11:00 AM", "11:30 AM", "12:00 PM",
+    "1:00 PM", "1:30 PM", "2:00 PM", "2:30 PM",
+    "3:00 PM", "3:30 PM", "4:00 PM",
+)
+SLOT_COUNT = len(CLINIC_SLOTS)
+ALL_SLOTS_MASK = (1 << SLOT_COUNT) - 1
+
+# How far ahead callers may book
+BOOKING_HORIZON_DAYS = 30
+
+# Statuses that take a slot off the market (the rows that carry a slot_key)
+OCCUPYING_STATUSES = ACTIVE_STATUSES
+
+# Same parser the model uses to fill appointments.start_at
+parse_slot_time = parse_appointment_time
+
+
+_SLOT_BY_TIME = {parse_slot_time(s): i for i, s in enumerate(CLINIC_SLOTS)}
+
+
+def slot_index(value: str | None) -> int | None:
+    """Bit position of a stored/spoken time, or None if it isn't a clinic slot."""
+    return _SLOT_BY_TIME.get(parse_slot_time(value))
+
+
+def occupies(status: str | None) -> bool:
+    return status in OCCUPYING_STATUSES
+
+
+def mask_for(times) -> int:
+    mask = 0
+    for t in times:
+        idx = slot_index(t)
+        if idx is not None:
+            mask |= 1 << idx
+    return mask
+
+
+def slots_from_mask(mask: int) -> list[str]:
+    return [s for i, s in enumerate(CLINIC_SLOTS) if mask >> i & 1]
+
+
+def _hour(slot: str) -> int:
+    return int(slot.split(":")[0])
+
+
+@lru_cache(maxsize=256)
+def filter_mask(text: str) -> int:
+    """
+    Natural-language filter as a slot mask (morning / afternoon / evening / "after 2").
+    Same rules the available_slot tool always used, computed once per phrase.
+    """
+    lower = (text or "").lower()
+
+    if "morning" in lower:
+        keep = lambda s: "AM" in s
+    elif "afternoon" in lower:
+        keep = lambda s: "PM" in s and _hour(s) < 4
+    elif "evening" in lower:
+        keep = lambda s: "PM" in s and _hour(s) >= 4
+    else:
+        numbers = re.findall(r"\d+", lower)
+        if not numbers:
+            return ALL_SLOTS_MASK
+        hour = int(numbers[0])
+        keep = lambda s: _hour(s) >= hour
+
+    return mask_for(s for s in CLINIC_SLOTS if keep(s))
+
+
+# -------------------------------
+# 🗺️ PER-DAY OCCUPANCY BITMAP (Redis)
+# -------------------------------
+
+# Layout: BITFIELD u{SLOT_COUNT + 1} at offset 0.
+# Bit offset 0 marks the day as built; offset 1 + i is CLINIC_SLOTS[i].
+_FIELD = f"u{SLOT_COUNT + 1}"
+AVAILABILITY_TTL_SEC = int(os.getenv("AVAILABILITY_TTL_SEC", 900))
+
+# Every committed write bumps the day's generation. A rebuild reads the
+# generation before its DB query and only stores if it is unchanged, so a
+# booking that lands mid-rebuild can't be overwritten by the older mask.
+# KEYS[1] = day key, KEYS[2] = generation key
+# ARGV[1] = packed value, ARGV[2] = ttl, ARGV[3] = bitfield type, ARGV[4] = generation read
+_STORE_DAY = r.register_script("""
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[4] then
+    return 0
+end
+redis.call('BITFIELD', KEYS[1], 'SET', ARGV[3], 0, ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+""")
+_STORE_DAY_ASYNC = ar.register_script(_STORE_DAY.script)
+
+# Bump the generation, then flip the bit only if the day is already built;
+# a missing day is rebuilt from the DB.
+# KEYS[1] = day key, KEYS[2] = generation key | ARGV[1] = bit offset, ARGV[2] = 1/0, ARGV[3] = ttl
+_MARK_SLOT = r.register_script("""
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('SETBIT', KEYS[1], ARGV[1], ARGV[2])
+end
+return -1
+""")
+
+
+def _day_key(date: str) -> str:
+    return f"availability:{date}"
+
+
+def _gen_key(date: str) -> str:
+    return f"availability:gen:{date}"
+
+
+def _pack(mask: int) -> int:
+    packed = 1 << SLOT_COUNT
+    for i in range(SLOT_COUNT):
+        if mask >> i & 1:
+            packed |= 1 << (SLOT_COUNT - 1 - i)
+    return packed
+
+
+def _unpack(packed: int) -> int | None:
+    if not packed >> SLOT_COUNT & 1:
+        return None  # day not built yet
+    mask = 0
+    for i in range(SLOT_COUNT):
+        if packed >> (SLOT_COUNT - 1 - i) & 1:
+            mask |= 1 << i
+    return mask
+
+
+def occupied_mask_from_db(date: str) -> int:
+    """One SQL query → occupancy mask for a day."""
+    from src.services.clinic_service import get_booked_slots  # local import to avoid cycles
+
+    return mask_for(get_booked_slots(date) or [])
+
+
+@traced("redis.occupied_mask")
+async def occupied_mask(date: str) -> int:
+    """
+    Occupancy mask for a day. Served from the Redis bitmap; on a miss the
+    day is built from one DB query (bounded DB pool, within the tool's
+    deadline) and cached.
+    """
+    key, gen_key = _day_key(date), _gen_key(date)
+    try:
+        pipe = ar.pipeline(transaction=False)
+        pipe.bitfield(key).get(_FIELD, 0).execute()
+        pipe.get(gen_key)
+        (packed,), generation = await pipe.execute()
+        mask = _unpack(packed)
+        if mask is not None:
+            return mask
+    except Exception as e:
+        logger.warning(f"[availability] Redis read failed for {date}: {e}")
+        return await run_db(occupied_mask_from_db, date)
+
+    mask = await run_db(occupied_mask_from_db, date)
+    try:
+        stored = await _STORE_DAY_ASYNC(
+            keys=[key, gen_key], args=[_pack(mask), AVAILABILITY_TTL_SEC, _FIELD, generation or "0"]
+        )
+        if not stored:
+            # A write committed while we read: this mask may predate it
+            logger.info(f"[availability] Day {date} changed during rebuild; re-reading from the DB")
+            mask = await run_db(occupied_mask_from_db, date)
+    except Exception as e:
+        logger.warning(f"[availability] Redis store failed for {date}: {e}")
+    return mask
+
+
+async def free_slots(date: str, text: str = "", holder: str | None = None) -> tuple[list[str], int]:
+    """
+    Free slots for a day, narrowed by the caller's phrase when that leaves
+    anything. Slots other callers are holding are left out.
+    Returns (slots, occupied mask).
+    """
+    booked, held = await asyncio.gather(occupied_mask(date), held_mask(date, holder))
+    free = ALL_SLOTS_MASK & ~booked & ~held
+    return slots_from_mask(free & filter_mask(text)) or slots_from_mask(free), booked
+
+
+def _window_days(start_date: str, end_date: str) -> list[str]:
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    return [(start + timedelta(days=n)).strftime("%Y-%m-%d") for n in range((end - start).days + 1)]
+
+
+def find_open_slots(
+    start_date: str, end_date: str, limit: int = 3, text: str = "", held: dict[str, int] | None = None
+) -> list[tuple[str, list[str]]]:
+    """
+    Earliest `limit` free slots between two dates (inclusive), grouped by day:
+    [(date, [slot, ...]), ...]. One range query covers the whole window.
+    The caller's phrase is honoured if any day in the window matches it.
+    `held` (date → mask) removes slots before the limit is applied.
+    """
+    from src.services.clinic_service import get_booked_slots_between  # local import to avoid cycles
+
+    booked = get_booked_slots_between(start_date, end_date)
+    held = held or {}
+    free_by_day = [
+        (d, ALL_SLOTS_MASK & ~mask_for(booked.get(d, [])) & ~held.get(d, 0))
+        for d in _window_days(start_date, end_date)
+    ]
+
+    for wanted in (filter_mask(text), ALL_SLOTS_MASK):
+        found: list[tuple[str, list[str]]] = []
+        remaining = limit
+        for day, free in free_by_day:
+            slots = slots_from_mask(free & wanted)[:remaining]
+            if slots:
+                found.append((day, slots))
+                remaining -= len(slots)
+            if not remaining:
+                return found
+        if found:
+            return found
+    return []
+
+
+async def next_open_slots(
+    start_date: str, end_date: str, limit: int = 3, text: str = "", holder: str | None = None
+) -> list[tuple[str, list[str]]]:
+    """
+    Async wrapper for the voice tools (bounded DB pool, within the tool's
+    deadline). Slots other callers are holding are skipped before the
+    limit, so held early slots are replaced by later free ones.
+    """
+    held = await held_masks(_window_days(start_date, end_date), holder)
+    return await run_db(find_open_slots, start_date, end_date, limit, text, held)
+
+
+def on_appointment_change(before: tuple | None, after: tuple | None):
+    """
+    Keep day bitmaps in step with a committed write.
+    `before` / `after` are (date, time, status) of the appointment.
+    Both sides flip one bit in place: the unique slot_key index guarantees
+    a slot has at most one holder, so a vacated slot is really free.
+    """
+    try:
+        for state, bit in ((before, 0), (after, 1)):
+            if state and occupies(state[2]):
+                idx = slot_index(state[1])
+                if idx is not None:
+                    _MARK_SLOT(keys=[_day_key(state[0]), _gen_key(state[0])], args=[1 + idx, bit, AVAILABILITY_TTL_SEC])
+    except Exception as e:
+        logger.warning(f"[availability] Bitmap update failed for {before} → {after}: {e}")
+
+
+# -------------------------------
+# ✋ SLOT HOLDS (Redis)
+# -------------------------------
+
+# Once a caller picks a time it is kept off everyone else's offers while they
+# give their details. The booking converts it, hang-up releases it, and
+# otherwise it just expires. Holds only steer offers: the unique slot index
+# is still what makes a double booking impossible.
+SLOT_HOLD_MS = int(os.getenv("SLOT_HOLD_MS", 90_000))
+
+# Take the hold, or extend it if this holder already has it.
+# KEYS[1] = hold key | ARGV[1] = holder, ARGV[2] = ttl ms
+_ACQUIRE_HOLD = ar.register_script("""
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+""")
+
+# Compare-and-delete: never drop a hold that expired and went to someone else.
+# KEYS[1] = hold key | ARGV[1] = holder
+_RELEASE_HOLD = ar.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+""")
+
+
+def _hold_key(date: str, idx: int) -> str:
+    return f"hold:{date}:{idx}"
+
+
+async def held_mask(date: str, holder: str | None = None) -> int:
+    """Slots of a day held by callers other than `holder` (one MGET)."""
+    return (await held_masks([date], holder)).get(date, 0)
+
+
+@traced("redis.held_mask")
+async def held_masks(days: list[str], holder: str | None = None) -> dict[str, int]:
+    """held_mask for several days in one MGET (days with no holds are left out)."""
+    try:
+        values = await ar.mget([_hold_key(day, i) for day in days for i in range(SLOT_COUNT)])
+    except Exception as e:
+        logger.warning(f"[availability] Hold lookup failed for {days[0]}..{days[-1]}: {e}")
+        return {}
+    masks = {}
+    for n, day in enumerate(days):
+        mask = 0
+        for i, owner in enumerate(values[n * SLOT_COUNT:(n + 1) * SLOT_COUNT]):
+            if owner is not None and owner != holder:
+                mask |= 1 << i
+        if mask:
+            masks[day] = mask
+    return masks
+
+
+@traced("redis.hold_slot")
+async def hold_slot(date: str, time: str, holder: str) -> bool:
+    """
+    Reserve a slot for SLOT_HOLD_MS (SET NX PX). False only when another
+    caller holds it; off-catalog times and Redis outages fail open.
+    """
+    idx = slot_index(time)
+    if idx is None:
+        return True
+    try:
+        return bool(await _ACQUIRE_HOLD(keys=[_hold_key(date, idx)], args=[holder, SLOT_HOLD_MS]))
+    except Exception as e:
+        logger.warning(f"[availability] Hold failed for {date} {time}: {e}")
+        return True
+
+
+@traced("redis.release_slot_hold")
+async def release_slot_hold(date: str, time: str, holder: str):
+    idx = slot_index(time)
+    if idx is None:
+        return
+    try:
+        await _RELEASE_HOLD(keys=[_hold_key(date, idx)], args=[holder])
+    except Exception as e:
+        logger.warning(f"[availability] Hold release failed for {date} {time}: {e}")
@@ -0,0 +1,353 @@
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from sqlalchemy import select, or_
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from extensions import db
+from src.models import Patient, Appointment
+from src.models.appointments_db import day_bounds
+from src.services import db_context as dbc
+from src.services import clinic_service as cs
+from src.services.clinic_service import SlotTakenError  # noqa: F401 (re-exported for the tools)
+from src.services.redis_service import bump_data_version, get_data_version_async
+from src.services.db_executor import deadline_passed
+from latency_tracker import span, traced
+
+
+logger = logging.getLogger("clinic_repository")
+
+
+# -------------------------------
+# ⚡ ASYNC ENGINE (voice worker)
+# -------------------------------
+
+# Sync driver → asyncio driver. The sync URL stays the single source of truth.
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+asyncmy",
+    "mysql+pymysql": "mysql+asyncmy",
+    "mysql+mysqldb": "mysql+asyncmy",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+_engines: dict[str, object] = {}
+_sessionmakers: dict[str, async_sessionmaker] = {}
+
+
+def async_database_url(sync_url: str | None = None) -> str:
+    """
+    Asyncio twin of the app's database URL (ASYNC_DATABASE_URL wins if set).
+    Defaults to the URL Flask-SQLAlchemy resolved, so relative SQLite paths
+    point at the same instance/ file the dashboard uses.
+    """
+    override = os.getenv("ASYNC_DATABASE_URL")
+    if override:
+        return override
+
+    if sync_url is None:
+        with dbc.get_app().app_context():
+            sync_url = db.engine.url.render_as_string(hide_password=False)
+
+    url = make_url(sync_url)
+    driver = _ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def _sessionmaker() -> async_sessionmaker:
+    url = async_database_url()
+    maker = _sessionmakers.get(url)
+    if maker is None:
+        if url.startswith("sqlite"):
+            # SQLite connects in microseconds and aiosqlite connections are
+            # bound to the loop that opened them, so don't pool them.
+            engine = create_async_engine(url, poolclass=NullPool)
+        else:
+            engine = create_async_engine(
+                url,
+                pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+                max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+                pool_pre_ping=True,
+                pool_recycle=1800,
+            )
+        _engines[url] = engine
+        # Rows handed back must stay readable once the session has closed
+        maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        _sessionmakers[url] = maker
+    return maker
+
+
+def prepare_engine():
+    """Build the async engine up front (worker prewarm) instead of on the first tool call."""
+    _sessionmaker()
+
+
+async def dispose_engines():
+    """Close pooled connections (worker shutdown)."""
+    for engine in list(_engines.values()):
+        await engine.dispose()
+    _engines.clear()
+    _sessionmakers.clear()
+
+
+# -------------------------------
+# 🧾 ASYNC UNIT OF WORK
+# -------------------------------
+
+class AsyncUnitOfWork(cs.UnitOfWork):
+    """Same contract as clinic_service.UnitOfWork, over an AsyncSession."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.failed = False
+        self._after_commit: list[tuple] = []
+
+
+async def _commit(uow: AsyncUnitOfWork):
+    with span("db.commit"):
+        await uow.session.commit()
+    for fn, args in uow._after_commit:
+        await asyncio.to_thread(fn, *args)
+
+
+@asynccontextmanager
+async def unit_of_work():
+    """
+    One AsyncSession, one transaction for a tool call:
+
+        async with unit_of_work() as uow:
+            patient = await get_or_create_patient(name, phone, uow=uow)
+
+    Commits once on a clean exit, rolls back otherwise. Post-commit hooks
+    (sync Redis calls) run in a worker thread so the event loop stays free.
+
+    Once COMMIT is sent the tool's deadline no longer applies: the commit
+    and its hooks (bitmap, upcoming cache, data version) are shielded, and
+    a deadline that fires meanwhile is absorbed rather than reported as a
+    failure for work that was saved.
+    """
+    async with _sessionmaker()() as session:
+        uow = AsyncUnitOfWork(session)
+        try:
+            yield uow
+            if uow.failed:
+                await session.rollback()
+                return
+            commit = asyncio.ensure_future(_commit(uow))
+            try:
+                await asyncio.shield(commit)
+            except asyncio.CancelledError:
+                if not deadline_passed():
+                    raise  # hang-up / shutdown: the shielded commit still completes
+                logger.warning("[unit_of_work] Tool deadline hit during commit; finishing it")
+                await commit
+        except Exception:
+            await session.rollback()
+            raise
+
+
+@asynccontextmanager
+async def _work(uow: AsyncUnitOfWork | None):
+    """Join the caller's unit of work, or run a one-off one."""
+    if uow is None:
+        async with unit_of_work() as own:
+            yield own
+        return
+    try:
+        yield uow
+    except Exception:
+        uow.failed = True
+        raise
+
+
+# -------------------------------
+# 👤 PATIENTS
+# -------------------------------
+
+@traced("db.get_patient_by_phone")
+async def get_patient_by_phone(phone: str, uow: AsyncUnitOfWork | None = None):
+    try:
+        async with _work(uow) as work:
+            p = await work.session.scalar(select(Patient).filter_by(phone=phone).limit(1))
+            if not p:
+                return None
+            return {"id": p.id, "name": p.name, "phone": p.phone}
+    except Exception as e:
+        logger.exception(f"[get_patient_by_phone] Failed for phone={phone}: {e}")
+        return None
+
+
+@traced("db.get_or_create_patient")
+async def get_or_create_patient(name: str, phone: str, uow: AsyncUnitOfWork | None = None):
+    try:
+        async with _work(uow) as work:
+            p = await work.session.scalar(select(Patient).filter_by(phone=phone).limit(1))
+            if p:
+                return {"id": p.id, "name": p.name, "phone": p.phone}
+
+            new_p = Patient(
+                name=name.strip().title(),
+                phone=phone,
+                created_at=datetime.utcnow(),
+            )
+            work.session.add(new_p)
+            await work.session.flush()  # assigns the id
+            work.on_commit(bump_data_version)
+            logger.info(f"[get_or_create_patient] Created patient id={new_p.id}")
+
+            return {"id": new_p.id, "name": new_p.name, "phone": new_p.phone}
+    except Exception as e:
+        logger.exception(f"[get_or_create_patient] Failed for phone={phone}, name={name}: {e}")
+        return None
+
+
+# -------------------------------
+# 📅 APPOINTMENTS
+# -------------------------------
+
+@traced("db.get_appointment")
+async def get_appointment(appointment_id: int, uow: AsyncUnitOfWork | None = None):
+    try:
+        async with _work(uow) as work:
+            return await work.session.get(Appointment, appointment_id)
+    except Exception as e:
+        logger.exception(f"[get_appointment] Failed for id={appointment_id}: {e}")
+        return None
+
+
+@traced("db.get_upcoming_appointment")
+async def get_upcoming_appointment(patient_id: int, uow: AsyncUnitOfWork | None = None):
+    """Async twin of clinic_service.get_upcoming_appointment (shares its cache)."""
+    try:
+        now = cs._clinic_now()
+        version = await get_data_version_async()
+        hit, appt = cs._cached_upcoming(patient_id, version, now)
+        if hit:
+            return appt
+
+        async with _work(uow) as work:
+            a = await work.session.scalar(
+                select(Appointment)
+                .filter(Appointment.patient_id == patient_id)
+                .filter(Appointment.start_at >= now)
+                .filter(or_(Appointment.status.is_(None), Appointment.status != "Cancelled"))
+                .order_by(Appointment.start_at.asc())
+                .limit(1)
+            )
+            upcoming = cs.UpcomingAppointment(
+                id=a.id,
+                patient_id=a.patient_id,
+                date=a.date,
+                time=a.time,
+                status=a.status,
+                start_at=a.start_at,
+            ) if a else None
+
+        cs._cache_upcoming(patient_id, version, upcoming)
+        return upcoming
+    except Exception as e:
+        logger.exception(f"[get_upcoming_appointment] Failed for patient_id={patient_id}: {e}")
+        return None
+
+
+@traced("db.get_patient_appointment_on")
+async def get_patient_appointment_on(patient_id: int, date: str, uow: AsyncUnitOfWork | None = None):
+    try:
+        day_start, day_end = day_bounds(date)
+        async with _work(uow) as work:
+            return await work.session.scalar(
+                select(Appointment)
+                .filter(Appointment.patient_id == patient_id)
+                .filter(Appointment.start_at >= day_start)
+                .filter(Appointment.start_at < day_end)
+                .order_by(Appointment.start_at.asc())
+                .limit(1)
+            )
+    except Exception as e:
+        logger.exception(f"[get_patient_appointment_on] Failed for patient_id={patient_id}, date={date}: {e}")
+        return None
+
+
+@traced("db.create_appointment")
+async def create_appointment(patient_id: int, date: str, time: str, uow: AsyncUnitOfWork | None = None):
+    """Insert-and-catch, like the sync helper: raises SlotTakenError if the slot is held."""
+    try:
+        async with _work(uow) as work:
+            appt = Appointment(
+                patient_id=patient_id,
+                date=date,
+                time=time,
+                status="Booked",
+                created_at=datetime.utcnow(),
+            )
+            work.session.add(appt)
+            await work.session.flush()
+            work.on_commit(cs._on_appointment_change, None, cs._state(appt))
+            return appt
+    except IntegrityError as e:
+        if cs._is_slot_conflict(e):
+            logger.info(f"[create_appointment] Slot taken: {date} {time} (patient_id={patient_id})")
+            raise SlotTakenError(date, time) from e
+        logger.exception(f"[create_appointment] Failed for patient_id={patient_id}, date={date}, time={time}: {e}")
+        return None
+    except Exception as e:
+        logger.exception(
+            f"[create_appointment] Failed for patient_id={patient_id}, date={date}, time={time}: {e}"
+        )
+        return None
+
+
+@traced("db.reschedule_appointment")
+async def reschedule_appointment(appt_id: int, new_date: str, new_time: str, uow: AsyncUnitOfWork | None = None):
+    """Atomic conditional move, like the sync helper (None if changed underneath us)."""
+    try:
+        async with _work(uow) as work:
+            appt = await work.session.get(Appointment, appt_id)
+            if not appt:
+                return None
+
+            before = cs._state(appt)
+            moved = await work.session.execute(cs._move_statement(appt, new_date, new_time))
+            if moved.rowcount != 1:
+                logger.warning(f"[reschedule_appointment] Appointment {appt_id} changed concurrently; not moved")
+                return None
+
+            work.on_commit(cs._on_appointment_change, before, cs._state(appt))
+            return appt
+    except IntegrityError as e:
+        if cs._is_slot_conflict(e):
+            logger.info(f"[reschedule_appointment] Slot taken: {new_date} {new_time} (appt_id={appt_id})")
+            raise SlotTakenError(new_date, new_time) from e
+        logger.exception(f"[reschedule_appointment] Failed for appt_id={appt_id}, date={new_date}, time={new_time}: {e}")
+        return None
+    except Exception as e:
+        logger.exception(
+            f"[reschedule_appointment] Failed for appt_id={appt_id}, date={new_date}, time={new_time}: {e}"
+        )
+        return None
+
+
+@traced("db.delete_appointment")
+async def delete_appointment(appointment_id: int, uow: AsyncUnitOfWork | None = None) -> bool:
+    try:
+        async with _work(uow) as work:
+            appt = await work.session.get(Appointment, appointment_id)
+            if not appt:
+                return False
+
+            before = cs._state(appt)
+            await work.session.delete(appt)
+            await work.session.flush()
+            work.on_commit(cs._on_appointment_change, before, None)
+            return True
+    except Exception as e:
+        logger.exception(f"[delete_appointment] Error deleting appointment {appointment_id}: {e}")
+        return False
@@ -1,7 +1,18 @@
+import os
+import re
+from contextlib import contextmanager
+from time import monotonic
+from dataclasses import dataclass
 from datetime import datetime
+from sqlalchemy import func, or_, and_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from extensions import db
 from src.models import Patient, Appointment
+from src.models.appointments_db import day_bounds, compose_start_at, slot_key_for
 from src.services.db_context import db_context
+from src.services import availability
+from src.services.redis_service import get_data_version, bump_data_version
 import pytz
 import logging
 
@@ -9,15 +20,81 @@ import logging
 logger = logging.getLogger("clinic_service")
 
 
+# -------------------------------
+# 🧾 UNIT OF WORK
+# -------------------------------
+
+class UnitOfWork:
+    """
+    One app context, one session, one transaction for a whole operation.
+    Helpers given `uow=` flush instead of committing and queue their
+    post-commit hooks here; they run once, after the single COMMIT.
+    """
+
+    def __init__(self):
+        self.session = db.session()
+        # The session dies with this unit's app context; rows handed back
+        # to callers must stay readable without a refresh afterwards.
+        self.session.expire_on_commit = False
+        self.failed = False
+        self._after_commit: list[tuple] = []
+
+    def on_commit(self, fn, *args):
+        self._after_commit.append((fn, args))
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Transactional scope for a tool call:
+
+        with unit_of_work() as uow:
+            patient = get_or_create_patient(name, phone, uow=uow)
+            create_appointment(patient["id"], date, time, uow=uow)
+
+    Commits once on a clean exit. Rolls back if the block raised or a
+    helper failed inside it (helpers log and return None/False).
+    """
+    with db_context():
+        uow = UnitOfWork()
+        try:
+            yield uow
+            if uow.failed:
+                uow.session.rollback()
+                return
+            uow.session.commit()
+        except Exception:
+            uow.session.rollback()
+            raise
+
+    # Derived state (bitmaps, caches, data version) only after a real commit
+    for fn, args in uow._after_commit:
+        fn(*args)
+
+
+@contextmanager
+def _work(uow: UnitOfWork | None):
+    """Join the caller's unit of work, or run a one-off one."""
+    if uow is None:
+        with unit_of_work() as own:
+            yield own
+        return
+    try:
+        yield uow
+    except Exception:
+        uow.failed = True
+        raise
+
+
 # -------------------------------
 # 👤 PATIENT HELPERS
 # -------------------------------
 
-def get_patient_by_phone(phone: str):
+def get_patient_by_phone(phone: str, uow: UnitOfWork | None = None):
     """Always use phone as primary key for patient identity."""
     try:
-        with db_context():
-            p = Patient.query.filter_by(phone=phone).first()
+        with _work(uow) as work:
+            p = work.session.query(Patient).filter_by(phone=phone).first()
             if not p:
                 return None
             return {"id": p.id, "name": p.name, "phone": p.phone}
@@ -26,11 +103,11 @@ def get_patient_by_phone(phone: str):
         return None
 
 
-def get_or_create_patient(name: str, phone: str):
+def get_or_create_patient(name: str, phone: str, uow: UnitOfWork | None = None):
     """Create a new patient only if phone not exists."""
     try:
-        with db_context():
-            p = Patient.query.filter_by(phone=phone).first()
+        with _work(uow) as work:
+            p = work.session.query(Patient).filter_by(phone=phone).first()
 
             if p:
                 # Already exists — return same structure
@@ -42,8 +119,10 @@ def get_or_create_patient(name: str, phone: str):
                 phone=phone,
                 created_at=datetime.utcnow()
             )
-            db.session.add(new_p)
-            db.session.commit()
+            work.session.add(new_p)
+            work.session.flush()  # assigns the id
+            work.on_commit(bump_data_version)
+            logger.info(f"[get_or_create_patient] Created patient id={new_p.id}")
 
             return {"id": new_p.id, "name": new_p.name, "phone": new_p.phone}
     except Exception as e:
@@ -51,22 +130,28 @@ def get_or_create_patient(name: str, phone: str):
         return None
 
 
-def upsert_patient(name: str, phone: str, email: str | None = None, patient_id: int | None = None):
+def upsert_patient(
+    name: str,
+    phone: str,
+    email: str | None = None,
+    patient_id: int | None = None,
+    uow: UnitOfWork | None = None,
+):
     """
     Create or update a patient record for dashboard/manual control.
     - If patient_id is provided, update that patient.
     - Otherwise, upsert by phone (phone is unique in DB).
     """
     try:
-        with db_context():
+        with _work(uow) as work:
             target = None
 
             if patient_id is not None:
-                target = Patient.query.get(patient_id)
+                target = work.session.get(Patient, patient_id)
 
             if target is None:
                 # Fallback to phone-based lookup
-                target = Patient.query.filter_by(phone=phone).first()
+                target = work.session.query(Patient).filter_by(phone=phone).first()
 
             if target:
                 # Update existing record
@@ -74,8 +159,9 @@ def upsert_patient(name: str, phone: str, email: str | None = None, patient_id:
                 target.phone = phone
                 if email is not None:
                     target.email = email
-                db.session.add(target)
-                db.session.commit()
+                work.session.add(target)
+                work.session.flush()
+                work.on_commit(bump_data_version)
                 return target
 
             # Create a new record
@@ -85,23 +171,25 @@ def upsert_patient(name: str, phone: str, email: str | None = None, patient_id:
                 email=email,
                 created_at=datetime.utcnow(),
             )
-            db.session.add(new_p)
-            db.session.commit()
+            work.session.add(new_p)
+            work.session.flush()
+            work.on_commit(bump_data_version)
             return new_p
     except Exception as e:
         logger.exception(f"[upsert_patient] Failed for patient_id={patient_id}, phone={phone}: {e}")
         return None
 
 
-def delete_patient(patient_id: int) -> bool:
+def delete_patient(patient_id: int, uow: UnitOfWork | None = None) -> bool:
     """Delete a patient record safely."""
     try:
-        with db_context():
-            p = Patient.query.get(patient_id)
+        with _work(uow) as work:
+            p = work.session.get(Patient, patient_id)
             if not p:
                 return False
-            db.session.delete(p)
-            db.session.commit()
+            work.session.delete(p)
+            work.session.flush()
+            work.on_commit(bump_data_version)
             return True
     except Exception as e:
         logger.exception(f"[delete_patient] Error deleting patient {patient_id}: {e}")
@@ -109,51 +197,251 @@ def delete_patient(patient_id: int) -> bool:
 
 
 # -------------------------------
-# 📅 APPOINTMENT HELPERS
+# 🔎 PATIENT SEARCH (dashboard)
 # -------------------------------
 
-def get_upcoming_appointment(patient_id: int):
-    """Return the next upcoming appointment with proper date comparison."""
+PATIENT_PAGE_SIZE = 25
+RECENT_PATIENTS_LIMIT = 50
+_PHONE_QUERY = re.compile(r"^\+?[\d\s()-]+$")
+
+
+def _patient_row(p: Patient) -> dict:
+    created_str = ""
+    try:
+        if p.created_at:
+            created_str = p.created_at.strftime("%b %d, %Y")
+    except Exception:
+        created_str = ""
+
+    return {
+        "id": p.id,
+        "name": p.name,
+        "phone": p.phone,
+        "email": p.email,
+        "created_at_human": created_str,
+    }
+
+
+def _patient_cursor(p: Patient) -> str:
+    """Opaque keyset cursor: position of the last row shown (created_at, id)."""
+    return f"{p.created_at.isoformat()}_{p.id}"
+
+
+def _parse_patient_cursor(cursor: str | None):
+    if not cursor:
+        return None
     try:
-        # Use clinic timezone
-        tz = pytz.timezone("Asia/Karachi")
-        today = datetime.now(tz).date()   # real date object
+        created, _, pid = cursor.rpartition("_")
+        return datetime.fromisoformat(created), int(pid)
+    except (TypeError, ValueError):
+        logger.warning(f"[search_patients] Ignoring bad cursor {cursor!r}")
+        return None
+
+
+def _prefix_range(column, prefix: str):
+    """`column LIKE 'prefix%'` as an index-friendly range (no collation surprises)."""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(column >= prefix, column < upper)
 
+
+def search_patients(query: str = "", cursor: str | None = None, limit: int = PATIENT_PAGE_SIZE) -> dict:
+    """
+    One page of patients for the dashboard, newest first.
+    - Digits (optionally +, spaces, dashes) → phone prefix match
+    - Anything else → case-insensitive name prefix match
+    Keyset paginated on (created_at, id); pass back `next_cursor` for the next page.
+    """
+    q = (query or "").strip()
+    limit = max(1, min(int(limit or PATIENT_PAGE_SIZE), 100))
+    try:
         with db_context():
-            appointments = (
-                Appointment.query
-                .filter(Appointment.patient_id == patient_id)
+            stmt = Patient.query
+            if q and _PHONE_QUERY.match(q):
+                digits = re.sub(r"\D", "", q)
+                if digits:
+                    # Stored numbers come with and without "+" / separators
+                    stmt = stmt.filter(or_(
+                        _prefix_range(Patient.phone, digits),
+                        _prefix_range(Patient.phone, "+" + digits),
+                        _prefix_range(Patient.phone, q),
+                    ))
+            elif q:
+                stmt = stmt.filter(_prefix_range(Patient.name_lower, q.lower()))
+
+            after = _parse_patient_cursor(cursor)
+            if after:
+                created, pid = after
+                stmt = stmt.filter(
+                    or_(
+                        Patient.created_at < created,
+                        and_(Patient.created_at == created, Patient.id < pid),
+                    )
+                )
+
+            rows = (
+                stmt.order_by(Patient.created_at.desc(), Patient.id.desc())
+                .limit(limit + 1)
                 .all()
             )
+            page = rows[:limit]
+            return {
+                "patients": [_patient_row(p) for p in page],
+                "next_cursor": _patient_cursor(page[-1]) if len(rows) > limit else None,
+            }
+    except Exception as e:
+        logger.exception(f"[search_patients] Failed for query={q!r}: {e}")
+        return {"patients": [], "next_cursor": None}
+
+
+# -------------------------------
+# 📅 APPOINTMENT HELPERS
+# -------------------------------
+
+@dataclass(frozen=True)
+class UpcomingAppointment:
+    """Detached snapshot of a patient's next appointment (safe to cache)."""
+    id: int
+    patient_id: int
+    date: str
+    time: str
+    status: str | None
+    start_at: datetime
+
 
-        if not appointments:
-            return None
-
-        # Convert strings to date objects safely
-        parsed = []
-        for a in appointments:
-            try:
-                appt_date = datetime.strptime(a.date, "%Y-%m-%d").date()
-            except Exception:
-                continue  # skip invalid rows
-            if appt_date >= today:
-                parsed.append((appt_date, a))
-
-        if not parsed:
-            return None
-
-        # Get earliest upcoming
-        parsed.sort(key=lambda x: x[0])
-        return parsed[0][1]
+# patient_id → (expires_at monotonic, data version, UpcomingAppointment | None)
+# An entry is only served while clinic:data_version is unchanged, so a write
+# from any process (e.g. a cancel on the dashboard) invalidates it. Without
+# Redis there is no version and every lookup hits the DB.
+UPCOMING_CACHE_TTL_SEC = float(os.getenv("UPCOMING_CACHE_TTL_SEC", 60))
+_upcoming_cache: dict[int, tuple[float, int, UpcomingAppointment | None]] = {}
+
+
+def _cached_upcoming(patient_id: int, version: int | None, now: datetime):
+    """(hit, appointment) for a patient at this data version."""
+    cached = _upcoming_cache.get(patient_id) if version is not None else None
+    if cached and cached[0] > monotonic() and cached[1] == version:
+        appt = cached[2]
+        if appt is None or appt.start_at >= now:
+            return True, appt
+    return False, None
+
+
+def _cache_upcoming(patient_id: int, version: int | None, upcoming: UpcomingAppointment | None):
+    if version is not None:
+        _upcoming_cache[patient_id] = (monotonic() + UPCOMING_CACHE_TTL_SEC, version, upcoming)
+
+
+def _clinic_now() -> datetime:
+    """Naive wall-clock time at the clinic (same basis as start_at)."""
+    return datetime.now(pytz.timezone("Asia/Karachi")).replace(tzinfo=None)
+
+
+def get_upcoming_appointment(patient_id: int, uow: UnitOfWork | None = None):
+    """
+    Return the patient's next non-cancelled appointment starting from now.
+    One indexed (patient_id, start_at) lookup, cached per patient and
+    data version.
+    """
+    try:
+        now = _clinic_now()
+        # Read before the query: a write after this point bumps the version
+        version = get_data_version()
+        hit, appt = _cached_upcoming(patient_id, version, now)
+        if hit:
+            return appt
+
+        with _work(uow) as work:
+            a = (
+                work.session.query(Appointment)
+                .filter(Appointment.patient_id == patient_id)
+                .filter(Appointment.start_at >= now)
+                .filter(or_(Appointment.status.is_(None), Appointment.status != "Cancelled"))
+                .order_by(Appointment.start_at.asc())
+                .first()
+            )
+            upcoming = UpcomingAppointment(
+                id=a.id,
+                patient_id=a.patient_id,
+                date=a.date,
+                time=a.time,
+                status=a.status,
+                start_at=a.start_at,
+            ) if a else None
+
+        _cache_upcoming(patient_id, version, upcoming)
+        return upcoming
     except Exception as e:
         logger.exception(f"[get_upcoming_appointment] Failed for patient_id={patient_id}: {e}")
         return None
 
 
-def create_appointment(patient_id: int, date: str, time: str):
-    """Create a new future appointment."""
+class SlotTakenError(Exception):
+    """The requested slot is already held by another active appointment."""
+
+    def __init__(self, date: str, time: str):
+        super().__init__(f"{date} {time} is already booked")
+        self.date = date
+        self.time = time
+
+
+def _is_slot_conflict(e: IntegrityError) -> bool:
+    # SQLite names the column, MySQL/Postgres the index; both contain "slot_key"
+    return "slot_key" in str(e.orig)
+
+
+def _move_statement(appt: Appointment, new_date: str, new_time: str):
+    """
+    Conditional move: applies only if the row still has the date/time/status
+    we read (0 rows → someone changed it first). The UNIQUE slot_key makes
+    the target slot check part of the same statement.
+    """
+    status = "Rescheduled"
+    start_at = compose_start_at(new_date, new_time)
+    current_status = (
+        Appointment.status.is_(None) if appt.status is None else Appointment.status == appt.status
+    )
+    return (
+        update(Appointment)
+        .where(Appointment.id == appt.id)
+        .where(Appointment.date == appt.date)
+        .where(Appointment.time == appt.time)
+        .where(current_status)
+        .values(
+            date=new_date,
+            time=new_time,
+            status=status,
+            start_at=start_at,
+            slot_key=slot_key_for(start_at, new_time, status),
+            updated_at=datetime.utcnow(),
+        )
+    )
+
+
+def _state(appt: Appointment) -> tuple:
+    return (appt.patient_id, appt.date, appt.time, appt.status)
+
+
+def _on_appointment_change(before: tuple | None, after: tuple | None):
+    """
+    Post-commit hook for every appointment write (queued on the unit of work).
+    `before` / `after` are (patient_id, date, time, status) snapshots.
+    Keeps derived state (slot bitmaps, upcoming cache, dashboard snapshot)
+    in step with the table.
+    """
+    availability.on_appointment_change(before and before[1:], after and after[1:])
+    for state in (before, after):
+        if state:
+            _upcoming_cache.pop(state[0], None)
+    bump_data_version()
+
+
+def create_appointment(patient_id: int, date: str, time: str, uow: UnitOfWork | None = None):
+    """
+    Create a new future appointment. Insert-and-catch: no pre-check, the
+    unique slot index decides. Raises SlotTakenError if the slot is held.
+    """
     try:
-        with db_context():
+        with _work(uow) as work:
             appt = Appointment(
                 patient_id=patient_id,
                 date=date,
@@ -161,9 +449,16 @@ def create_appointment(patient_id: int, date: str, time: str):
                 status="Booked",
                 created_at=datetime.utcnow(),
             )
-            db.session.add(appt)
-            db.session.commit()
+            work.session.add(appt)
+            work.session.flush()
+            work.on_commit(_on_appointment_change, None, _state(appt))
             return appt
+    except IntegrityError as e:
+        if _is_slot_conflict(e):
+            logger.info(f"[create_appointment] Slot taken: {date} {time} (patient_id={patient_id})")
+            raise SlotTakenError(date, time) from e
+        logger.exception(f"[create_appointment] Failed for patient_id={patient_id}, date={date}, time={time}: {e}")
+        return None
     except Exception as e:
         logger.exception(
             f"[create_appointment] Failed for patient_id={patient_id}, date={date}, time={time}: {e}"
@@ -171,23 +466,33 @@ def create_appointment(patient_id: int, date: str, time: str):
         return None
 
 
-def reschedule_appointment(appt_id: int, new_date: str, new_time: str):
-    """Safely reschedule an appointment."""
+def reschedule_appointment(appt_id: int, new_date: str, new_time: str, uow: UnitOfWork | None = None):
+    """
+    Atomically move an appointment (see _move_statement).
+    Returns None if it's gone or changed underneath us; raises
+    SlotTakenError if the new slot is held.
+    """
     try:
-        with db_context():
-            appt = Appointment.query.get(appt_id)   # Always load inside session
+        with _work(uow) as work:
+            appt = work.session.get(Appointment, appt_id)   # Always load inside session
 
             if not appt:
                 return None
 
-            appt.date = new_date
-            appt.time = new_time
-            appt.status = "Rescheduled"
-
-            db.session.add(appt)  # ensure tracked
-            db.session.commit()
+            before = _state(appt)
+            moved = work.session.execute(_move_statement(appt, new_date, new_time))
+            if moved.rowcount != 1:
+                logger.warning(f"[reschedule_appointment] Appointment {appt_id} changed concurrently; not moved")
+                return None
 
+            work.on_commit(_on_appointment_change, before, _state(appt))
             return appt
+    except IntegrityError as e:
+        if _is_slot_conflict(e):
+            logger.info(f"[reschedule_appointment] Slot taken: {new_date} {new_time} (appt_id={appt_id})")
+            raise SlotTakenError(new_date, new_time) from e
+        logger.exception(f"[reschedule_appointment] Failed for appt_id={appt_id}, date={new_date}, time={new_time}: {e}")
+        return None
     except Exception as e:
         logger.exception(
             f"[reschedule_appointment] Failed for appt_id={appt_id}, date={new_date}, time={new_time}: {e}"
@@ -195,34 +500,79 @@ def reschedule_appointment(appt_id: int, new_date: str, new_time: str):
         return None
 
 
+def get_patient_appointment_on(patient_id: int, date: str, uow: UnitOfWork | None = None):
+    """The patient's appointment on a given day, if any (index range scan)."""
+    try:
+        day_start, day_end = day_bounds(date)
+        with _work(uow) as work:
+            return (
+                work.session.query(Appointment)
+                .filter(Appointment.patient_id == patient_id)
+                .filter(Appointment.start_at >= day_start)
+                .filter(Appointment.start_at < day_end)
+                .order_by(Appointment.start_at.asc())
+                .first()
+            )
+    except Exception as e:
+        logger.exception(f"[get_patient_appointment_on] Failed for patient_id={patient_id}, date={date}: {e}")
+        return None
+
+
 def get_booked_slots(date: str):
-    """Return all booked slots for a given date."""
+    """Return all held (booked or rescheduled) slots for a given date."""
     try:
+        day_start, day_end = day_bounds(date)
         with db_context():
-            appointments = (
-                Appointment.query
-                .filter(Appointment.date == date)
-                .filter(Appointment.status == "Booked")
+            # slot_key is set exactly for slot-holding rows (unique index scan)
+            rows = (
+                db.session.query(Appointment.time)
+                .filter(Appointment.slot_key >= day_start)
+                .filter(Appointment.slot_key < day_end)
                 .all()
             )
-            return [a.time for a in appointments]
+            return [time for (time,) in rows]
     except Exception as e:
         logger.exception(f"[get_booked_slots] Failed for date={date}: {e}")
         return []
 
-def delete_appointment(appointment_id: int) -> bool:
+def get_booked_slots_between(start_date: str, end_date: str) -> dict[str, list[str]]:
     """
-    Delete an appointment record safely using db_context.
-    Returns True if deleted, False otherwise.
+    Booked slots for every day in [start_date, end_date] from ONE range query.
+    Returns {date: [time, ...]} for days that have bookings.
     """
     try:
+        window_start, _ = day_bounds(start_date)
+        _, window_end = day_bounds(end_date)
         with db_context():
-            appt = Appointment.query.get(appointment_id)
+            rows = (
+                db.session.query(Appointment.date, Appointment.time)
+                .filter(Appointment.slot_key >= window_start)
+                .filter(Appointment.slot_key < window_end)
+                .all()
+            )
+        booked: dict[str, list[str]] = {}
+        for day, time in rows:
+            booked.setdefault(day, []).append(time)
+        return booked
+    except Exception as e:
+        logger.exception(f"[get_booked_slots_between] Failed for {start_date}..{end_date}: {e}")
+        return {}
+
+def delete_appointment(appointment_id: int, uow: UnitOfWork | None = None) -> bool:
+    """
+    Delete an appointment record safely.
+    Returns True if deleted, False otherwise.
+    """
+    try:
+        with _work(uow) as work:
+            appt = work.session.get(Appointment, appointment_id)
             if not appt:
                 return False
 
-            db.session.delete(appt)
-            db.session.commit()
+            before = _state(appt)
+            work.session.delete(appt)
+            work.session.flush()
+            work.on_commit(_on_appointment_change, before, None)
             return True
 
     except Exception as e:
@@ -237,6 +587,7 @@ def upsert_appointment(
     date: str,
     time: str,
     status: str | None = None,
+    uow: UnitOfWork | None = None,
 ):
     """
     Create or update an appointment for dashboard/manual control.
@@ -244,9 +595,9 @@ def upsert_appointment(
     - Otherwise, create a new one.
     """
     try:
-        with db_context():
+        with _work(uow) as work:
             if appointment_id:
-                appt = Appointment.query.get(appointment_id)
+                appt = work.session.get(Appointment, appointment_id)
             else:
                 appt = Appointment(
                     patient_id=patient_id,
@@ -259,14 +610,16 @@ def upsert_appointment(
             if not appt:
                 return None
 
+            before = _state(appt) if appt.id else None
             appt.patient_id = patient_id
             appt.date = date
             appt.time = time
             if status:
                 appt.status = status
 
-            db.session.add(appt)
-            db.session.commit()
+            work.session.add(appt)
+            work.session.flush()
+            work.on_commit(_on_appointment_change, before, _state(appt))
             return appt
     except Exception as e:
         logger.exception(
@@ -275,12 +628,23 @@ def upsert_appointment(
         return None
 
 
+# (clinic-local day, data version) → (built at monotonic, snapshot).
+# Only the latest entry is kept; a new day or any write changes the key.
+SNAPSHOT_MAX_AGE_SEC = float(os.getenv("SNAPSHOT_MAX_AGE_SEC", 300))
+_snapshot_cache: dict[tuple[str, int], tuple[float, dict]] = {}
+
+
 def get_dashboard_snapshot():
     """
     Aggregate data for the receptionist dashboard:
     - Today's appointments (with patient info)
     - High-level stats
     - Recent patients list
+
+    Served from memory until the clinic day or the data version changes
+    (SNAPSHOT_MAX_AGE_SEC caps it in case a bump was missed). Without
+    Redis there is no version, so every request rebuilds. The clock
+    fields (timezone, today_label, as_of_human) are filled per request.
     """
     try:
         try:
@@ -289,86 +653,18 @@ def get_dashboard_snapshot():
             tz = pytz.UTC
 
         now = datetime.now(tz)
-        today_str = now.strftime("%Y-%m-%d")
-
-        with db_context():
-            # All appointments for today (ordered by time)
-            todays_appointments = (
-                Appointment.query
-                .filter(Appointment.date == today_str)
-                .order_by(Appointment.time.asc())
-                .all()
-            )
+        version = get_data_version()
+        key = (now.strftime("%Y-%m-%d"), version)
 
-            # Recent patients (limit to avoid huge tables)
-            recent_patients = (
-                Patient.query
-                .order_by(Patient.created_at.desc())
-                .limit(50)
-                .all()
-            )
+        cached = _snapshot_cache.get(key) if version is not None else None
+        if cached and monotonic() - cached[0] < SNAPSHOT_MAX_AGE_SEC:
+            return _with_clock(cached[1], tz, now)
 
-            total_patients = Patient.query.count()
-
-            # Build appointment payload and compute status breakdown
-            status_counts: dict[str, int] = {}
-            today_payload = []
-            for appt in todays_appointments:
-                status = appt.status or "Unknown"
-                status_counts[status] = status_counts.get(status, 0) + 1
-
-                # Access relationship while session is still active to avoid DetachedInstanceError.
-                patient_obj = getattr(appt, "patient", None)
-                today_payload.append(
-                    {
-                        "id": appt.id,
-                        "time": appt.time,
-                        "date": appt.date,
-                        "status": status,
-                        "patient": {
-                            "id": getattr(patient_obj, "id", None),
-                            "name": getattr(patient_obj, "name", "Unknown"),
-                            "phone": getattr(patient_obj, "phone", ""),
-                        },
-                    }
-                )
-
-            patients_payload = []
-            for p in recent_patients:
-                created_str = ""
-                try:
-                    if p.created_at:
-                        created_str = p.created_at.strftime("%b %d, %Y")
-                except Exception:
-                    created_str = ""
-
-                patients_payload.append(
-                    {
-                        "id": p.id,
-                        "name": p.name,
-                        "phone": p.phone,
-                        "email": p.email,
-                        "created_at_human": created_str,
-                    }
-                )
-
-        stats = {
-            "total_patients": total_patients,
-            "today_total": len(today_payload),
-            "today_booked": status_counts.get("Booked", 0),
-            "today_rescheduled": status_counts.get("Rescheduled", 0),
-            "today_pending": status_counts.get("Pending", 0),
-            "today_cancelled": status_counts.get("Cancelled", 0),
-            "timezone": str(tz),
-            "today_label": now.strftime("%A, %b %d"),
-            "as_of_human": now.strftime("%b %d, %Y %I:%M %p"),
-        }
-
-        return {
-            "stats": stats,
-            "today_appointments": today_payload,
-            "patients": patients_payload,
-        }
+        snapshot = _build_dashboard_snapshot(now)
+        if version is not None:
+            _snapshot_cache.clear()
+            _snapshot_cache[key] = (monotonic(), snapshot)
+        return _with_clock(snapshot, tz, now)
 
     except Exception as e:
         logger.exception(f"[get_dashboard_snapshot] Failed: {e}")
@@ -387,4 +683,94 @@ def get_dashboard_snapshot():
             },
             "today_appointments": [],
             "patients": [],
-        }
\ No newline at end of file
+            "patients_next_cursor": None,
+        }
+
+
+def _with_clock(snapshot: dict, tz, now: datetime) -> dict:
+    """A copy of a (possibly cached) snapshot with this request's clock fields."""
+    stats = {
+        **snapshot["stats"],
+        "timezone": str(tz),
+        "today_label": now.strftime("%A, %b %d"),
+        "as_of_human": now.strftime("%b %d, %Y %I:%M %p"),
+    }
+    return {**snapshot, "stats": stats}  # a copy: callers add keys (live_sessions)
+
+
+def _build_dashboard_snapshot(now: datetime) -> dict:
+    """Run the dashboard queries (raises on failure; never cached then)."""
+    day_start, day_end = day_bounds(now.strftime("%Y-%m-%d"))
+
+    with db_context():
+        # All appointments for today (ordered by real time, not string),
+        # patients joined in the same SELECT instead of one lazy load per row
+        todays_appointments = (
+            Appointment.query
+            .options(joinedload(Appointment.patient))
+            .filter(Appointment.start_at >= day_start)
+            .filter(Appointment.start_at < day_end)
+            .order_by(Appointment.start_at.asc())
+            .all()
+        )
+
+        # Status breakdown computed by the database
+        status_counts: dict[str, int] = {
+            (status or "Unknown"): count
+            for status, count in (
+                db.session.query(Appointment.status, func.count(Appointment.id))
+                .filter(Appointment.start_at >= day_start)
+                .filter(Appointment.start_at < day_end)
+                .group_by(Appointment.status)
+                .all()
+            )
+        }
+
+        # Recent patients (limit to avoid huge tables); the window count is
+        # evaluated before LIMIT, so it carries the total patient count too
+        recent_rows = (
+            db.session.query(Patient, func.count(Patient.id).over())
+            .order_by(Patient.created_at.desc(), Patient.id.desc())
+            .limit(RECENT_PATIENTS_LIMIT)
+            .all()
+        )
+        total_patients = recent_rows[0][1] if recent_rows else 0
+
+        today_payload = []
+        for appt in todays_appointments:
+            patient_obj = appt.patient
+            today_payload.append(
+                {
+                    "id": appt.id,
+                    "time": appt.time,
+                    "date": appt.date,
+                    "status": appt.status or "Unknown",
+                    "patient": {
+                        "id": getattr(patient_obj, "id", None),
+                        "name": getattr(patient_obj, "name", "Unknown"),
+                        "phone": getattr(patient_obj, "phone", ""),
+                    },
+                }
+            )
+
+        patients_payload = [_patient_row(p) for p, _ in recent_rows]
+        patients_next_cursor = (
+            _patient_cursor(recent_rows[-1][0])
+            if total_patients > len(recent_rows) else None
+        )
+
+    stats = {
+        "total_patients": total_patients,
+        "today_total": len(today_payload),
+        "today_booked": status_counts.get("Booked", 0),
+        "today_rescheduled": status_counts.get("Rescheduled", 0),
+        "today_pending": status_counts.get("Pending", 0),
+        "today_cancelled": status_counts.get("Cancelled", 0),
+    }
+
+    return {
+        "stats": stats,
+        "today_appointments": today_payload,
+        "patients": patients_payload,
+        "patients_next_cursor": patients_next_cursor,
+    }
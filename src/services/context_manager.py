@@ -3,8 +3,8 @@
 import logging
 from contextvars import ContextVar
 from datetime import datetime
-from dataclasses import asdict
-from src.services.redis_service import save_context, load_context, clear_context,BookingContext
+from dataclasses import fields
+from src.services.redis_service import merge_context_async, load_context_if_exists_async, clear_context_async, BookingContext
 
 
 logger = logging.getLogger(__name__)
@@ -12,47 +12,61 @@ logger = logging.getLogger(__name__)
 # 🧠 Tracks which participant (caller) is active right now
 CURRENT_PARTICIPANT: ContextVar[str] = ContextVar("participant_id")
 
-# 🧩 Get context from Redis or create new one
-def _ctx() -> BookingContext:
+# 🗂️ Live BookingContext per call, owned by this process.
+# The entrypoint binds the AgentSession userdata here, so tools read and
+# mutate the same object; Redis only holds a checkpoint for the dashboard.
+_LIVE_CONTEXTS: dict[str, BookingContext] = {}
+
+
+def bind_context(pid: str, ctx: BookingContext) -> BookingContext:
+    """Make `ctx` the in-process context for participant `pid`."""
+    _LIVE_CONTEXTS[pid] = ctx
+    return ctx
+
+
+def release_context(pid: str):
+    """Forget the in-process context once the call is over."""
+    _LIVE_CONTEXTS.pop(pid, None)
+
+
+# 🧩 Get the live context (Redis only on first access for this call)
+async def _ctx() -> BookingContext:
     pid = CURRENT_PARTICIPANT.get(None)
     if not pid:
         logger.warning("Context accessed before participant set.")
         return BookingContext()
-    return load_context(pid) or BookingContext()
 
-# 💾 Save context back to Redis
-def _save(ctx: BookingContext):
-    caller_id = CURRENT_PARTICIPANT.get()
-    if not caller_id:
-        return
-
-    # Load old context (if it exists)
-    old = load_context(caller_id)
+    live = _LIVE_CONTEXTS.get(pid)
+    if live is None:
+        live = bind_context(pid, await load_context_if_exists_async(pid) or BookingContext())
+    return live
 
-    if not old:
-        # No existing context → simply save entire object
-        save_context(caller_id, ctx)
-        logger.info(f"[Redis] Saved NEW context for {caller_id}: {ctx}")
+# 💾 Write-through checkpoint: one atomic Lua write of the whole live
+# object (fields reset to None are cleared in Redis), no read-back
+async def _save(ctx: BookingContext):
+    caller_id = CURRENT_PARTICIPANT.get(None)
+    if not caller_id:
         return
 
-    # Convert dataclasses to dicts
-    old_dict = asdict(old)
-    new_dict = asdict(ctx)
-
-    # Merge dictionaries: only update non-None values
-    for key, value in new_dict.items():
-        if value is not None:
-            old_dict[key] = value
+    live = _LIVE_CONTEXTS.get(caller_id)
 
-    # Create a new merged BookingContext object
-    merged = BookingContext(**old_dict)
+    if live is None:
+        live = bind_context(caller_id, ctx)
+    elif live is not ctx:
+        # Foreign object → merge only non-None values into the live one
+        for f in fields(ctx):
+            value = getattr(ctx, f.name)
+            if value is not None:
+                setattr(live, f.name, value)
 
-    save_context(caller_id, merged)
-    logger.info(f"[Redis] Saved MERGED context for {caller_id}: {merged}")
+    await merge_context_async(caller_id, live)
+    # Full context repr only at DEBUG (lazy args: no repr unless enabled)
+    logger.debug("[Redis] Checkpointed context for %s: %s", caller_id, live)
 
 # 🧹 Clear context from Redis
-def _clear():
+async def _clear():
     pid = CURRENT_PARTICIPANT.get(None)
     if pid:
-        clear_context(pid)
-        logger.info(f"[Redis] Cleared context for {pid}")
\ No newline at end of file
+        release_context(pid)
+        await clear_context_async(pid)
+        logger.info(f"[Redis] Cleared context for {pid}")
@@ -1,11 +1,31 @@
+import threading
 from contextlib import contextmanager
-from src.app_factory import create_app
 
-# Create your Flask app instance once
-flask_app = create_app()
+# The process's Flask app. Built on first use (not at import) so importing
+# services never opens the DB; entrypoints and tests may install their own.
+flask_app = None
+_app_lock = threading.Lock()
+
+
+def set_app(app):
+    """Use `app` (e.g. the one wsgi.py serves) for every db_context()."""
+    global flask_app
+    flask_app = app
+    return app
+
+
+def get_app():
+    global flask_app
+    if flask_app is None:
+        with _app_lock:
+            if flask_app is None:
+                from src.app_factory import create_app  # local import: keeps this module import-cheap
+                flask_app = create_app()
+    return flask_app
+
 
 @contextmanager
 def db_context():
     """Provide a transactional scope around a series of DB operations."""
-    with flask_app.app_context():
-        yield
\ No newline at end of file
+    with get_app().app_context():
+        yield
@@ -0,0 +1,179 @@
+import os
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from latency_tracker import span, percentile
+
+
+logger = logging.getLogger("db_executor")
+
+
+# -------------------------------
+# ⏱️ LATENCY BUDGET
+# -------------------------------
+
+# How long a tool may spend on the database before the agent says something.
+# Leaves room for the LLM + TTS inside a natural conversational pause.
+TOOL_DB_BUDGET_SEC = float(os.getenv("TOOL_DB_BUDGET_SEC", 2.0))
+
+# Spoken when a tool's DB work misses its deadline
+SLOW_DB_REPLY = (
+    "Sorry, our system is taking a little longer than usual. "
+    "Could you give me a moment and ask me that again?"
+)
+
+# Absolute loop-time deadline of the tool call in progress (None = default budget)
+_DEADLINE: ContextVar[float | None] = ContextVar("db_deadline", default=None)
+
+
+class DBDeadlineExceeded(TimeoutError):
+    """DB work didn't finish inside the tool's latency budget."""
+
+
+# -------------------------------
+# 🧵 BOUNDED POOL
+# -------------------------------
+
+DB_POOL_WORKERS = int(os.getenv("DB_POOL_WORKERS", 4))
+_executor = ThreadPoolExecutor(max_workers=DB_POOL_WORKERS, thread_name_prefix="db")
+
+
+class _PoolStats:
+    """Counters for the pool; read via db_pool_stats()."""
+
+    def __init__(self, window: int = 512):
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.submitted = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.waits: deque[float] = deque(maxlen=window)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self.waits)
+            queued, running = self.queued, self.running
+            submitted, timeouts, skipped = self.submitted, self.timeouts, self.skipped
+
+        return {
+            "workers": DB_POOL_WORKERS,
+            "queue_depth": queued,
+            "running": running,
+            "submitted": submitted,
+            "timeouts": timeouts,
+            "skipped_stale": skipped,
+            "wait_ms_p50": round(percentile(waits, 0.50) * 1000, 1),
+            "wait_ms_p95": round(percentile(waits, 0.95) * 1000, 1),
+            "wait_ms_max": round(waits[-1] * 1000, 1) if waits else 0.0,
+        }
+
+
+_stats = _PoolStats()
+
+
+def db_pool_stats() -> dict:
+    """Queue depth, in-flight work, deadline misses and queue wait percentiles."""
+    return _stats.snapshot()
+
+
+def deadline_passed() -> bool:
+    """True once the current tool call's DB deadline has gone by."""
+    deadline = _DEADLINE.get()
+    return deadline is not None and asyncio.get_running_loop().time() >= deadline
+
+
+def _remaining(loop) -> float:
+    deadline = _DEADLINE.get()
+    if deadline is None:
+        return TOOL_DB_BUDGET_SEC
+    return deadline - loop.time()
+
+
+async def run_db(fn, *args):
+    """
+    Run blocking DB work on the bounded pool, within the current tool's
+    deadline (TOOL_DB_BUDGET_SEC when called outside db_budget()).
+    Raises DBDeadlineExceeded if the result isn't back in time. Work still
+    queued when its caller gave up is dropped instead of run.
+    """
+    loop = asyncio.get_running_loop()
+    remaining = _remaining(loop)
+    if remaining <= 0:
+        with _stats._lock:
+            _stats.timeouts += 1
+        raise DBDeadlineExceeded(f"{fn.__name__}: no budget left")
+
+    enqueued = perf_counter()
+
+    def _call():
+        with _stats._lock:
+            _stats.queued -= 1
+            _stats.running += 1
+            _stats.waits.append(perf_counter() - enqueued)
+        try:
+            return fn(*args)
+        finally:
+            with _stats._lock:
+                _stats.running -= 1
+
+    with _stats._lock:
+        _stats.queued += 1
+        _stats.submitted += 1
+    future = _executor.submit(_call)
+
+    try:
+        with span(f"db.{fn.__name__}"):
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=remaining)
+    except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+        # Still queued → drop it; cancel() fails once a worker has picked it up
+        with _stats._lock:
+            if future.cancel():
+                _stats.queued -= 1
+                _stats.skipped += 1
+            if isinstance(e, asyncio.TimeoutError):
+                _stats.timeouts += 1
+        if isinstance(e, asyncio.CancelledError):
+            raise
+        logger.warning(f"[db_executor] {fn.__name__} missed its {remaining:.2f}s deadline")
+        raise DBDeadlineExceeded(f"{fn.__name__} exceeded {remaining:.2f}s") from e
+
+
+@asynccontextmanager
+async def db_budget(seconds: float | None = None):
+    """
+    Deadline for all DB work in a tool call, sync (run_db) or async
+    (clinic_repository): raises DBDeadlineExceeded once it runs out.
+
+        try:
+            async with db_budget():
+                ...
+        except DBDeadlineExceeded:
+            return SLOW_DB_REPLY
+    """
+    loop = asyncio.get_running_loop()
+    budget = TOOL_DB_BUDGET_SEC if seconds is None else seconds
+    deadline = loop.time() + budget
+    outer = _DEADLINE.get()
+    if outer is not None:
+        deadline = min(deadline, outer)  # nested budgets never extend the call's
+
+    token = _DEADLINE.set(deadline)
+    try:
+        async with asyncio.timeout_at(deadline):
+            yield
+    except DBDeadlineExceeded:
+        raise
+    except TimeoutError as e:
+        with _stats._lock:
+            _stats.timeouts += 1
+        logger.warning(f"[db_executor] DB work exceeded the {budget:.2f}s tool budget")
+        raise DBDeadlineExceeded(f"exceeded {budget:.2f}s") from e
+    finally:
+        _DEADLINE.reset(token)
@@ -1,19 +1,43 @@
-import os, json
+import os, json, asyncio, time
 import redis
-from dataclasses import dataclass, asdict, field
-from datetime import datetime
+import redis.asyncio as aioredis
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
+from redis.asyncio.retry import Retry as AsyncRetry
+from dataclasses import dataclass, asdict, field, fields
+from datetime import datetime, timezone
 from typing import Optional, List, Dict
 from src.models.patient_db import Patient
 from src.models import Appointment
 from src.services.db_context import db_context
+from latency_tracker import span, traced
+
+# Bounded retries: an unreachable Redis should cost milliseconds, not the
+# client's default multi-second backoff, on both dashboard writes and calls.
+def _retry(retry_cls=Retry):
+    return retry_cls(ExponentialBackoff(cap=0.2, base=0.02), int(os.getenv("REDIS_RETRIES", 1)))
 
 # ✅ Redis connection setup
 r = redis.Redis(
     host=os.getenv("REDIS_HOST", "localhost"),
     port=int(os.getenv("REDIS_PORT", 6379)),
-    db=0,
+    db=int(os.getenv("REDIS_DB", 0)),
     decode_responses=True,
+    retry=_retry(),
 ) 
+
+# ✅ Async Redis client for the voice worker (never blocks the event loop)
+# One pool per process; connections are created lazily on the running loop.
+async_pool = aioredis.ConnectionPool(
+    host=os.getenv("REDIS_HOST", "localhost"),
+    port=int(os.getenv("REDIS_PORT", 6379)),
+    db=int(os.getenv("REDIS_DB", 0)),
+    decode_responses=True,
+    max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", 50)),
+    retry=_retry(AsyncRetry),
+)
+ar = aioredis.Redis(connection_pool=async_pool, retry=_retry(AsyncRetry))
+
 # ===============================================================
 # ☎️  LONG-TERM MEMORY (CallerProfile)
 # ===============================================================
@@ -49,40 +73,73 @@ def load_caller_profile(phone: str) -> CallerProfile:
     raw = r.get(key)
 
     # 1️⃣ Redis
-    if raw:
-        try:
-            data = json.loads(raw)
-            return CallerProfile(**data)
-        except Exception as e:
-            print(f"[Redis] ⚠️ Corrupted profile for {phone}: {e}")
-
-    # 2️⃣ Database
+    profile = _parse_caller_profile(phone, raw)
+    if profile:
+        return profile
+
+    # 2️⃣ Database → 3️⃣ Completely new caller
+    profile = _caller_profile_from_db(phone) or CallerProfile(phone=phone)
+    save_caller_profile(profile)
+    return profile
+
+def _parse_caller_profile(phone: str, raw: str | None) -> CallerProfile | None:
+    if not raw:
+        return None
+    try:
+        data = json.loads(raw)
+        return CallerProfile(**data)
+    except Exception as e:
+        print(f"[Redis] ⚠️ Corrupted profile for {phone}: {e}")
+        return None
+
+def _caller_profile_from_db(phone: str) -> CallerProfile | None:
+    """Build a CallerProfile from the patients table (None if unknown)."""
     with db_context():
         patient = Patient.query.filter_by(phone=phone).first()
 
-        if patient:
-            latest_appt = (
-                Appointment.query.filter_by(patient_id=patient.id)
-                .order_by(Appointment.date.desc())
-                .first()
-            )
-
-            profile = CallerProfile(
-                name=patient.name,
-                phone=patient.phone,
-                last_appointment={
-                    "date": str(latest_appt.date) if latest_appt else None,
-                    "time": latest_appt.time if latest_appt else None,
-                    "status": latest_appt.status if latest_appt else None,
-                } if latest_appt else None,
-            )
-
-            save_caller_profile(profile)
-            return profile
-
-    # 3️⃣ Completely new caller
-    profile = CallerProfile(phone=phone)
-    save_caller_profile(profile)
+        if not patient:
+            return None
+
+        latest_appt = (
+            Appointment.query.filter_by(patient_id=patient.id)
+            .order_by(Appointment.start_at.desc())
+            .first()
+        )
+
+        return CallerProfile(
+            name=patient.name,
+            phone=patient.phone,
+            last_appointment={
+                "date": str(latest_appt.date) if latest_appt else None,
+                "time": latest_appt.time if latest_appt else None,
+                "status": latest_appt.status if latest_appt else None,
+            } if latest_appt else None,
+        )
+
+@traced("redis.save_caller_profile")
+async def save_caller_profile_async(profile: CallerProfile, ttl_sec: int = 604800):
+    """Async twin of save_caller_profile for the voice worker."""
+    if not profile.phone:
+        return
+    serialized = json.dumps(asdict(profile))
+    await ar.setex(_caller_key(profile.phone), ttl_sec, serialized)
+    print(f"[Redis] 💾 Saved caller profile for {profile.phone}")
+
+async def load_caller_profile_async(phone: str) -> CallerProfile:
+    """
+    Async twin of load_caller_profile (Redis → DB → new profile).
+    The DB fallback runs in a worker thread so the event loop keeps serving audio.
+    """
+    with span("redis.load_caller_profile"):
+        raw = await ar.get(_caller_key(phone))
+
+    profile = _parse_caller_profile(phone, raw)
+    if profile:
+        return profile
+
+    with span("db.caller_profile"):
+        profile = await asyncio.to_thread(_caller_profile_from_db, phone) or CallerProfile(phone=phone)
+    await save_caller_profile_async(profile)
     return profile
 
 def upsert_caller_profile(phone: str, name: Optional[str] = None, last_appointment: Optional[dict] = None, ttl_sec: int = 604800) -> CallerProfile:
@@ -110,6 +167,19 @@ def upsert_caller_profile(phone: str, name: Optional[str] = None, last_appointme
     save_caller_profile(profile, ttl_sec=ttl_sec)
     return profile
 
+async def upsert_caller_profile_async(phone: str, name: Optional[str] = None, last_appointment: Optional[dict] = None, ttl_sec: int = 604800) -> CallerProfile:
+    """Async twin of upsert_caller_profile."""
+    if not phone:
+        raise ValueError("phone is required for CallerProfile")
+    existing = await load_caller_profile_async(phone)
+    if name:
+        existing.name = name
+    if last_appointment:
+        existing.last_appointment = last_appointment
+    existing.last_seen = datetime.utcnow().isoformat()
+    await save_caller_profile_async(existing, ttl_sec=ttl_sec)
+    return existing
+
 # ✅ Data model for call context
 @dataclass
 class BookingContext:
@@ -121,6 +191,7 @@ class BookingContext:
     date: str | None = None
     time: str | None = None
     suggested_slots: list[str] | None = None
+    held_slot: list[str] | None = None   # [date, time] reserved in Redis (see availability.hold_slot)
 
     # State machine
     stage: str = "start"       # start | collecting_name | collecting_phone | got_time | booking | rescheduling
@@ -144,45 +215,205 @@ class BookingContext:
 def _key(pid: str) -> str:
     return f"context:{pid}"
 
+# ✅ BookingContext lives in a Redis hash: one field per attribute,
+# each value JSON-encoded so lists/bools/ints round-trip.
+CONTEXT_FIELDS = tuple(f.name for f in fields(BookingContext))
+
+# 📇 Index of live calls: sorted set of participant ids scored by start
+# time. Lets the dashboard skip a keyspace SCAN over caller:* profiles.
+ACTIVE_INDEX_KEY = "contexts:active"
+# Entries older than this are pruned even if their hash still exists.
+MAX_CALL_AGE_SEC = int(os.getenv("MAX_CALL_AGE_SEC", 4 * 3600))
+
+# Atomic context write, then register the call in the live index (start
+# time kept unless replacing). Modes:
+#   replace    — DEL, then HSET every non-null field (new call / hydrate)
+#   checkpoint — whole object: HSET non-null fields, HDEL null ones, so a
+#                field the tools reset (held_slot, mode, ...) is cleared
+#   merge      — partial dict: null fields are skipped, so the update never
+#                wipes values another writer stored
+# Only replace may set created_at; otherwise it is written if missing.
+# Legacy JSON-string keys are dropped.
+# KEYS[1] = context key, KEYS[2] = live index
+# ARGV[1] = ttl, ARGV[2] = mode, ARGV[3] = start score, ARGV[4] = participant id,
+# ARGV[5..] = field, value pairs
+_WRITE_CONTEXT_LUA = """
+local key = KEYS[1]
+local mode = ARGV[2]
+local replace = mode == 'replace'
+if replace or redis.call('TYPE', key).ok == 'string' then
+    redis.call('DEL', key)
+end
+local pairs = {}
+local nulls = {}
+for i = 5, #ARGV, 2 do
+    local name, value = ARGV[i], ARGV[i + 1]
+    if value == 'null' then
+        if mode == 'checkpoint' then
+            table.insert(nulls, name)
+        end
+    elseif name == 'created_at' and not replace then
+        redis.call('HSETNX', key, name, value)
+    else
+        table.insert(pairs, name)
+        table.insert(pairs, value)
+    end
+end
+if #nulls > 0 then
+    redis.call('HDEL', key, unpack(nulls))
+end
+if #pairs > 0 then
+    redis.call('HSET', key, unpack(pairs))
+end
+redis.call('EXPIRE', key, ARGV[1])
+if replace then
+    redis.call('ZADD', KEYS[2], ARGV[3], ARGV[4])
+else
+    redis.call('ZADD', KEYS[2], 'NX', ARGV[3], ARGV[4])
+end
+return #pairs / 2
+"""
+_write_context = r.register_script(_WRITE_CONTEXT_LUA)
+_write_context_async = ar.register_script(_WRITE_CONTEXT_LUA)
+
+def _start_score(data: dict) -> float:
+    try:
+        return datetime.fromisoformat(data["created_at"]).replace(tzinfo=timezone.utc).timestamp()
+    except Exception:
+        return time.time()
+
+def _context_keys(pid: str) -> list:
+    return [_key(pid), ACTIVE_INDEX_KEY]
+
+def _merge_mode(ctx: BookingContext | dict) -> str:
+    """Whole objects checkpoint (None clears the field); dicts are partial merges."""
+    return "merge" if isinstance(ctx, dict) else "checkpoint"
+
+def _context_args(pid: str, ctx: BookingContext | dict, ttl_sec: int, mode: str) -> list:
+    data = asdict(ctx) if isinstance(ctx, BookingContext) else ctx
+    args: list = [ttl_sec, mode, _start_score(data), pid]
+    for name in CONTEXT_FIELDS:
+        if name in data:
+            args.extend((name, json.dumps(data[name])))
+    return args
+
+def _decode_fields(names, values) -> dict:
+    """Decode HMGET/HGETALL output, leaving missing fields out."""
+    return {
+        name: json.loads(value)
+        for name, value in zip(names, values)
+        if value is not None and name in CONTEXT_FIELDS
+    }
+
+def _parse_context(mapping: dict | None) -> BookingContext | None:
+    if not mapping:
+        return None
+    return BookingContext(**_decode_fields(mapping.keys(), mapping.values()))
+
 # ✅ Load session context
 def load_context(pid: str) -> BookingContext:
-    raw = r.get(_key(pid))
-    return BookingContext(**json.loads(raw)) if raw else BookingContext()
+    return _parse_context(r.hgetall(_key(pid))) or BookingContext()
 
 # ✅ Load session context if exists
 def load_context_if_exists(pid: str) -> BookingContext | None:
-    raw = r.get(_key(pid))
-    return BookingContext(**json.loads(raw)) if raw else None
+    return _parse_context(r.hgetall(_key(pid)))
+
+# ✅ Load only the fields a caller needs (missing ones are left out)
+def load_context_fields(pid: str, *names: str) -> dict:
+    return _decode_fields(names, r.hmget(_key(pid), names))
 
 # ✅ Save session context with TTL = 5 minutes (300 seconds)
 def save_context(pid: str, ctx: BookingContext, ttl_sec: int = 300):
+    """Replace the whole context (new call / hydrate)."""
     try:
-        serialized = json.dumps(asdict(ctx))
-        result = r.setex(_key(pid), ttl_sec, serialized)
-        if result:
-            print(f"[Redis] ✅ Saved context for {pid}")
-            return True
-        else:
-            print(f"[Redis] ⚠️ Failed to save context for {pid}")
-            return False
+        _write_context(keys=_context_keys(pid), args=_context_args(pid, ctx, ttl_sec, "replace"))
+        print(f"[Redis] ✅ Saved context for {pid}")
+        return True
     except Exception as e:
         print(f"[Redis] ❌ Save error for {pid}: {e}")
         return False
 
+# ✅ Update in one atomic round trip: a BookingContext is checkpointed whole
+# (None clears the field), a dict only touches its non-None keys
+def merge_context(pid: str, ctx: BookingContext | dict, ttl_sec: int = 300):
+    try:
+        _write_context(keys=_context_keys(pid), args=_context_args(pid, ctx, ttl_sec, _merge_mode(ctx)))
+        return True
+    except Exception as e:
+        print(f"[Redis] ❌ Merge error for {pid}: {e}")
+        return False
+
+# ✅ Async twins used by the LiveKit tools
+@traced("redis.load_context")
+async def load_context_async(pid: str) -> BookingContext:
+    return _parse_context(await ar.hgetall(_key(pid))) or BookingContext()
 
+@traced("redis.load_context")
+async def load_context_if_exists_async(pid: str) -> BookingContext | None:
+    return _parse_context(await ar.hgetall(_key(pid)))
 
+@traced("redis.load_context_fields")
+async def load_context_fields_async(pid: str, *names: str) -> dict:
+    return _decode_fields(names, await ar.hmget(_key(pid), names))
 
+@traced("redis.save_context")
+async def save_context_async(pid: str, ctx: BookingContext, ttl_sec: int = 300):
+    try:
+        await _write_context_async(keys=_context_keys(pid), args=_context_args(pid, ctx, ttl_sec, "replace"))
+        print(f"[Redis] ✅ Saved context for {pid}")
+        return True
+    except Exception as e:
+        print(f"[Redis] ❌ Save error for {pid}: {e}")
+        return False
 
+@traced("redis.merge_context")
+async def merge_context_async(pid: str, ctx: BookingContext | dict, ttl_sec: int = 300):
+    try:
+        await _write_context_async(keys=_context_keys(pid), args=_context_args(pid, ctx, ttl_sec, _merge_mode(ctx)))
+        return True
+    except Exception as e:
+        print(f"[Redis] ❌ Merge error for {pid}: {e}")
+        return False
 
+# ✅ Delete session context manually
+def clear_context(pid: str):
+    pipe = r.pipeline()
+    pipe.delete(_key(pid))
+    pipe.zrem(ACTIVE_INDEX_KEY, pid)
+    pipe.execute()
+    print(f"[Redis] Cleared context for {pid}")
 
+@traced("redis.clear_context")
+async def clear_context_async(pid: str):
+    pipe = ar.pipeline()
+    pipe.delete(_key(pid))
+    pipe.zrem(ACTIVE_INDEX_KEY, pid)
+    await pipe.execute()
+    print(f"[Redis] Cleared context for {pid}")
 
+# ✅ Clinic data version: bumped on every patient/appointment write so any
+# process (dashboard, worker) can tell when its cached views are stale.
+DATA_VERSION_KEY = "clinic:data_version"
 
+def get_data_version() -> int | None:
+    """Current data version, or None when Redis can't be reached."""
+    try:
+        return int(r.get(DATA_VERSION_KEY) or 0)
+    except Exception:
+        return None
 
+@traced("redis.get_data_version")
+async def get_data_version_async() -> int | None:
+    try:
+        return int(await ar.get(DATA_VERSION_KEY) or 0)
+    except Exception:
+        return None
 
-# ✅ Delete session context manually
-def clear_context(pid: str):
-    r.delete(_key(pid))
-    print(f"[Redis] Cleared context for {pid}")
+def bump_data_version():
+    try:
+        r.incr(DATA_VERSION_KEY)
+    except Exception as e:
+        print(f"[Redis] ⚠️ Could not bump data version: {e}")
 
 # ✅ Participant ↔ context key mapping helpers
 def _participant_map_key(participant_id: str) -> str:
@@ -201,6 +432,21 @@ import re
 
 
 
+def _session_for(caller_id: str, profile: CallerProfile | None) -> BookingContext:
+    """Build this call's BookingContext (no profile → ask for the phone first)."""
+    if profile is None:
+        return BookingContext(stage="ask_phone", status="Pending")
+
+    return BookingContext(
+        name=profile.name,
+        phone=profile.phone,
+        date=None,
+        time=None,
+        status="returning" if profile.name else "new",
+        stage="start",
+    )
+
+
 def hydrate_context(caller_id: str, phone: str | None = None) -> BookingContext:
     """
     Hydrates session context:
@@ -209,7 +455,7 @@ def hydrate_context(caller_id: str, phone: str | None = None) -> BookingContext:
     """
 
     if not phone:
-        ctx = BookingContext(stage="ask_phone", status="Pending")
+        ctx = _session_for(caller_id, None)
         save_context(caller_id, ctx)
         print("[Hydrate] No phone detected — asking caller.")
         return ctx
@@ -218,14 +464,7 @@ def hydrate_context(caller_id: str, phone: str | None = None) -> BookingContext:
     profile = load_caller_profile(phone)
 
     # Build session from profile
-    session = BookingContext(
-        name=profile.name,
-        phone=profile.phone,
-        date=None,
-        time=None,
-        status="returning" if profile.name else "new",
-        stage="start",
-    )
+    session = _session_for(caller_id, profile)
 
     save_context(caller_id, session)
 
@@ -233,6 +472,93 @@ def hydrate_context(caller_id: str, phone: str | None = None) -> BookingContext:
     return session
 
 
+async def hydrate_context_async(caller_id: str, phone: str | None = None) -> BookingContext:
+    """Async twin of hydrate_context for the LiveKit entrypoint."""
+    if not phone:
+        ctx = _session_for(caller_id, None)
+        await save_context_async(caller_id, ctx)
+        print("[Hydrate] No phone detected — asking caller.")
+        return ctx
+
+    profile = await load_caller_profile_async(phone)
+    session = _session_for(caller_id, profile)
+
+    await save_context_async(caller_id, session)
+
+    print(f"[Hydrate] 💾 Session hydrated for {caller_id}")
+    return session
+
+
+# Fields the dashboard needs from each live context (HMGET, not HGETALL)
+_SESSION_FIELDS = (
+    "name", "phone", "stage", "status",
+    "date", "time", "new_date", "new_time", "old_date", "old_time",
+    "created_at",
+)
+
+
+def _session_row(key: str, values: list | None) -> Dict | None:
+    """Turn one HMGET of a `context:*` hash into a dashboard row (None if unusable)."""
+    if not values or all(v is None for v in values):
+        return None
+
+    try:
+        ctx = BookingContext(**_decode_fields(_SESSION_FIELDS, values))
+    except Exception:
+        return None
+
+    # participant_id is everything after "context:"
+    participant_id = key.split(":", 1)[1] if ":" in key else key
+
+    # Derive best date/time representation
+    date = ctx.date or ctx.new_date or ctx.old_date
+    time = ctx.time or ctx.new_time or ctx.old_time
+
+    started_ago = ""
+    try:
+        created_dt = datetime.fromisoformat(ctx.created_at)
+        delta = datetime.utcnow() - created_dt
+        secs = int(delta.total_seconds())
+        if secs < 60:
+            started_ago = "Just now"
+        elif secs < 3600:
+            started_ago = f"{secs // 60} min ago"
+        else:
+            started_ago = f"{secs // 3600} hr ago"
+    except Exception:
+        started_ago = ""
+
+    return {
+        "participant_id": participant_id,
+        "name": ctx.name,
+        "phone": ctx.phone,
+        "stage": ctx.stage,
+        "status": ctx.status,
+        "date": date,
+        "time": time,
+        "created_at": ctx.created_at,
+        "started_ago": started_ago,
+    }
+
+
+def _live_window() -> tuple[float, float]:
+    """Score range of calls young enough to still be live."""
+    return 0, time.time() - MAX_CALL_AGE_SEC
+
+
+def _collect_sessions(members: list, rows: list) -> tuple[List[Dict], list]:
+    """Pair index members with their HMGET rows; expired ones are returned for pruning."""
+    sessions: List[Dict] = []
+    stale = []
+    for pid, values in zip(members, rows):
+        row = _session_row(_key(pid), values)
+        if row:
+            sessions.append(row)
+        else:
+            stale.append(pid)
+    return sessions, stale
+
+
 def list_active_sessions() -> List[Dict]:
     """
     Return a list of active call sessions from Redis for the dashboard.
@@ -243,59 +569,51 @@ def list_active_sessions() -> List[Dict]:
     - stage / status
     - date / time (if known)
     - created_at and a human "started_ago" string
-    """
-    sessions: List[Dict] = []
 
+    Reads the live-call index (newest first) and fetches every context in
+    one pipeline, so the cost doesn't grow with stored caller profiles.
+    Members whose context hash has expired are pruned on the way.
+    """
     try:
-        for key in r.scan_iter("context:*"):
-            raw = r.get(key)
-            if not raw:
-                continue
-
-            try:
-                data = json.loads(raw)
-                ctx = BookingContext(**data)
-            except Exception:
-                continue
-
-            # participant_id is everything after "context:"
-            participant_id = key.split(":", 1)[1] if ":" in key else key
-
-            # Derive best date/time representation
-            date = ctx.date or ctx.new_date or ctx.old_date
-            time = ctx.time or ctx.new_time or ctx.old_time
-
-            started_ago = ""
-            try:
-                created_dt = datetime.fromisoformat(ctx.created_at)
-                delta = datetime.utcnow() - created_dt
-                secs = int(delta.total_seconds())
-                if secs < 60:
-                    started_ago = "Just now"
-                elif secs < 3600:
-                    started_ago = f"{secs // 60} min ago"
-                else:
-                    started_ago = f"{secs // 3600} hr ago"
-            except Exception:
-                started_ago = ""
-
-            sessions.append(
-                {
-                    "participant_id": participant_id,
-                    "name": ctx.name,
-                    "phone": ctx.phone,
-                    "stage": ctx.stage,
-                    "status": ctx.status,
-                    "date": date,
-                    "time": time,
-                    "created_at": ctx.created_at,
-                    "started_ago": started_ago,
-                }
-            )
+        pipe = r.pipeline(transaction=False)
+        pipe.zremrangebyscore(ACTIVE_INDEX_KEY, *_live_window())
+        pipe.zrange(ACTIVE_INDEX_KEY, 0, -1, desc=True)
+        _, members = pipe.execute()
+        if not members:
+            return []
+
+        pipe = r.pipeline(transaction=False)
+        for pid in members:
+            pipe.hmget(_key(pid), _SESSION_FIELDS)
+        sessions, stale = _collect_sessions(members, pipe.execute())
+
+        if stale:
+            r.zrem(ACTIVE_INDEX_KEY, *stale)
     except Exception:
         # For dashboard display, it's fine to fail silently and show no sessions.
         return []
 
-    # Sort newest first
-    sessions.sort(key=lambda s: s.get("created_at") or "", reverse=True)
+    return sessions
+
+
+async def list_active_sessions_async() -> List[Dict]:
+    """Async twin of list_active_sessions."""
+    try:
+        pipe = ar.pipeline(transaction=False)
+        pipe.zremrangebyscore(ACTIVE_INDEX_KEY, *_live_window())
+        pipe.zrange(ACTIVE_INDEX_KEY, 0, -1, desc=True)
+        _, members = await pipe.execute()
+        if not members:
+            return []
+
+        pipe = ar.pipeline(transaction=False)
+        for pid in members:
+            pipe.hmget(_key(pid), _SESSION_FIELDS)
+        sessions, stale = _collect_sessions(members, await pipe.execute())
+
+        if stale:
+            await ar.zrem(ACTIVE_INDEX_KEY, *stale)
+    except Exception:
+        return []
+
     return sessions
@@ -1,27 +1,4 @@
 document.addEventListener("DOMContentLoaded", () => {
-  // ───────────────────────────────────────────────
-  // Patient search filter
-  // ───────────────────────────────────────────────
-  const searchInput = document.querySelector("#patient-search");
-  const patientRows = document.querySelectorAll("#patients-table tbody tr");
-
-  if (searchInput && patientRows.length) {
-    searchInput.addEventListener("input", (event) => {
-      const term = String(event.target.value || "").trim().toLowerCase();
-
-      patientRows.forEach((row) => {
-        const name = String(row.dataset.name || "").toLowerCase();
-        const phone = String(row.dataset.phone || "").toLowerCase();
-
-        if (!term || name.includes(term) || phone.includes(term)) {
-          row.style.display = "";
-        } else {
-          row.style.display = "none";
-        }
-      });
-    });
-  }
-
   // ───────────────────────────────────────────────
   // Patient CRUD modal controls
   // ───────────────────────────────────────────────
@@ -36,9 +13,6 @@ document.addEventListener("DOMContentLoaded", () => {
   const patientFieldPhone = document.querySelector("#patient-phone");
   const patientFieldEmail = document.querySelector("#patient-email");
 
-  const patientEditButtons = document.querySelectorAll(".btn-edit-patient");
-  const patientDeleteButtons = document.querySelectorAll(".btn-delete-patient");
-
   const openPatientModal = (mode, data) => {
     if (!patientModal) return;
 
@@ -86,34 +60,152 @@ document.addEventListener("DOMContentLoaded", () => {
     }
   }
 
-  patientEditButtons.forEach((btn) => {
-    btn.addEventListener("click", () => {
-      const id = btn.dataset.id || "";
-      const name = btn.dataset.name || "";
-      const phone = btn.dataset.phone || "";
-      const email = btn.dataset.email || "";
+  // Rows are re-rendered by the search below, so listen on the table
+  const patientsTable = document.querySelector("#patients-table");
 
-      openPatientModal("edit", { id, name, phone, email });
+  if (patientsTable) {
+    patientsTable.addEventListener("click", (event) => {
+      const editBtn = event.target.closest(".btn-edit-patient");
+      if (editBtn) {
+        const id = editBtn.dataset.id || "";
+        const name = editBtn.dataset.name || "";
+        const phone = editBtn.dataset.phone || "";
+        const email = editBtn.dataset.email || "";
+
+        openPatientModal("edit", { id, name, phone, email });
+        return;
+      }
+
+      const deleteBtn = event.target.closest(".btn-delete-patient");
+      if (deleteBtn) {
+        const form = deleteBtn.closest("form");
+        if (!form) return;
+
+        const name =
+          deleteBtn.closest("tr")?.querySelector("td:first-child")?.textContent?.trim() ||
+          "this patient";
+
+        const confirmed = window.confirm(
+          `Are you sure you want to delete ${name}? This cannot be undone.`,
+        );
+        if (confirmed) {
+          form.submit();
+        }
+      }
     });
-  });
+  }
 
-  patientDeleteButtons.forEach((btn) => {
-    btn.addEventListener("click", () => {
-      const form = btn.closest("form");
-      if (!form) return;
+  // ───────────────────────────────────────────────
+  // Patient search (server-side, paginated)
+  // ───────────────────────────────────────────────
+  const searchInput = document.querySelector("#patient-search");
+  const loadMoreBtn = document.querySelector("#patient-load-more");
+  const patientsBody = patientsTable?.querySelector("tbody");
+
+  const escapeHtml = (value) =>
+    String(value ?? "").replace(/[&<>"']/g, (ch) => ({
+      "&": "&amp;",
+      "<": "&lt;",
+      ">": "&gt;",
+      '"': "&quot;",
+      "'": "&#39;",
+    })[ch]);
+
+  const patientRowHtml = (patient) => {
+    const deleteUrl = patientsTable.dataset.deleteUrl.replace(
+      /\/0\/delete$/,
+      `/${encodeURIComponent(patient.id)}/delete`,
+    );
+    return `
+      <tr data-name="${escapeHtml(String(patient.name || "").toLowerCase())}"
+          data-phone="${escapeHtml(String(patient.phone || "").toLowerCase())}">
+        <td>${escapeHtml(patient.name)}</td>
+        <td>${escapeHtml(patient.phone)}</td>
+        <td>${escapeHtml(patient.email || "—")}</td>
+        <td>${escapeHtml(patient.created_at_human || "—")}</td>
+        <td class="table__actions">
+          <button
+            type="button"
+            class="btn-icon btn-icon--ghost btn-edit-patient"
+            data-id="${escapeHtml(patient.id)}"
+            data-name="${escapeHtml(patient.name)}"
+            data-phone="${escapeHtml(patient.phone)}"
+            data-email="${escapeHtml(patient.email || "")}"
+          >
+            Edit
+          </button>
+          <form method="post" action="${escapeHtml(deleteUrl)}" class="patient-delete-form">
+            <button type="button" class="btn-icon btn-icon--danger btn-delete-patient">
+              Delete
+            </button>
+          </form>
+        </td>
+      </tr>`;
+  };
 
-      const name =
-        btn.closest("tr")?.querySelector("td:first-child")?.textContent?.trim() ||
-        "this patient";
+  const emptyRowHtml = `
+    <tr>
+      <td colspan="5" class="table__empty">No patients found.</td>
+    </tr>`;
 
-      const confirmed = window.confirm(
-        `Are you sure you want to delete ${name}? This cannot be undone.`,
-      );
-      if (confirmed) {
-        form.submit();
+  let searchTerm = "";
+  let nextCursor = patientsTable?.dataset.nextCursor || "";
+  let searchController = null;
+  let searchTimer = null;
+
+  const setNextCursor = (cursor) => {
+    nextCursor = cursor || "";
+    if (loadMoreBtn) {
+      loadMoreBtn.hidden = !nextCursor;
+    }
+  };
+
+  const fetchPatients = async (append) => {
+    if (!patientsTable || !patientsBody) return;
+
+    // Only the latest request may render; older ones are aborted
+    if (searchController) searchController.abort();
+    searchController = new AbortController();
+
+    const params = new URLSearchParams();
+    if (searchTerm) params.set("q", searchTerm);
+    if (append && nextCursor) params.set("cursor", nextCursor);
+
+    try {
+      const response = await fetch(`${patientsTable.dataset.searchUrl}?${params}`, {
+        headers: { Accept: "application/json" },
+        signal: searchController.signal,
+      });
+      if (!response.ok) return;
+
+      const page = await response.json();
+      const rows = (page.patients || []).map(patientRowHtml).join("");
+
+      if (append) {
+        patientsBody.insertAdjacentHTML("beforeend", rows);
+      } else {
+        patientsBody.innerHTML = rows || emptyRowHtml;
+      }
+      setNextCursor(page.next_cursor);
+    } catch (error) {
+      if (error.name !== "AbortError") {
+        console.error("Patient search failed", error);
       }
+    }
+  };
+
+  if (searchInput && patientsTable) {
+    searchInput.addEventListener("input", (event) => {
+      searchTerm = String(event.target.value || "").trim();
+
+      clearTimeout(searchTimer);
+      searchTimer = setTimeout(() => fetchPatients(false), 250);
     });
-  });
+  }
+
+  if (loadMoreBtn) {
+    loadMoreBtn.addEventListener("click", () => fetchPatients(true));
+  }
 
   // ───────────────────────────────────────────────
   // Appointment CRUD modal controls
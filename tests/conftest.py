@@ -7,3 +7,51 @@ if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
 
+
+
+import pytest
+from flask import Flask
+
+try:
+    import fakeredis  # noqa: F401
+    import lupa  # noqa: F401 (Lua scripts)
+except ImportError:  # pragma: no cover - depends on the environment
+    pytest.exit('The tests need fakeredis[lua] so they never touch a real Redis: pip install ".[bench]"', returncode=4)
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(monkeypatch):
+    """Every test gets its own in-process Redis; the real clients are never used."""
+    from benchmarks._backends import fake_redis_clients, fake_redis_bindings
+    from src.services import clinic_service as cs
+
+    r, ar = fake_redis_clients()
+    for module, name, value in fake_redis_bindings(r, ar):
+        monkeypatch.setattr(module, name, value)
+    # Caches keyed by the data version, which restarts at 0 with each server
+    monkeypatch.setattr(cs, "_upcoming_cache", {})
+    monkeypatch.setattr(cs, "_snapshot_cache", {})
+    return r
+
+
+@pytest.fixture
+def app(tmp_path) -> Flask:
+    from src.app_factory import create_app
+    from extensions import db
+
+    # Own sqlite file per test (stable across threads, never the dev DB)
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test_clinic.db'}",
+        "TESTING": True,
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def app_ctx(app: Flask):
+    with app.app_context():
+        yield
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+
+from extensions import db
+from src.models import Patient, Appointment
+from src.services import availability as av
+
+
+def test_legacy_time_formats_map_to_slots():
+    assert av.slot_index("9:00 AM") == 0
+    assert av.slot_index("9 AM") == 0
+    assert av.slot_index("2025-10-17T09:00:00") == 0
+    assert av.slot_index("14:30") == av.CLINIC_SLOTS.index("2:30 PM")
+    assert av.slot_index("5:00 PM") is None
+    assert av.slot_index("soon") is None
+
+
+def test_filter_masks_match_spoken_phrases():
+    assert av.slots_from_mask(av.filter_mask("tomorrow morning")) == [
+        s for s in av.CLINIC_SLOTS if "AM" in s
+    ]
+    assert av.filter_mask("any time") == av.ALL_SLOTS_MASK
+    assert "4:00 PM" in av.slots_from_mask(av.filter_mask("evening"))
+
+
+def test_bitmap_pack_roundtrip():
+    mask = av.mask_for(["9:00 AM", "12:00 PM", "4:00 PM"])
+    assert av._unpack(av._pack(mask)) == mask
+    assert av._unpack(0) is None  # unbuilt day
+    assert av._unpack(av._pack(0)) == 0  # built, empty day
+
+
+def test_day_mask_built_from_db(app, app_ctx, monkeypatch):
+    from src.services import db_context as dbc
+    monkeypatch.setattr(dbc, "flask_app", app)
+
+    day = (datetime.utcnow() + timedelta(days=1)).strftime("%Y-%m-%d")
+    patient = Patient(name="Bitmap", phone="15550001111")
+    db.session.add(patient)
+    db.session.commit()
+    for time, status in [("10:00 AM", "Booked"), ("11 AM", "Booked"), ("2:00 PM", "Cancelled")]:
+        db.session.add(Appointment(patient_id=patient.id, date=day, time=time, status=status))
+    db.session.commit()
+
+    mask = av.occupied_mask_from_db(day)
+    assert av.slots_from_mask(mask) == ["10:00 AM", "11:00 AM"]
+
+
+def test_next_open_slots_skip_full_days(app, app_ctx, monkeypatch):
+    from src.services import db_context as dbc
+    monkeypatch.setattr(dbc, "flask_app", app)
+
+    start = datetime.utcnow().date() + timedelta(days=1)
+    full_day = start.strftime("%Y-%m-%d")
+    next_day = (start + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    patient = Patient(name="Busy", phone="15550002222")
+    db.session.add(patient)
+    db.session.commit()
+    for slot in av.CLINIC_SLOTS:
+        db.session.add(Appointment(patient_id=patient.id, date=full_day, time=slot, status="Booked"))
+    db.session.add(Appointment(patient_id=patient.id, date=next_day, time="9:00 AM", status="Booked"))
+    db.session.commit()
+
+    end = (start + timedelta(days=av.BOOKING_HORIZON_DAYS)).strftime("%Y-%m-%d")
+    found = av.find_open_slots(full_day, end, limit=3)
+    assert found == [(next_day, ["9:30 AM", "10:00 AM", "10:30 AM"])]
+
+    # A preference is honoured across days before falling back
+    found = av.find_open_slots(full_day, end, limit=2, text="evening")
+    assert found == [(next_day, ["12:00 PM", "4:00 PM"])]
+
+
+def test_next_open_slots_refill_past_other_callers_holds(app, app_ctx, monkeypatch):
+    import asyncio
+
+    async def _run_db(fn, *args):
+        return fn(*args)
+
+    monkeypatch.setattr(av, "run_db", _run_db)
+    day = (datetime.utcnow().date() + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    async def _scenario():
+        for slot in av.CLINIC_SLOTS[:3]:
+            assert await av.hold_slot(day, slot, "other")
+        assert await av.hold_slot(day, av.CLINIC_SLOTS[3], "me")  # our own hold still counts as free
+        return await av.next_open_slots(day, day, limit=3, holder="me")
+
+    found = asyncio.run(_scenario())
+    assert found == [(day, list(av.CLINIC_SLOTS[3:6]))]
+
+
+def test_free_slots_skip_other_callers_holds(monkeypatch):
+    import asyncio
+
+    async def _booked(date):
+        return av.mask_for(["9:00 AM"])
+
+    async def _held(date, holder=None):
+        # "9:30 AM" is held by someone else; our own holds never count
+        return av.mask_for(["9:30 AM"]) if holder != "other" else 0
+
+    monkeypatch.setattr(av, "occupied_mask", _booked)
+    monkeypatch.setattr(av, "held_mask", _held)
+
+    slots, booked = asyncio.run(av.free_slots("2030-01-01", "morning", holder="me"))
+    assert slots[:2] == ["10:00 AM", "10:30 AM"]
+    assert av.slots_from_mask(booked) == ["9:00 AM"]
+
+
+def test_rebuild_never_caches_a_mask_older_than_a_write(monkeypatch, fake_redis):
+    import asyncio
+    r = fake_redis
+
+    async def _run_db(fn, *args):
+        return fn(*args)
+
+    day = "2030-01-01"
+    db_rows = [["9:00 AM"]]
+
+    def _from_db(date):
+        mask = av.mask_for(db_rows[-1])
+        if len(db_rows) == 1:
+            # A booking commits (and its hook runs) after our read
+            db_rows.append(["9:00 AM", "10:00 AM"])
+            av.on_appointment_change(None, (day, "10:00 AM", "Booked"))
+        return mask
+
+    monkeypatch.setattr(av, "run_db", _run_db)
+    monkeypatch.setattr(av, "occupied_mask_from_db", _from_db)
+
+    first = asyncio.run(av.occupied_mask(day))
+    assert av.slots_from_mask(first) == ["9:00 AM", "10:00 AM"]
+    assert not r.exists(av._day_key(day))  # the stale mask was not cached
+
+    # Next miss builds and caches normally
+    assert asyncio.run(av.occupied_mask(day)) == first
+    assert r.exists(av._day_key(day))
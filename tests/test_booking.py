@@ -2,38 +2,18 @@ from datetime import datetime, timedelta
 import pytest
 import asyncio
 
-from flask import Flask
-
-from src.app_factory import create_app
 from extensions import db
 from src.models import Patient, Appointment
 
 
-@pytest.fixture
-def app() -> Flask:
-    app = create_app()
-    # Use sqlite file for stability across threads
-    app.config.update(
-        SQLALCHEMY_DATABASE_URI="sqlite:///test_clinic.db",
-        TESTING=True,
-    )
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
-
-
-@pytest.fixture
-def app_ctx(app: Flask):
-    with app.app_context():
-        yield
-
-
 def _insert_patient_and_appt(name: str, phone: str, date: str, time: str):
     patient = Patient(name=name, phone=phone)
     db.session.add(patient)
     db.session.commit()
+    return patient, _insert_appt(patient, date, time)
+
+
+def _insert_appt(patient, date: str, time: str):
     appt = Appointment(
         patient_id=patient.id,
         date=date,
@@ -43,7 +23,19 @@ def _insert_patient_and_appt(name: str, phone: str, date: str, time: str):
     )
     db.session.add(appt)
     db.session.commit()
-    return patient, appt
+    return appt
+
+
+def _patch_context(monkeypatch, tl, ctx):
+    """Serve the tools a fixed BookingContext instead of Redis."""
+    async def _fake_ctx():
+        return ctx
+
+    async def _fake_save(_ctx):
+        return None
+
+    monkeypatch.setattr(tl, "_ctx", _fake_ctx)
+    monkeypatch.setattr(tl, "_save", _fake_save)
 
 
 def test_books_new_when_no_upcoming(app, app_ctx, monkeypatch):
@@ -58,14 +50,14 @@ def test_books_new_when_no_upcoming(app, app_ctx, monkeypatch):
         name="Test User",
         phone="15551234567",
         date=(datetime.utcnow() + timedelta(days=1)).strftime("%Y-%m-%d"),
+        time="10:00 AM",
         suggested_slots=["10:00 AM"],
     )
-    monkeypatch.setattr(tl, "_ctx", lambda: ctx)
-    monkeypatch.setattr(tl, "_save", lambda _ctx: None)
+    _patch_context(monkeypatch, tl, ctx)
 
     # Call booking
     result = asyncio.run(tl.booking_appointment())
-    assert "booked for" in result.lower() or "has been booked" in result.lower()
+    assert "confirmed for" in result.lower()
 
     # DB should contain the new appointment
     patient = Patient.query.filter_by(phone="15551234567").first()
@@ -86,19 +78,142 @@ def test_upcoming_asks_reschedule(app, app_ctx, monkeypatch):
     existing_date = (today + timedelta(days=1)).strftime("%Y-%m-%d")
     _insert_patient_and_appt("Alice", "15557654321", existing_date, "9:30 AM")
 
-    # Provide context proposing a different slot
-    new_date = (today + timedelta(days=2)).strftime("%Y-%m-%d")
+    # Provide context proposing a different slot the same day
     ctx = BookingContext(
         name="Alice",
         phone="15557654321",
-        date=new_date,
+        date=existing_date,
+        time="10:00 AM",
         suggested_slots=["10:00 AM"],
     )
-    monkeypatch.setattr(tl, "_ctx", lambda: ctx)
-    monkeypatch.setattr(tl, "_save", lambda _ctx: None)
+    _patch_context(monkeypatch, tl, ctx)
 
     # Call booking; should ask to move instead of booking immediately
     result = asyncio.run(tl.booking_appointment())
     assert "should i move" in result.lower() or "would you like to reschedule" in result.lower()
+    assert Appointment.query.filter_by(date=existing_date).count() == 1
+
+
+
+
+def _track_holds(monkeypatch, tl):
+    """In-memory slot holds: {(date, time): holder}."""
+    holds = {}
+
+    async def _reserve(date, time, holder):
+        return holds.setdefault((date, time), holder) == holder
+
+    async def _release(date, time, holder):
+        if holds.get((date, time)) == holder:
+            del holds[(date, time)]
+
+    monkeypatch.setattr(tl, "reserve_slot", _reserve)
+    monkeypatch.setattr(tl, "release_slot_hold", _release)
+    return holds
+
+
+def test_booking_releases_hold_on_every_exit_that_does_not_book(app, app_ctx, monkeypatch):
+    from src.routes.livekit import tools as tl
+    from src.services.redis_service import BookingContext
+    from src.services.db_executor import DBDeadlineExceeded
+    from src.services import db_context as dbc
+    monkeypatch.setattr(dbc, "flask_app", app)
+    holds = _track_holds(monkeypatch, tl)
+
+    day = (datetime.utcnow() + timedelta(days=1)).strftime("%Y-%m-%d")
+    _insert_patient_and_appt("Alice", "15557654321", day, "9:30 AM")
+
+    # Existing appointment that day → asks to move it, hold released
+    ctx = BookingContext(name="Alice", phone="15557654321", date=day, time="10:00 AM")
+    _patch_context(monkeypatch, tl, ctx)
+    assert "should i move" in asyncio.run(tl.booking_appointment()).lower()
+    assert holds == {} and ctx.held_slot is None
+
+    # DB over budget / unexpected error → hold released
+    for error in (DBDeadlineExceeded("slow"), RuntimeError("boom")):
+        async def _failing(*args, error=error, **kwargs):
+            raise error
+
+        monkeypatch.setattr(tl, "get_or_create_patient", _failing)
+        ctx = BookingContext(name="Bob", phone="15550001234", date=day, time="11:00 AM")
+        _patch_context(monkeypatch, tl, ctx)
+        asyncio.run(tl.booking_appointment())
+        assert holds == {} and ctx.held_slot is None
+
+
+def test_booking_keeps_hold_while_details_are_missing(app, app_ctx, monkeypatch):
+    from src.routes.livekit import tools as tl
+    from src.services.redis_service import BookingContext
+    holds = _track_holds(monkeypatch, tl)
+
+    day = (datetime.utcnow() + timedelta(days=1)).strftime("%Y-%m-%d")
+    ctx = BookingContext(phone="15550001234", date=day, time="11:00 AM", held_slot=[day, "11:00 AM"])
+    holds[(day, "11:00 AM")] = tl._holder(ctx)
+    _patch_context(monkeypatch, tl, ctx)
+
+    assert asyncio.run(tl.booking_appointment()) == "I still need your name."
+    assert ctx.held_slot == [day, "11:00 AM"] and holds
+
+
+@pytest.mark.parametrize("failure", ["no_patient", "no_upcoming", "not_moved", "deadline", "error"])
+def test_confirm_reschedule_releases_hold_on_failure(app, app_ctx, monkeypatch, failure):
+    from src.routes.livekit import tools as tl
+    from src.services.redis_service import BookingContext
+    from src.services.availability import held_mask
+    from src.services.db_executor import DBDeadlineExceeded
+    from src.services import db_context as dbc
+    monkeypatch.setattr(dbc, "flask_app", app)
+
+    today = datetime.utcnow().date()
+    new_date = (today + timedelta(days=2)).strftime("%Y-%m-%d")
+    if failure != "no_patient":
+        patient = Patient(name="Rita", phone="15550004444")
+        db.session.add(patient)
+        db.session.commit()
+        if failure != "no_upcoming":
+            _insert_appt(patient, (today + timedelta(days=1)).strftime("%Y-%m-%d"), "9:30 AM")
+
+    async def _raise(error, *args, **kwargs):
+        raise error
+
+    if failure == "not_moved":
+        async def _not_moved(*args, **kwargs):
+            return None
+        monkeypatch.setattr(tl, "reschedule_appointment", _not_moved)
+    elif failure == "deadline":
+        monkeypatch.setattr(tl, "reschedule_appointment", lambda *a, **k: _raise(DBDeadlineExceeded("slow")))
+    elif failure == "error":
+        monkeypatch.setattr(tl, "reschedule_appointment", lambda *a, **k: _raise(RuntimeError("boom")))
+
+    ctx = BookingContext(name="Rita", phone="15550004444", date=new_date)
+    _patch_context(monkeypatch, tl, ctx)
+
+    async def flow():
+        reply = await tl.confirm_reschedule(time="11:00 AM")
+        return reply, await held_mask(new_date)
+
+    reply, held = asyncio.run(flow())
+    assert "moved your appointment" not in reply
+    assert held == 0 and ctx.held_slot is None
+
+
+def test_confirm_reschedule_converts_hold_on_success(app, app_ctx, monkeypatch):
+    from src.routes.livekit import tools as tl
+    from src.services.redis_service import BookingContext
+    from src.services.availability import held_mask
+    from src.services import db_context as dbc
+    monkeypatch.setattr(dbc, "flask_app", app)
+
+    today = datetime.utcnow().date()
+    new_date = (today + timedelta(days=2)).strftime("%Y-%m-%d")
+    _insert_patient_and_appt("Rita", "15550004444", (today + timedelta(days=1)).strftime("%Y-%m-%d"), "9:30 AM")
+    ctx = BookingContext(name="Rita", phone="15550004444", date=new_date)
+    _patch_context(monkeypatch, tl, ctx)
 
+    async def flow():
+        reply = await tl.confirm_reschedule(time="11:00 AM")
+        return reply, await held_mask(new_date)
 
+    reply, held = asyncio.run(flow())
+    assert "moved your appointment" in reply
+    assert held == 0
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from extensions import db
+from src.models import Patient, Appointment
+from src.services import clinic_repository as repo
+
+
+@pytest.fixture
+def arepo(app, app_ctx, monkeypatch):
+    """Point the async engine at the test app's database."""
+    from src.services import db_context as dbc
+    from src.services import clinic_service as cs
+    monkeypatch.setattr(dbc, "flask_app", app)
+    monkeypatch.setattr(cs, "_upcoming_cache", {})
+    monkeypatch.setattr(cs, "bump_data_version", lambda: None)
+    monkeypatch.setattr(repo, "bump_data_version", lambda: None)
+    monkeypatch.delenv("ASYNC_DATABASE_URL", raising=False)
+    return repo
+
+
+def test_async_url_follows_sync_driver():
+    assert repo.async_database_url("sqlite:////tmp/x.db") == "sqlite+aiosqlite:////tmp/x.db"
+    assert repo.async_database_url("mysql+pymysql://u:p@h/db") == "mysql+asyncmy://u:p@h/db"
+    assert repo.async_database_url("postgresql://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+
+
+def test_async_booking_round_trip(arepo):
+    async def flow():
+        async with arepo.unit_of_work() as uow:
+            patient = await arepo.get_or_create_patient("async pat", "15550008888", uow=uow)
+            appt = await arepo.create_appointment(patient["id"], "2030-07-01", "10:00 AM", uow=uow)
+
+        upcoming = await arepo.get_upcoming_appointment(patient["id"])
+        moved = await arepo.reschedule_appointment(appt.id, "2030-07-02", "11:00 AM")
+        return patient, appt, upcoming, moved
+
+    patient, appt, upcoming, moved = asyncio.run(flow())
+
+    assert upcoming.id == appt.id
+    assert moved.status == "Rescheduled"
+    # Written through the async engine, visible to the dashboard's sync session
+    assert Patient.query.filter_by(phone="15550008888").one().name == "Async Pat"
+    assert db.session.get(Appointment, appt.id).start_at.isoformat() == "2030-07-02T11:00:00"
+
+
+def test_deadline_during_commit_hooks_is_not_a_failure(arepo):
+    import time
+    from src.services.db_executor import db_budget
+
+    done = []
+
+    def _slow_hook(appt_id):
+        time.sleep(0.2)
+        done.append(appt_id)
+
+    async def flow():
+        async with db_budget(0.05), arepo.unit_of_work() as uow:
+            patient = await arepo.get_or_create_patient("late pat", "15550009999", uow=uow)
+            appt = await arepo.create_appointment(patient["id"], "2030-07-03", "10:00 AM", uow=uow)
+            uow.on_commit(_slow_hook, appt.id)
+        return appt
+
+    appt = asyncio.run(flow())  # no DBDeadlineExceeded: the booking was saved
+
+    assert done == [appt.id]
+    assert db.session.get(Appointment, appt.id).status == "Booked"
@@ -0,0 +1,245 @@
+from datetime import datetime
+
+import pytest
+import pytz
+
+from extensions import db
+from src.models import Patient, Appointment
+from src.services import clinic_service as cs
+
+
+@pytest.fixture
+def svc(app, app_ctx, monkeypatch):
+    """Route clinic_service's db_context to the test app."""
+    from src.services import db_context as dbc
+    monkeypatch.setattr(dbc, "flask_app", app)
+    monkeypatch.setattr(cs, "_upcoming_cache", {})
+    monkeypatch.setattr(cs, "_snapshot_cache", {})
+    return cs
+
+
+def _patient(name="Pat", phone="15550003333"):
+    p = Patient(name=name, phone=phone)
+    db.session.add(p)
+    db.session.commit()
+    return p
+
+
+def test_start_at_follows_date_and_time(svc):
+    p = _patient()
+    appt = svc.create_appointment(p.id, "2030-05-01", "2:30 PM")
+    assert db.session.get(Appointment, appt.id).start_at == datetime(2030, 5, 1, 14, 30)
+
+    svc.reschedule_appointment(appt.id, "2030-05-02", "9 AM")
+    assert db.session.get(Appointment, appt.id).start_at == datetime(2030, 5, 2, 9, 0)
+
+
+def test_dashboard_orders_today_by_real_time(svc):
+    today = datetime.now(pytz.timezone("Asia/Karachi")).strftime("%Y-%m-%d")
+    p = _patient()
+    for t in ["10:00 AM", "9:00 AM", "1:30 PM"]:
+        svc.create_appointment(p.id, today, t)
+
+    times = [a["time"] for a in svc.get_dashboard_snapshot()["today_appointments"]]
+    assert times == ["9:00 AM", "10:00 AM", "1:30 PM"]
+
+
+def test_upcoming_skips_past_and_cancelled(svc):
+    p = _patient()
+    svc.create_appointment(p.id, "2001-01-01", "9:00 AM")
+    cancelled = svc.create_appointment(p.id, "2030-01-01", "9:00 AM")
+    svc.upsert_appointment(
+        appointment_id=cancelled.id, patient_id=p.id,
+        date="2030-01-01", time="9:00 AM", status="Cancelled",
+    )
+    later = svc.create_appointment(p.id, "2030-02-01", "10:00 AM")
+
+    upcoming = svc.get_upcoming_appointment(p.id)
+    assert upcoming.id == later.id
+    assert (upcoming.date, upcoming.time) == ("2030-02-01", "10:00 AM")
+
+
+def test_upcoming_cache_invalidated_on_write(svc):
+    p = _patient()
+    assert svc.get_upcoming_appointment(p.id) is None  # cached miss
+
+    appt = svc.create_appointment(p.id, "2030-03-01", "11:00 AM")
+    assert svc.get_upcoming_appointment(p.id).id == appt.id
+
+    svc.delete_appointment(appt.id)
+    assert svc.get_upcoming_appointment(p.id) is None
+
+
+def test_upcoming_cache_follows_other_processes_writes(svc, monkeypatch):
+    version = {"n": 0}
+    monkeypatch.setattr(svc, "get_data_version", lambda: version["n"])
+    p = _patient()
+    appt = svc.create_appointment(p.id, "2030-03-01", "11:00 AM")
+    assert svc.get_upcoming_appointment(p.id).id == appt.id
+    calls, work = [], svc._work
+    monkeypatch.setattr(svc, "_work", lambda uow: calls.append(1) or work(uow))
+
+    assert svc.get_upcoming_appointment(p.id).id == appt.id  # cached
+    assert not calls
+
+    # Another process cancels it: the row changes and the version moves
+    db.session.get(Appointment, appt.id).status = "Cancelled"
+    db.session.commit()
+    version["n"] += 1
+
+    assert svc.get_upcoming_appointment(p.id) is None
+    assert calls
+
+
+def test_dashboard_snapshot_cached_until_a_write(svc, monkeypatch):
+    version = {"n": 0}
+    monkeypatch.setattr(svc, "get_data_version", lambda: version["n"])
+    monkeypatch.setattr(svc, "bump_data_version", lambda: version.update(n=version["n"] + 1))
+
+    _patient()
+    assert svc.get_dashboard_snapshot()["stats"]["total_patients"] == 1
+
+    # A row written behind the service's back doesn't show: served from memory
+    _patient(name="Ghost", phone="15550009999")
+    assert svc.get_dashboard_snapshot()["stats"]["total_patients"] == 1
+
+    # A service write bumps the version and the next render rebuilds
+    svc.upsert_patient(name="New", phone="15550004444")
+    assert svc.get_dashboard_snapshot()["stats"]["total_patients"] == 3
+
+
+def test_cached_dashboard_snapshot_shows_the_current_time(svc, monkeypatch):
+    monkeypatch.setattr(svc, "get_data_version", lambda: 0)
+    tz = pytz.timezone("Asia/Karachi")
+    clock = {"now": tz.localize(datetime(2030, 1, 1, 9, 0))}
+
+    class _Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock["now"]
+
+    monkeypatch.setattr(svc, "datetime", _Clock)
+    builds = []
+    build = svc._build_dashboard_snapshot
+    monkeypatch.setattr(svc, "_build_dashboard_snapshot", lambda now: builds.append(now) or build(now))
+
+    first = svc.get_dashboard_snapshot()
+    clock["now"] = tz.localize(datetime(2030, 1, 1, 11, 45))
+    second = svc.get_dashboard_snapshot()
+
+    assert first["stats"]["as_of_human"] == "Jan 01, 2030 09:00 AM"
+    assert second["stats"]["as_of_human"] == "Jan 01, 2030 11:45 AM"
+    assert len(builds) == 1  # the second render came from the cache
+    assert "as_of_human" not in next(iter(svc._snapshot_cache.values()))[1]["stats"]
+
+
+def test_dashboard_snapshot_query_count_is_constant(svc, monkeypatch):
+    monkeypatch.setattr(svc, "get_data_version", lambda: None)  # always rebuild
+    today = datetime.now(pytz.timezone("Asia/Karachi")).strftime("%Y-%m-%d")
+
+    statements = []
+    minutes = iter(range(60))
+    engine = db.engine
+    listener = lambda *args: statements.append(args[2])
+    db.event.listen(engine, "before_cursor_execute", listener)
+    try:
+        for n in (3, 40):
+            for i in range(n):
+                p = _patient(name=f"P{n}x{i}", phone=f"1555{n:03d}{i:04d}")
+                # One active booking per slot (unique slot_key): 9:00, 9:01, ...
+                minute = next(minutes)
+                db.session.add(Appointment(patient_id=p.id, date=today, time=f"9:{minute:02d} AM", status="Booked"))
+            db.session.commit()
+
+            statements.clear()
+            snapshot = svc.get_dashboard_snapshot()
+            assert len(statements) <= 3
+    finally:
+        db.event.remove(engine, "before_cursor_execute", listener)
+
+    assert snapshot["stats"]["total_patients"] == 43
+    assert snapshot["stats"]["today_booked"] == 43
+    assert all(a["patient"]["name"].startswith("P") for a in snapshot["today_appointments"])
+
+
+def test_search_patients_prefix_and_keyset_pages(svc):
+    created = datetime(2030, 1, 1, 9, 0)
+    for i in range(5):
+        db.session.add(Patient(name=f"Alice {i}", phone=f"+9230000000{i}", created_at=created))
+    db.session.add(Patient(name="Bob", phone="15550007777", created_at=created))
+    db.session.commit()
+
+    first = svc.search_patients("ali", limit=3)
+    assert [p["name"] for p in first["patients"]] == ["Alice 4", "Alice 3", "Alice 2"]
+    assert first["next_cursor"]
+
+    # Ties on created_at are broken by id, so nothing is skipped or repeated
+    second = svc.search_patients("ALI", cursor=first["next_cursor"], limit=3)
+    assert [p["name"] for p in second["patients"]] == ["Alice 1", "Alice 0"]
+    assert second["next_cursor"] is None
+
+    assert [p["name"] for p in svc.search_patients("1555-000")["patients"]] == ["Bob"]
+    assert len(svc.search_patients("92300")["patients"]) == 5
+    assert svc.search_patients("zed")["patients"] == []
+
+
+def test_search_cursor_pages_patients_without_explicit_created_at(svc):
+    for i in range(3):
+        db.session.add(Patient(name=f"Dana {i}", phone=f"1555000880{i}", created_at=None))
+    db.session.commit()
+    assert Patient.query.filter(Patient.created_at.is_(None)).count() == 0
+
+    first = svc.search_patients("dana", limit=2)
+    second = svc.search_patients("dana", cursor=first["next_cursor"], limit=2)
+
+    names = [p["name"] for p in first["patients"] + second["patients"]]
+    assert sorted(names) == ["Dana 0", "Dana 1", "Dana 2"]
+
+
+def test_unit_of_work_commits_once_then_runs_hooks(svc, monkeypatch):
+    bumps = []
+    monkeypatch.setattr(svc, "bump_data_version", lambda: bumps.append(1))
+    commits = []
+    listener = lambda conn: commits.append(1)
+    db.event.listen(db.engine, "commit", listener)
+    try:
+        with svc.unit_of_work() as uow:
+            patient = svc.get_or_create_patient("Uow", "15550005555", uow=uow)
+            svc.create_appointment(patient["id"], "2030-06-01", "9:00 AM", uow=uow)
+            assert bumps == []  # nothing is announced before the commit
+    finally:
+        db.event.remove(db.engine, "commit", listener)
+
+    assert len(commits) == 1
+    assert len(bumps) == 2
+    assert Appointment.query.filter_by(date="2030-06-01").count() == 1
+
+
+def test_unit_of_work_rolls_back_when_a_helper_fails(svc):
+    with svc.unit_of_work() as uow:
+        svc.get_or_create_patient("Half", "15550006666", uow=uow)
+        assert svc.create_appointment(None, "2030-06-01", "9:00 AM", uow=uow) is None
+
+    assert Patient.query.filter_by(phone="15550006666").first() is None
+
+
+def test_active_slot_cannot_be_double_booked(svc):
+    a, b = _patient(), _patient(name="Other", phone="15550001212")
+    first = svc.create_appointment(a.id, "2030-08-01", "10:00 AM")
+
+    with pytest.raises(svc.SlotTakenError):
+        svc.create_appointment(b.id, "2030-08-01", "10 AM")  # same slot, other spelling
+
+    # Moving onto a held slot is refused and leaves the row where it was
+    other = svc.create_appointment(b.id, "2030-08-01", "11:00 AM")
+    with pytest.raises(svc.SlotTakenError):
+        svc.reschedule_appointment(other.id, "2030-08-01", "10:00 AM")
+    assert db.session.get(Appointment, other.id).time == "11:00 AM"
+
+    # A cancelled appointment releases its slot
+    svc.upsert_appointment(
+        appointment_id=first.id, patient_id=a.id, date="2030-08-01", time="10:00 AM", status="Cancelled",
+    )
+    moved = svc.reschedule_appointment(other.id, "2030-08-01", "10:00 AM")
+    assert (moved.time, moved.status) == ("10:00 AM", "Rescheduled")
+    assert svc.get_booked_slots("2030-08-01") == ["10:00 AM"]
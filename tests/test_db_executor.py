@@ -0,0 +1,55 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.services import db_executor as dbx
+
+
+def test_run_db_returns_within_budget():
+    async def go():
+        async with dbx.db_budget(1.0):
+            return await dbx.run_db(lambda x: x * 2, 21)
+
+    assert asyncio.run(go()) == 42
+    assert dbx.db_pool_stats()["queue_depth"] == 0
+
+
+def test_slow_query_misses_deadline():
+    before = dbx.db_pool_stats()["timeouts"]
+
+    async def go():
+        async with dbx.db_budget(0.05):
+            await dbx.run_db(time.sleep, 0.5)
+
+    started = time.perf_counter()
+    with pytest.raises(dbx.DBDeadlineExceeded):
+        asyncio.run(go())
+    assert time.perf_counter() - started < 0.4  # caller isn't held for the query
+    assert dbx.db_pool_stats()["timeouts"] > before
+
+
+def test_available_slot_speaks_fallback_when_db_is_slow(monkeypatch):
+    from src.routes.livekit import tools as tl
+    from src.services import availability as av
+    from src.services.redis_service import BookingContext
+
+    ctx = BookingContext()
+
+    async def _fake_ctx():
+        return ctx
+
+    async def _fake_save(_ctx):
+        return None
+
+    async def _slow_mask(date):
+        return await dbx.run_db(time.sleep, 0.5)
+
+    monkeypatch.setattr(tl, "_ctx", _fake_ctx)
+    monkeypatch.setattr(tl, "_save", _fake_save)
+    monkeypatch.setattr(av, "occupied_mask", _slow_mask)
+    monkeypatch.setattr(dbx, "TOOL_DB_BUDGET_SEC", 0.05)
+
+    day = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    assert asyncio.run(tl.available_slot(date=day)) == dbx.SLOW_DB_REPLY
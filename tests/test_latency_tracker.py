@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+import latency_tracker as lt
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats():
+    lt._stats.clear()
+    yield
+    lt._stats.clear()
+
+
+def test_concurrent_calls_keep_separate_timelines():
+    @lt.traced("tool.lookup")
+    async def lookup(delay):
+        with lt.span("redis.get"):
+            await asyncio.sleep(delay)
+
+    async def call(call_id, delay):
+        trace = lt.start_trace(call_id)
+        # Spans from child tasks land on the call that spawned them
+        await asyncio.gather(asyncio.create_task(lookup(delay)), lookup(delay))
+        return trace.timeline()
+
+    async def main():
+        return await asyncio.gather(call("a", 0.01), call("b", 0.02))
+
+    a, b = asyncio.run(main())
+    assert a["call"] == "a" and b["call"] == "b"
+    for timeline in (a, b):
+        assert sorted(s["name"] for s in timeline["spans"]) == ["redis.get"] * 2 + ["tool.lookup"] * 2
+    assert min(s["ms"] for s in b["spans"]) >= 15
+
+    stats = lt.latency_stats()
+    assert stats["tool.lookup"]["count"] == 4
+    assert stats["redis.get"]["p50_ms"] <= stats["redis.get"]["p99_ms"]
+
+
+def test_span_marks_errors_and_still_records():
+    trace = lt.CallTrace("c")
+    token = lt._CURRENT_TRACE.set(trace)
+    try:
+        with pytest.raises(ValueError):
+            with lt.span("db.write"):
+                raise ValueError("boom")
+    finally:
+        lt._CURRENT_TRACE.reset(token)
+
+    assert trace.spans[0]["name"] == "db.write" and trace.spans[0]["error"] is True
+    assert lt.latency_stats()["db.write"]["count"] == 1
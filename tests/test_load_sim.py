@@ -0,0 +1,30 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def test_load_sim_smoke_run_books_without_double_booking(tmp_path):
+    pytest.importorskip("fakeredis")
+    out = tmp_path / "load.json"
+    # Own interpreter: the simulator swaps the Redis clients for fakeredis
+    proc = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "benchmarks", "load_sim.py"),
+         "--callers", "4", "--calls", "2", "--days", "1", "--json", str(out)],
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    assert proc.returncode == 0, proc.stderr
+
+    report = json.loads(out.read_text())
+    assert report["calls"] == 8
+    assert report["double_bookings"] == 0
+    assert not any(k.startswith("crash") for k in report["outcomes"])
+    assert "tool.booking_appointment" in report["spans"]
@@ -0,0 +1,72 @@
+import gzip
+import json
+
+import log_analytics as la
+from voice_metrics import Histogram
+
+
+def _line(ts, message, level="INFO", logger="telephony-agent", **extra):
+    return json.dumps({"timestamp": ts, "level": level, "logger": logger, "message": message, **extra})
+
+
+def test_files_are_read_oldest_rotation_first(tmp_path):
+    for name in ("voice_agent.log", "voice_agent.log.2025-11-18.gz", "voice_agent.log.2025-11-17", "other.log"):
+        (tmp_path / name).write_text("")
+
+    names = [p.rsplit("/", 1)[-1] for p in la.iter_files([str(tmp_path)])]
+    assert names == ["voice_agent.log.2025-11-17", "voice_agent.log.2025-11-18.gz", "voice_agent.log"]
+
+
+def test_reports_group_by_day_across_plain_and_gzip_rotations(tmp_path, capsys):
+    ttft = Histogram()
+    for ms in (120, 180, 900):
+        ttft.add(ms)
+
+    old_day = [
+        _line("2025-11-17T10:00:00", "📞 Incoming call from: sip_1"),
+        # Older logs: dict messages as Python reprs, one per metrics event
+        _line("2025-11-17T10:00:01", str({"event": "metrics", "type": "TTSMetrics", "data": {"type": "tts_metrics", "ttfb": 0.4}})),
+        _line("2025-11-17T10:00:02", "[booking] ❌ Error while booking", level="ERROR", logger="voice_agent.tools",
+              exception='Traceback (most recent call last):\n  File "/srv/app/tools.py", line 10, in booking\n    x()\nValueError: bad'),
+        _line("2025-11-17T10:00:03", "[booking] ❌ Error while booking", level="ERROR", logger="voice_agent.tools",
+              exception='Traceback (most recent call last):\n  File "/home/dev/tools.py", line 10, in booking\n    x()\nValueError: other'),
+        # Service-level errors are not tool errors
+        _line("2025-11-17T10:00:04", "[Redis] ❌ Connection refused", level="ERROR", logger="redis_service"),
+        "not json",
+    ]
+    new_day = [
+        _line("2025-11-18T09:00:00", "📞 Incoming call from: sip_2"),
+        _line("2025-11-18T09:05:00", {"event": "call_metrics", "call": "sip_2", "series": {"realtime_ttft": ttft.summary()}}),
+        _line("2025-11-18T09:05:00", {"event": "call_timeline", "call": "sip_2", "spans": [
+            {"name": "tool.available_slot", "at_ms": 10.0, "ms": 35.0},
+            {"name": "tool.booking_appointment", "at_ms": 50.0, "ms": 80.0, "error": True},
+        ]}, logger="latency"),
+    ]
+    (tmp_path / "voice_agent.log.2025-11-17").write_text("\n".join(old_day) + "\n")
+    with gzip.open(tmp_path / "voice_agent.log.2025-11-18.gz", "wt", encoding="utf-8") as f:
+        f.write("\n".join(new_day) + "\n")
+
+    stats = {}
+    reports = la.build_reports(la.iter_records(la.iter_lines(la.iter_files([str(tmp_path)])), stats))
+    assert sorted(reports) == ["2025-11-17", "2025-11-18"]
+    assert stats["bad_lines"] == 1
+
+    old = reports["2025-11-17"].summary()
+    assert old["calls"] == 1
+    # Keyed by tool name, the same key as the tool's spans
+    assert old["tool_errors"] == {"booking_appointment": 2}
+    assert old["latency"]["tts_ttfb"]["n"] == 1
+    # Same type + innermost frame, different paths/messages → one fingerprint
+    assert len(old["exceptions"]) == 1
+    assert old["exceptions"][0]["count"] == 2
+    assert old["exceptions"][0]["where"] == "ValueError @ tools.py:10 in booking"
+
+    new = reports["2025-11-18"].summary()
+    assert new["tool_calls"] == {"available_slot": 1, "booking_appointment": 1}
+    assert new["tool_errors"] == {"booking_appointment": 1}
+    assert new["latency"]["realtime_ttft"]["n"] == 3
+    assert new["latency"]["realtime_ttft"]["p50_ms"] == 200.0
+
+    la.main([str(tmp_path), "--day", "2025-11-18", "--json"])
+    out = [json.loads(l) for l in capsys.readouterr().out.splitlines()]
+    assert [r["day"] for r in out] == ["2025-11-18"]
@@ -0,0 +1,82 @@
+import json
+import logging
+import queue
+import sys
+
+import pytest
+
+import logging_setup
+
+
+@pytest.fixture
+def root_logging(monkeypatch):
+    """Run setup_logger() against a clean root logger, restored afterwards."""
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    root.handlers = []
+    monkeypatch.setattr(logging_setup, "_configured", False)
+    monkeypatch.setenv("LOG_LEVELS", "chatty.lib=ERROR")
+    yield root
+    logging_setup.stop_logging()
+    for h in root.handlers:
+        h.close()
+    root.handlers = saved_handlers
+    root.setLevel(saved_level)
+
+
+def test_queue_mode_writes_json_off_the_calling_thread(root_logging, tmp_path):
+    logging_setup.setup_logger(log_dir=str(tmp_path), use_queue=True)
+    # pytest's capture handlers may sit on the root too; ours is the only writer
+    ours = [h for h in root_logging.handlers if h.__module__ == "logging_setup" or isinstance(h, logging.FileHandler)]
+    assert [type(h) for h in ours] == [logging_setup._DeferredQueueHandler]
+
+    class Live:
+        value = "before"
+
+        def __repr__(self):
+            return self.value
+
+    live = Live()
+    log = logging.getLogger("voice_agent.test")
+    log.info("ctx=%s", live)
+    live.value = "after"  # the line shows the value at log time
+    log.info({"event": "call_metrics", "events": 3})
+    logging.getLogger("httpcore").info("connection chatter")
+    logging.getLogger("chatty.lib").warning("also dropped")
+
+    logging_setup.stop_logging()  # drains the queue
+    lines = [json.loads(l) for l in (tmp_path / "voice_agent.log").read_text().splitlines()]
+
+    assert [l["message"] for l in lines] == ["ctx=before", {"event": "call_metrics", "events": 3}]
+    assert lines[0]["logger"] == "voice_agent.test"
+
+
+def test_setup_is_idempotent(root_logging, tmp_path):
+    logging_setup.setup_logger(log_dir=str(tmp_path), use_queue=False)
+    handlers = root_logging.handlers[:]
+    logging_setup.setup_logger(log_dir=str(tmp_path), use_queue=False)
+    assert root_logging.handlers == handlers
+    assert sum(isinstance(h, logging.FileHandler) for h in handlers) == 1
+
+
+def test_queue_handler_copies_records_it_defers():
+    q = queue.Queue()
+    handler = logging_setup._DeferredQueueHandler(q)
+    payload = {"event": "call_timeline", "spans": [{"name": "setup"}]}
+    record = logging.makeLogRecord({"name": "t", "msg": payload, "levelno": logging.INFO})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        failed = logging.makeLogRecord({"name": "t", "msg": "ctx=%s", "args": ("a",), "exc_info": sys.exc_info()})
+
+    handler.handle(record)
+    handler.handle(failed)
+    payload["spans"].append({"name": "late"})  # mutated after the call
+
+    queued, queued_failed = q.get_nowait(), q.get_nowait()
+    assert queued.msg == {"event": "call_timeline", "spans": [{"name": "setup"}]}
+    assert record.msg is payload  # the caller's record is untouched
+    assert queued_failed.msg == "ctx=a" and queued_failed.exc_info is None
+    assert "ValueError: boom" in queued_failed.exc_text
+    assert failed.args == ("a",) and failed.exc_info is not None
+    assert json.loads(logging_setup.JsonFormatter().format(queued_failed))["exception"] == queued_failed.exc_text
@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MICRO = os.path.join(ROOT, "benchmarks", "micro.py")
+
+
+def _run(tmp_path, *args):
+    # Own interpreter: the suite swaps the Redis clients for fakeredis
+    return subprocess.run(
+        [sys.executable, MICRO, "--quick", *args],
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+
+
+def test_micro_quick_run_writes_and_checks_a_baseline(tmp_path):
+    pytest.importorskip("fakeredis")
+    baseline = tmp_path / "baseline.json"
+
+    proc = _run(tmp_path, "--baseline", str(baseline), "--update-baseline")
+    assert proc.returncode == 0, proc.stderr
+    results = json.loads(baseline.read_text())["results"]
+    for name in ("context._ctx+_save", "slots.free_slots[warm bitmap]",
+                 "db.get_upcoming_appointment[1k]", "db.get_dashboard_snapshot[1k]"):
+        assert results[name]["score"] > 0
+    assert any(name.startswith("redis.list_active_sessions") for name in results)
+
+    # Pretend the baseline was 10x faster: the run must fail loudly
+    data = json.loads(baseline.read_text())
+    for r in data["results"].values():
+        r["score"] /= 10
+    baseline.write_text(json.dumps(data))
+    proc = _run(tmp_path, "--baseline", str(baseline), "--only", "context")
+    assert proc.returncode == 1
+    assert "REGRESSION" in proc.stdout
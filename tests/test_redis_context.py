@@ -0,0 +1,121 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+
+@pytest.fixture
+def rs(fake_redis):
+    """redis_service on the suite's fakeredis server."""
+    from src.services import redis_service as rs
+    return rs
+
+
+def _started(rs, **fields):
+    ctx = rs.BookingContext(
+        name="Ada", phone="15550001111", date="2030-01-01", time="9:00 AM",
+        held_slot=["2030-01-01", "9:00 AM"], mode="cancel", cancel_appt_id=7,
+        created_at="2030-01-01T08:00:00", **fields,
+    )
+    assert rs.save_context("p1", ctx)
+    return ctx
+
+
+def test_checkpoint_clears_fields_reset_to_none(rs):
+    _started(rs)
+
+    rs.merge_context("p1", rs.BookingContext(time="10:00 AM", held_slot=None, mode=None, cancel_appt_id=None))
+
+    stored = rs.r.hgetall("context:p1")
+    assert json.loads(stored["time"]) == "10:00 AM"
+    assert "held_slot" not in stored
+    assert "mode" not in stored
+    assert "cancel_appt_id" not in stored
+    loaded = rs.load_context("p1")
+    assert loaded.held_slot is None and loaded.cancel_appt_id is None
+
+
+def test_dict_merge_skips_none(rs):
+    _started(rs)
+
+    rs.merge_context("p1", {"time": "11:00 AM", "held_slot": None, "name": None})
+
+    loaded = rs.load_context("p1")
+    assert loaded.time == "11:00 AM"
+    assert loaded.held_slot == ["2030-01-01", "9:00 AM"]
+    assert loaded.name == "Ada"
+
+
+def test_merges_never_overwrite_created_at(rs):
+    _started(rs)
+
+    rs.merge_context("p1", rs.BookingContext(name="Ada"))  # fresh default created_at
+    rs.merge_context("p1", {"created_at": "2031-01-01T00:00:00"})
+
+    assert rs.load_context("p1").created_at == "2030-01-01T08:00:00"
+
+
+def test_checkpoint_sets_created_at_when_missing(rs):
+    rs.merge_context("p2", rs.BookingContext(name="Bo", created_at="2030-02-02T10:00:00"))
+
+    assert rs.load_context("p2").created_at == "2030-02-02T10:00:00"
+
+
+def test_replace_starts_over(rs):
+    _started(rs)
+
+    rs.save_context("p1", rs.BookingContext(name="New", created_at="2030-03-03T00:00:00"))
+
+    stored = rs.r.hgetall("context:p1")
+    assert set(stored) == {"name", "stage", "status", "mode", "reschedule_confirmed", "confirmed_identity", "created_at"}
+    assert json.loads(stored["created_at"]) == "2030-03-03T00:00:00"
+
+
+def test_write_drops_legacy_string_key(rs):
+    rs.r.set("context:p1", json.dumps({"name": "Legacy"}))
+
+    rs.merge_context("p1", {"name": "Ada"})
+
+    assert rs.r.type("context:p1") == "hash"
+    assert rs.load_context("p1").name == "Ada"
+
+
+def test_live_index_score_set_on_replace_kept_on_merge(rs):
+    ctx = _started(rs)
+    score = rs.r.zscore(rs.ACTIVE_INDEX_KEY, "p1")
+    assert score == rs._start_score({"created_at": ctx.created_at})
+
+    rs.merge_context("p1", rs.BookingContext(name="Ada", created_at="2031-01-01T00:00:00"))
+    assert rs.r.zscore(rs.ACTIVE_INDEX_KEY, "p1") == score
+    assert rs.r.ttl("context:p1") > 0
+
+
+def test_async_checkpoint_clears_fields(rs):
+    _started(rs)
+
+    assert asyncio.run(rs.merge_context_async("p1", rs.BookingContext(held_slot=None, mode=None)))
+
+    assert "held_slot" not in rs.r.hgetall("context:p1")
+
+
+def test_list_active_sessions_prunes_expired_and_old_calls(rs):
+    now = time.time()
+    for pid in ("live", "expired"):
+        rs.save_context(pid, rs.BookingContext(name=pid.title(), stage="start"))
+    rs.r.delete("context:expired")  # hash TTL ran out, index entry left behind
+    rs.r.zadd(rs.ACTIVE_INDEX_KEY, {"ancient": now - rs.MAX_CALL_AGE_SEC - 60})
+
+    sessions = rs.list_active_sessions()
+
+    assert [s["participant_id"] for s in sessions] == ["live"]
+    assert rs.r.zrange(rs.ACTIVE_INDEX_KEY, 0, -1) == ["live"]
+
+
+def test_list_active_sessions_async_matches_sync(rs):
+    rs.save_context("p1", rs.BookingContext(name="Ada", date="2030-01-01", stage="got_time"))
+
+    sessions = asyncio.run(rs.list_active_sessions_async())
+
+    assert sessions == rs.list_active_sessions()
+    assert sessions[0]["name"] == "Ada" and sessions[0]["date"] == "2030-01-01"
@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def test_service_imports_have_no_side_effects(tmp_path):
+    # Fresh interpreter, run from an empty dir: nothing may be created there
+    code = """
+import logging
+import logging_setup
+from src.services import redis_service, clinic_service, clinic_repository, availability
+from src.services import db_context
+assert db_context.flask_app is None, "an app was built at import"
+assert not logging.getLogger().handlers, "handlers were attached at import"
+"""
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": ROOT},
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+import voice_metrics as vm
+
+
+@pytest.fixture(autouse=True)
+def fresh_worker():
+    vm._worker.clear()
+    yield
+    vm._worker.clear()
+
+
+def _m(type_, **fields):
+    return SimpleNamespace(type=type_, **fields)
+
+
+def test_call_summary_folds_events_into_histograms():
+    call = vm.CallMetrics("caller-1")
+    for ttft in (0.08, 0.12, 0.25, 0.9):
+        call.add(_m("realtime_model_metrics", ttft=ttft, duration=1.5, total_tokens=10, cancelled=False))
+    call.add(_m("realtime_model_metrics", ttft=-1, duration=0.2, total_tokens=0, cancelled=True))
+    call.add(_m("tts_metrics", ttfb=0.3, cancelled=False))
+    call.add(_m("eou_metrics", end_of_utterance_delay=0.6, transcription_delay=0.1))
+    call.add(_m("vad_metrics", idle_time=1.0))  # counted, not charted
+
+    summary = call.summary()
+    assert summary["call"] == "caller-1"
+    assert summary["events"] == 8
+    assert summary["tokens"] == 40
+    assert summary["cancelled"] == 1
+
+    ttft = summary["series"]["realtime_ttft"]
+    assert ttft["n"] == 4  # the -1 "no output" turn is skipped
+    assert ttft["p50_ms"] == 200.0  # bucket upper bound
+    assert ttft["max_ms"] == 900.0
+    assert set(summary["series"]) == {
+        "realtime_ttft", "realtime_duration", "tts_ttfb", "eou_delay", "transcription_delay",
+    }
+
+    stats = vm.voice_metrics_stats()
+    assert stats["realtime_ttft"]["n"] == 4
+    assert stats["realtime_ttft"]["p99_ms"] == 900.0
+
+
+def test_histogram_percentile_never_exceeds_max():
+    hist = vm.Histogram()
+    hist.add(12000.0)
+    hist.add(40.0)
+    assert hist.percentile(0.5) == 50.0
+    assert hist.percentile(0.99) == 12000.0
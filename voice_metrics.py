@@ -0,0 +1,141 @@
+import os
+import logging
+from bisect import bisect_left
+
+from latency_tracker import RollingStats
+
+
+logger = logging.getLogger("voice_metrics")
+
+
+# -------------------------------
+# 📊 HISTOGRAM (per call)
+# -------------------------------
+
+# Upper bounds (ms) of the latency buckets; the last bucket is open-ended
+BUCKETS_MS = (50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram: constant memory however long the call runs."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float):
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.n += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th sample (capped at the max seen)."""
+        if not self.n:
+            return 0.0
+        rank = max(1, round(p * self.n))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                bound = BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max
+                return round(float(min(bound, self.max)), 1)
+        return round(self.max, 1)
+
+    def merge(self, summary: dict):
+        """Fold in another histogram's summary() (e.g. read back from a log line)."""
+        buckets = summary.get("buckets") or []
+        if len(buckets) != len(self.counts):
+            return
+        for i, count in enumerate(buckets):
+            self.counts[i] += count
+        n = summary.get("n", 0)
+        self.n += n
+        self.total += summary.get("avg_ms", 0.0) * n
+        self.max = max(self.max, summary.get("max_ms", 0.0))
+
+    def summary(self) -> dict:
+        return {
+            "n": self.n,
+            "avg_ms": round(self.total / self.n, 1) if self.n else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max, 1),
+            # Raw counts (BUCKETS_MS) so log_analytics can merge calls exactly
+            "buckets": list(self.counts),
+        }
+
+
+# -------------------------------
+# 🎙️ METRICS → SERIES
+# -------------------------------
+
+# metrics.type → [(series name, field in seconds)]
+_SERIES = {
+    "llm_metrics": [("llm_ttft", "ttft")],
+    "realtime_model_metrics": [("realtime_ttft", "ttft"), ("realtime_duration", "duration")],
+    "tts_metrics": [("tts_ttfb", "ttfb")],
+    "eou_metrics": [("eou_delay", "end_of_utterance_delay"), ("transcription_delay", "transcription_delay")],
+}
+
+
+def metric_samples(metrics) -> list[tuple[str, float]]:
+    """(series, ms) pairs carried by one metrics_collected event."""
+    out = []
+    for series, field in _SERIES.get(getattr(metrics, "type", None), ()):
+        value = getattr(metrics, field, None)
+        # Realtime ttft is -1 when the turn produced no audio/text
+        if isinstance(value, (int, float)) and value >= 0:
+            out.append((series, value * 1000))
+    return out
+
+
+class CallMetrics:
+    """Folds one call's metrics_collected events into histograms and counters."""
+
+    def __init__(self, call_id: str):
+        self.call_id = call_id
+        self.series: dict[str, Histogram] = {}
+        self.events = 0
+        self.tokens = 0
+        self.cancelled = 0
+
+    def add(self, metrics):
+        self.events += 1
+        self.tokens += getattr(metrics, "total_tokens", 0) or 0
+        if getattr(metrics, "cancelled", False):
+            self.cancelled += 1
+
+        for series, ms in metric_samples(metrics):
+            hist = self.series.get(series)
+            if hist is None:
+                hist = self.series[series] = Histogram()
+            hist.add(ms)
+            _worker.add(series, ms)
+
+    def summary(self) -> dict:
+        return {
+            "event": "call_metrics",
+            "call": self.call_id,
+            "events": self.events,
+            "tokens": self.tokens,
+            "cancelled": self.cancelled,
+            "series": {name: hist.summary() for name, hist in sorted(self.series.items())},
+        }
+
+
+# -------------------------------
+# 🌐 WORKER-WIDE ROLLING PERCENTILES
+# -------------------------------
+
+# Last N samples kept per series across all calls in this process
+VOICE_METRICS_WINDOW = int(os.getenv("VOICE_METRICS_WINDOW", 2048))
+
+_worker = RollingStats(VOICE_METRICS_WINDOW)
+
+
+def voice_metrics_stats() -> dict:
+    """Rolling p50/p95/p99 (ms) per series over the worker's recent calls."""
+    return _worker.snapshot()
@@ -1,2 +1,5 @@
 from src.app_factory import create_app
-app = create_app()
\ No newline at end of file
+from src.services.db_context import set_app
+
+# One app per process: the dashboard routes and the services' db_context() share it
+app = set_app(create_app())